@@ -0,0 +1,108 @@
+"""
+Tunes the chunker token budgets: for each candidate budget, splits a set of
+texts and synthesizes them the way the streaming paths do (the first chunk
+on its own, the rest in lookahead-sized batches).
+
+Reports first-chunk latency, forward passes per text and throughput (audio
+seconds per compute second). Small budgets start playback sooner; large ones
+waste less on per-pass overhead. CHUNK_FIRST_TOKEN_BUDGET and
+CHUNK_TOKEN_BUDGET pick one point of each curve.
+
+    python -m benchmarks.bench_chunking --budgets 60 120 240 480
+    python -m benchmarks.bench_chunking --real-models --language hindi
+"""
+import argparse
+import json
+import random
+import re
+import time
+
+from benchmarks.run import make_texts, parse_mix, summarize
+
+
+def split_legacy(text):
+    # The previous chunker: sentence ends, commas after 5 words, hard split after 10
+    chunks, current, words = [], "", 0
+    for token in re.split(r'([.,!?;]+)', text):
+        if not token.strip():
+            continue
+        current += token
+        words += len(token.split())
+        if any(p in token for p in ".!?") or (words >= 5 and "," in token) or words >= 10:
+            if current.strip():
+                chunks.append(current.strip())
+            current, words = "", 0
+    if current.strip():
+        chunks.append(current.strip())
+    return chunks
+
+
+def run_budget(engine, texts, lang, split, lookahead):
+    first_latency = []
+    passes = 0
+    audio_seconds = 0.0
+    compute_seconds = 0.0
+    for text in texts:
+        chunks = split(text)
+        started = time.perf_counter()
+        results = engine.synthesize_batch(chunks[:1], lang)
+        first_latency.append(time.perf_counter() - started)
+        for i in range(1, len(chunks), lookahead):
+            results += engine.synthesize_batch(chunks[i:i + lookahead], lang)
+        compute_seconds += time.perf_counter() - started
+        passes += 1 + (len(chunks) - 1 + lookahead - 1) // lookahead
+        audio_seconds += sum(len(waveform) / sr for waveform, sr in results)
+    return {
+        "chunks_per_text": sum(len(split(t)) for t in texts) / len(texts),
+        "passes_per_text": passes / len(texts),
+        "first_chunk_ms": summarize(first_latency),
+        "audio_seconds_per_second": audio_seconds / compute_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budgets", nargs="+", type=int, default=[40, 80, 120, 240, 360, 480])
+    parser.add_argument("--texts", type=int, default=16)
+    parser.add_argument("--mix", default="medium:0.5,long:0.5")
+    parser.add_argument("--language", default="english")
+    parser.add_argument("--lookahead", type=int, default=3, help="Chunks per batch after the first (STREAM_LOOKAHEAD + 1)")
+    parser.add_argument("--real-models", action="store_true", help="Use facebook/mms-tts-* instead of the tiny model")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results JSON here as well as stdout")
+    args = parser.parse_args()
+
+    from src.core.chunker import split_into_chunks
+    from src.core.config import LANG_MAP
+    from src.core.tts_engine import engine
+
+    if not args.real_models:
+        from benchmarks.tiny_model import load_tiny_model
+        engine._load_model = load_tiny_model
+    lang_code = LANG_MAP.get(args.language, "eng")
+    # Loaded up front so model loading isn't timed
+    with engine.load_lang(lang_code):
+        texts = [engine.prepare_text(t, lang_code) for t in make_texts(args.texts, parse_mix(args.mix), random.Random(args.seed))]
+        # Warm-up pass so the first measured budget doesn't pay for lazy initialization
+        engine.synthesize_batch(texts[:1], args.language)
+
+        results = {
+            "model": "facebook/mms-tts-*" if args.real_models else "tiny",
+            "language": args.language,
+            "texts": len(texts),
+            "legacy": run_budget(engine, texts, args.language, split_legacy, args.lookahead),
+            "budgets": {},
+        }
+        for budget in args.budgets:
+            split = lambda text: split_into_chunks(text, lang_code, budget=budget, first_budget=budget)
+            results["budgets"][str(budget)] = run_budget(engine, texts, args.language, split, args.lookahead)
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Micro-benchmark for WAV encoding: the original normalize / astype / scipy
+wavfile.write into BytesIO path vs the shared preallocated encoder.
+
+Reports time per second of audio and peak allocated memory per encode (tracemalloc).
+
+    python -m benchmarks.bench_encode --seconds 5 --runs 200
+"""
+import argparse
+import io
+import json
+import time
+import tracemalloc
+
+import numpy as np
+import scipy.io.wavfile as wav
+
+from src.core.audio import encode_wav
+
+SAMPLING_RATE = 16000
+
+
+def encode_legacy(waveform, sr):
+    # What routes.synthesize and process_chunk used to do
+    waveform = waveform / np.max(np.abs(waveform)) * 32767
+    waveform = waveform.astype(np.int16)
+    byte_io = io.BytesIO()
+    wav.write(byte_io, sr, waveform)
+    return byte_io.getvalue()
+
+
+def measure(encoder, make_waveform, seconds, runs):
+    # Timing, with a fresh waveform each run since the new encoder scales in place
+    waveforms = [make_waveform() for _ in range(runs)]
+    started = time.perf_counter()
+    for waveform in waveforms:
+        encoder(waveform, SAMPLING_RATE)
+    elapsed = time.perf_counter() - started
+
+    # Memory of a single encode. numpy reports its buffers to tracemalloc, so the peak
+    # counts every full-size temporary alive at once; "buffers" expresses that peak
+    # in units of the 16-bit PCM payload (the output itself is one)
+    waveform = make_waveform()
+    tracemalloc.start()
+    encoder(waveform, SAMPLING_RATE)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "ms_per_audio_second": elapsed / runs / seconds * 1000.0,
+        "peak_bytes": peak,
+        "peak_bytes_per_audio_second": peak / seconds,
+        "buffers": round(peak / (waveform.size * 2), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0, help="Length of the test waveform")
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--output", help="Write results JSON here as well as stdout")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    base = (rng.standard_normal(int(args.seconds * SAMPLING_RATE)) * 0.3).astype(np.float32)
+    legacy, new = encode_legacy(base.copy(), SAMPLING_RATE), encode_wav(base.copy(), SAMPLING_RATE)
+    # Same header; samples may differ by one step from scaling by a precomputed factor
+    samples = np.abs(np.frombuffer(legacy, "<i2", offset=44).astype(np.int32) - np.frombuffer(new, "<i2", offset=44))
+    if legacy[:44] != new[:44] or samples.max() > 1:
+        raise SystemExit("Encoders disagree")
+
+    results = {
+        "seconds": args.seconds,
+        "runs": args.runs,
+        "legacy": measure(encode_legacy, base.copy, args.seconds, args.runs),
+        "encode_wav": measure(encode_wav, base.copy, args.seconds, args.runs),
+    }
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Cold-load time per language: from_pretrained (tokenizer + VitsModel from the
+Hugging Face cache, as MMSEngine did) vs the model store snapshot (manifest
+check, direct tokenizer, meta-device skeleton and mmap'd safetensors), with
+and without the sha256 check.
+
+Also times the first inference after each load, since mmap'd weights are
+only read when first touched. The OS page cache stays warm between runs, so
+this measures load work, not disk speed.
+
+    python -m benchmarks.bench_load --languages eng hin tel
+    python -m benchmarks.bench_load --tiny
+"""
+import argparse
+import json
+import statistics
+import tempfile
+import time
+
+import torch
+from transformers import AutoTokenizer, VitsModel
+
+from src.core.model_store import export_model, load_model, model_dir, write_snapshot
+
+
+def timed_load(load, runs):
+    """Median load seconds over `runs`, plus the first inference of the last load in ms."""
+    seconds = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        model, tokenizer = load()
+        seconds.append(time.perf_counter() - started)
+    inputs = tokenizer(["hello world"], return_tensors="pt")
+    started = time.perf_counter()
+    with torch.no_grad():
+        model(input_ids=inputs.input_ids, attention_mask=inputs.attention_mask)
+    return {"load_seconds": statistics.median(seconds), "first_inference_ms": (time.perf_counter() - started) * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--languages", nargs="+", default=["eng"], help="MMS language codes")
+    parser.add_argument("--tiny", action="store_true", help="Use a tiny random model saved locally (no download)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="Write results JSON here as well as stdout")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="model-store-bench-")
+    results = {"model": "tiny" if args.tiny else "facebook/mms-tts-*", "runs": args.runs, "languages": {}}
+    for lang_code in (["tiny"] if args.tiny else args.languages):
+        if args.tiny:
+            from benchmarks.tiny_model import load_tiny_model
+            model, tokenizer = load_tiny_model()
+            source = tempfile.mkdtemp(prefix="tiny-vits-hub-")
+            model.save_pretrained(source)
+            tokenizer.save_pretrained(source)
+            path = write_snapshot(model_dir(lang_code, root), model, tokenizer, "tiny")
+        else:
+            source = f"facebook/mms-tts-{lang_code}"
+            # Also fills the HF cache, so from_pretrained below doesn't time a download
+            path = export_model(lang_code, root)
+
+        results["languages"][lang_code] = {
+            "from_pretrained": timed_load(
+                lambda: (VitsModel.from_pretrained(source).eval(), AutoTokenizer.from_pretrained(source)), args.runs),
+            "snapshot": timed_load(lambda: load_model(path, verify_hashes=False), args.runs),
+            "snapshot_sha256": timed_load(lambda: load_model(path, verify_hashes=True), args.runs),
+        }
+        entry = results["languages"][lang_code]
+        entry["speedup"] = entry["from_pretrained"]["load_seconds"] / entry["snapshot"]["load_seconds"]
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Micro-benchmark for text normalization: the original English-only chain of
+re.sub / str.replace passes vs the compiled single-pass normalizer, cold
+(every text unseen) and warm (repeated texts served from the memo cache).
+
+Also prints both outputs for a few inputs so regressions like URLs or dates
+read as "divided by" are easy to spot.
+
+    python -m benchmarks.bench_normalize --runs 2000
+"""
+import argparse
+import json
+import re
+import time
+
+from src.core.normalizer import get_normalizer, normalize_text
+
+TEXTS = [
+    "The integral of x^2 from 0 to 3 equals 9, and π/2 is about 1.5708.",
+    "Order #4521 shipped on 2024-05-17: 3 items for $129.99, 2.5 kg total.",
+    "Read the docs at https://example.com/api/v2/tts before 10:30 tomorrow.",
+    "Speed limit is 100 km/h; the temperature outside is -4°C (25% humidity).",
+    "We expect 1,250,000 visitors, i.e. 12/05/2024 will be our busiest day.",
+    "Plain sentences without numbers should cost next to nothing to normalize.",
+]
+
+
+def normalize_legacy(text):
+    # What MMSEngine.prepare_text used to do for English
+    text = re.sub(r'(\w+)\^2', r'\1 squared', text)
+    text = re.sub(r'(\w+)\^3', r'\1 cubed', text)
+    text = text.replace('+', ' plus ')
+    text = text.replace('=', ' equals ')
+    text = text.replace('*', ' times ')
+    text = text.replace('/', ' divided by ')
+    text = text.replace('∫', 'integral ')
+    text = text.replace('π', 'pie')
+    return text
+
+
+def timed(fn, inputs):
+    started = time.perf_counter()
+    for text in inputs:
+        fn(text)
+    return (time.perf_counter() - started) / len(inputs) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=2000)
+    parser.add_argument("--output", help="Write results JSON here as well as stdout")
+    args = parser.parse_args()
+
+    cold = [f"{text} ({i})" for i in range(args.runs) for text in TEXTS]
+    warm = TEXTS * args.runs
+    compiled = get_normalizer("eng")
+    normalize_text.cache_clear()
+
+    results = {
+        "texts": len(cold),
+        "us_per_text": {
+            "legacy": timed(normalize_legacy, cold),
+            "compiled": timed(compiled.normalize, cold),
+            "compiled_memoized_cold": timed(lambda text: normalize_text(text, "eng"), cold),
+            "compiled_memoized_warm": timed(lambda text: normalize_text(text, "eng"), warm),
+        },
+        "samples": [
+            {"input": text, "legacy": normalize_legacy(text), "compiled": compiled.normalize(text)}
+            for text in TEXTS
+        ],
+    }
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
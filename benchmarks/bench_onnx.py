@@ -0,0 +1,80 @@
+"""
+Parity check and real-time-factor benchmark: eager torch vs ONNX Runtime
+(fp32 and dynamic int8) for one MMS model.
+
+    python -m benchmarks.bench_onnx --lang eng
+    python -m benchmarks.bench_onnx --tiny          # offline, random weights
+"""
+import argparse
+import json
+import os
+import tempfile
+
+from transformers import AutoTokenizer, VitsModel
+
+from src.core.config import settings
+from src.core.onnx_backend import (OnnxVitsModel, check_parity, export_onnx, parity_ok, quantize_onnx,
+                                   real_time_factor)
+
+TEXTS = [
+    "The quick brown fox jumps over the lazy dog.",
+    "Please hold while we connect your call.",
+    "Your order has shipped and will arrive tomorrow.",
+    "Thank you.",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lang", default="eng")
+    parser.add_argument("--tiny", action="store_true", help="Use a tiny random model (no download)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="Write results JSON here as well as stdout")
+    args = parser.parse_args()
+
+    if args.tiny:
+        from benchmarks.tiny_model import load_tiny_model
+        model, tokenizer = load_tiny_model(deterministic=True)
+    else:
+        model_id = f"facebook/mms-tts-{args.lang}"
+        tokenizer = AutoTokenizer.from_pretrained(model_id)
+        model = VitsModel.from_pretrained(model_id).eval()
+        # Zero noise so torch and ONNX outputs are comparable sample by sample
+        model.noise_scale = 0.0
+        model.noise_scale_duration = 0.0
+
+    workdir = tempfile.mkdtemp(prefix="onnx-bench-")
+    fp32_path = os.path.join(workdir, "model.onnx")
+    int8_path = os.path.join(workdir, "model.int8.onnx")
+    export_onnx(model, tokenizer, fp32_path)
+    quantize_onnx(fp32_path, int8_path)
+    onnx_fp32 = OnnxVitsModel(fp32_path, model.config)
+    onnx_int8 = OnnxVitsModel(int8_path, model.config)
+
+    results = {
+        "model": "tiny" if args.tiny else f"facebook/mms-tts-{args.lang}",
+        "parity": {
+            "onnx_fp32": check_parity(model, onnx_fp32, tokenizer, TEXTS),
+            "onnx_int8": check_parity(model, onnx_int8, tokenizer, TEXTS),
+        },
+        "rtf": {},
+    }
+    # What load_onnx_model decides with ONNX_QUANTIZE (its check uses other texts)
+    for parity in results["parity"].values():
+        parity["within_limit"] = parity_ok(parity)
+    results["parity_max_diff"] = settings.ONNX_PARITY_MAX_DIFF
+    for name, candidate in [("torch", model), ("onnx_fp32", onnx_fp32), ("onnx_int8", onnx_int8)]:
+        results["rtf"][name] = {
+            "single": real_time_factor(candidate, tokenizer, TEXTS[:1], runs=args.runs),
+            "batch": real_time_factor(candidate, tokenizer, TEXTS, runs=args.runs),
+        }
+    results["model_bytes"] = {"onnx_fp32": os.path.getsize(fp32_path), "onnx_int8": os.path.getsize(int8_path)}
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Real-time factor per input length bucket: eager torch (no_grad, unpadded)
+vs the compiled backend (inference_mode, inputs padded to the bucket,
+torch.compile'd graph) for one MMS model.
+
+Also reports the warm-up time per bucket (what the first request in each
+bucket would pay without warm-up on load) and the first call after it.
+Inputs for each bucket are sized between the previous boundary and the
+bucket, so the results show what padding costs and what compilation saves
+at each point when choosing TORCH_LENGTH_BUCKETS.
+
+    python -m benchmarks.bench_torch --lang eng
+    python -m benchmarks.bench_torch --tiny --buckets 32 64 128
+    python -m benchmarks.bench_torch --tiny --no-compile
+"""
+import argparse
+import json
+import random
+import time
+
+import torch
+from transformers import AutoTokenizer, VitsModel
+
+from src.core.torch_backend import OptimizedVitsModel
+
+WORDS = "the quick brown fox jumps over a lazy dog while we wait for your call to connect".split()
+
+
+def texts_for(tokenizer, low, high, count, rng):
+    """Texts whose token length falls in (low, high]."""
+    texts = []
+    while len(texts) < count:
+        words = []
+        text = ""
+        target = rng.randint(low + 1, high)
+        while len(tokenizer(text).input_ids) < target:
+            words.append(rng.choice(WORDS))
+            text = " ".join(words)
+        if len(tokenizer(text).input_ids) <= high:
+            texts.append(text)
+    return texts
+
+
+def rtf(model, tokenizer, texts, runs):
+    """Seconds of compute per second of audio (lower is better), best of `runs`."""
+    inputs = tokenizer(texts, return_tensors="pt", padding=True)
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        with torch.no_grad():
+            output = model(input_ids=inputs.input_ids, attention_mask=inputs.attention_mask)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    audio_seconds = float(output.sequence_lengths.sum()) / model.config.sampling_rate
+    return best / audio_seconds if audio_seconds else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lang", default="eng")
+    parser.add_argument("--tiny", action="store_true", help="Use a tiny random model (no download)")
+    parser.add_argument("--buckets", nargs="+", type=int, default=[64, 128, 256, 512])
+    parser.add_argument("--batch", type=int, default=1, help="Texts per forward pass")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--no-compile", action="store_true", help="Only inference_mode and bucket padding")
+    parser.add_argument("--threads", type=int, default=0, help="Intra-op threads (0 = torch default)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results JSON here as well as stdout")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    if args.tiny:
+        from benchmarks.tiny_model import load_tiny_model
+        model, tokenizer = load_tiny_model()
+    else:
+        model_id = f"facebook/mms-tts-{args.lang}"
+        tokenizer = AutoTokenizer.from_pretrained(model_id)
+        model = VitsModel.from_pretrained(model_id).eval()
+
+    buckets = sorted(args.buckets)
+    optimized = OptimizedVitsModel(model, tokenizer.pad_token_id, buckets=buckets, compile=not args.no_compile)
+    rng = random.Random(args.seed)
+    texts = {}
+    low = 0
+    for bucket in buckets:
+        texts[bucket] = texts_for(tokenizer, low, bucket, args.batch, rng)
+        low = bucket
+
+    # What a model load now pays up front; without it the first request per bucket did
+    warm_up_seconds = optimized.warm_up()
+    first_call_ms = {}
+    for bucket in buckets:
+        inputs = tokenizer(texts[bucket], return_tensors="pt", padding=True)
+        started = time.perf_counter()
+        optimized(input_ids=inputs.input_ids, attention_mask=inputs.attention_mask)
+        first_call_ms[str(bucket)] = (time.perf_counter() - started) * 1000
+
+    results = {
+        "model": "tiny" if args.tiny else f"facebook/mms-tts-{args.lang}",
+        "compile": not args.no_compile,
+        "batch": args.batch,
+        "threads": torch.get_num_threads(),
+        "interop_threads": torch.get_num_interop_threads(),
+        "warm_up_seconds": {str(bucket): s for bucket, s in warm_up_seconds.items()},
+        "first_call_after_warm_up_ms": first_call_ms,
+        "buckets": {},
+    }
+    for bucket in buckets:
+        eager = rtf(model, tokenizer, texts[bucket], args.runs)
+        padded = rtf(optimized, tokenizer, texts[bucket], args.runs)
+        results["buckets"][str(bucket)] = {
+            "tokens": [len(tokenizer(t).input_ids) for t in texts[bucket]],
+            "rtf_eager": eager,
+            "rtf_optimized": padded,
+            "speedup": eager / padded if padded else 0.0,
+        }
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,443 @@
+"""
+End-to-end and per-stage TTS benchmark.
+
+Runs offline by default: a tiny randomly-initialized VITS replaces the
+facebook/mms-tts-* checkpoints and the offline translation backend replaces
+Google. Results are written as JSON so runs can be compared across commits.
+
+    python -m benchmarks.run --concurrency 8 --requests 64 --output bench.json
+    python -m benchmarks.run --mix short:0.2,long:0.8 --languages english hindi
+    python -m benchmarks.run --real-models --skip-socket
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import time
+
+WORDS = (
+    "the quick brown fox jumps over a lazy dog while seven bright stars glow above "
+    "quiet rivers and distant mountains please hold the line your call is important "
+    "to us today we will learn about numbers letters and simple sentences"
+).split()
+
+# Words per text for each length class
+LENGTHS = {
+    "short": (3, 6),
+    "medium": (10, 20),
+    "long": (40, 80),
+}
+
+
+def parse_mix(mix: str):
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition(":")
+        if name not in LENGTHS:
+            raise ValueError(f"Unknown length class {name!r}, expected one of {sorted(LENGTHS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def make_texts(count: int, mix: dict, rng: random.Random):
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    texts = []
+    for i in range(count):
+        low, high = LENGTHS[rng.choices(names, weights)[0]]
+        words = [rng.choice(WORDS) for _ in range(rng.randint(low, high))]
+        # Sentence breaks every ~8 words so the chunker has something to split on;
+        # the index keeps every text unique so caches never hit
+        for j in range(7, len(words), 8):
+            words[j] += "."
+        texts.append(f"{' '.join(words)} {i}.")
+    return texts
+
+
+def summarize(samples):
+    """Latency summary in milliseconds."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000.0
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered) * 1000.0,
+        "p50": pct(0.50),
+        "p90": pct(0.90),
+        "p99": pct(0.99),
+        "max": ordered[-1] * 1000.0,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def bench_stages(texts, languages, rounds: int):
+    """Times each pipeline stage in isolation, directly against the engine."""
+    import torch
+    from src.core.audio import encode_wav
+    from src.core.config import LANG_MAP
+    from src.core.tts_engine import engine
+
+    stages = {"model_load": [], "normalize": [], "tokenize": [], "inference": [], "encode": []}
+    audio_seconds = 0.0
+    compute_seconds = 0.0
+    for lang in languages:
+        lang_code = LANG_MAP.get(lang, "eng")
+        start = time.perf_counter()
+        engine._load_model(lang_code)
+        stages["model_load"].append(time.perf_counter() - start)
+
+        with engine.load_lang(lang_code) as handle:
+            for _ in range(rounds):
+                for text in texts:
+                    t0 = time.perf_counter()
+                    prepared = engine.prepare_text(text, lang_code)
+                    t1 = time.perf_counter()
+                    inputs = handle.tokenizer(prepared, return_tensors="pt")
+                    t2 = time.perf_counter()
+                    with torch.no_grad():
+                        output = handle.model(input_ids=inputs.input_ids, attention_mask=inputs.attention_mask)
+                    t3 = time.perf_counter()
+                    waveform = output.waveform[0, :int(output.sequence_lengths[0])].cpu().numpy()
+                    sr = handle.model.config.sampling_rate
+                    encode_wav(waveform, sr)
+                    t4 = time.perf_counter()
+
+                    stages["normalize"].append(t1 - t0)
+                    stages["tokenize"].append(t2 - t1)
+                    stages["inference"].append(t3 - t2)
+                    stages["encode"].append(t4 - t3)
+                    audio_seconds += len(waveform) / sr
+                    compute_seconds += t4 - t0
+
+    result = {name: summarize(samples) for name, samples in stages.items()}
+    result["real_time_factor"] = compute_seconds / audio_seconds if audio_seconds else 0.0
+    return result
+
+
+async def start_server(port: int):
+    import uvicorn
+    from src.main import app
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.05)
+    return server, task
+
+
+async def bench_emit(url: str, payload_bytes: int, count: int):
+    """Times server-side socket emits of an audio_chunk-sized payload to one connected client."""
+    import socketio
+    from src.services.socket_service import socket_manager
+
+    sio = socket_manager.sio
+    connected = asyncio.get_running_loop().create_future()
+    received = asyncio.Queue()
+
+    @sio.on('connect', namespace='/bench')
+    async def on_bench_connect(sid, environ):
+        if not connected.done():
+            connected.set_result(sid)
+
+    client = socketio.AsyncClient()
+
+    @client.on('audio_chunk', namespace='/bench')
+    async def on_chunk(data):
+        received.put_nowait(time.perf_counter())
+
+    await client.connect(url, namespaces=['/bench'])
+    sid = await connected
+    payload = {'chunk_index': 0, 'audio': os.urandom(payload_bytes), 'text_chunk': 'benchmark'}
+
+    emit_times, delivery_times = [], []
+    for i in range(count):
+        start = time.perf_counter()
+        await sio.emit('audio_chunk', payload, to=sid, namespace='/bench')
+        emit_times.append(time.perf_counter() - start)
+        delivery_times.append(await received.get() - start)
+    await client.disconnect()
+    return {"payload_bytes": payload_bytes, "emit": summarize(emit_times), "delivered": summarize(delivery_times)}
+
+
+async def bench_rest(url: str, texts, languages, concurrency: int):
+    import httpx
+
+    latencies, failures = [], {}
+    audio_seconds = 0.0
+    queue = asyncio.Queue()
+    for i, text in enumerate(texts):
+        queue.put_nowait((text, languages[i % len(languages)]))
+
+    async def worker(client):
+        nonlocal audio_seconds
+        while not queue.empty():
+            text, lang = queue.get_nowait()
+            start = time.perf_counter()
+            response = await client.post(f"{url}/synthesize", json={"text": text, "language": lang})
+            elapsed = time.perf_counter() - start
+            if response.status_code != 200:
+                failures[response.status_code] = failures.get(response.status_code, 0) + 1
+                continue
+            latencies.append(elapsed)
+            # 44-byte header, 16-bit mono at the sample rate in the header
+            sr = int.from_bytes(response.content[24:28], "little")
+            audio_seconds += (len(response.content) - 44) / 2 / sr
+
+    async with httpx.AsyncClient(timeout=600) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*[worker(client) for _ in range(concurrency)])
+        wall = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "latency": summarize(latencies),
+        "failures": failures,
+        "throughput_rps": len(latencies) / wall if wall else 0.0,
+        "audio_seconds_per_second": audio_seconds / wall if wall else 0.0,
+        "wall_seconds": wall,
+    }
+
+
+async def bench_socket(url: str, texts, languages, concurrency: int, namespace: str = '/multilingual'):
+    import socketio
+
+    first_audio, complete, errors = [], [], []
+    queue = asyncio.Queue()
+    for i, text in enumerate(texts):
+        queue.put_nowait((text, languages[i % len(languages)]))
+
+    async def worker():
+        client = socketio.AsyncClient()
+        state = {}
+
+        @client.on('audio_chunk', namespace=namespace)
+        async def on_chunk(data):
+            if 'first' not in state:
+                state['first'] = time.perf_counter()
+
+        @client.on('stream_complete', namespace=namespace)
+        async def on_complete(data):
+            state['done'].set_result(time.perf_counter())
+
+        @client.on('error', namespace=namespace)
+        async def on_error(data):
+            errors.append(data)
+
+        @client.on('busy', namespace=namespace)
+        async def on_busy(data):
+            errors.append(data)
+            state['done'].set_result(None)
+
+        await client.connect(url, namespaces=[namespace])
+        while not queue.empty():
+            text, lang = queue.get_nowait()
+            state.clear()
+            state['done'] = asyncio.get_running_loop().create_future()
+            start = time.perf_counter()
+            await client.emit('synthesize', {'text': text, 'language': lang}, namespace=namespace)
+            finished = await state['done']
+            if finished is None:
+                continue
+            if 'first' in state:
+                first_audio.append(state['first'] - start)
+            complete.append(finished - start)
+        await client.disconnect()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    wall = time.perf_counter() - start
+
+    return {
+        "namespace": namespace,
+        "concurrency": concurrency,
+        "time_to_first_audio": summarize(first_audio),
+        "time_to_complete": summarize(complete),
+        "errors": len(errors),
+        "throughput_rps": len(complete) / wall if wall else 0.0,
+        "wall_seconds": wall,
+    }
+
+
+async def bench_incremental(url: str, texts, languages, concurrency: int, tokens_per_second: float,
+                            namespace: str = '/multilingual'):
+    """
+    Simulates an LLM upstream: each text is sent word by word as text_delta
+    events at tokens_per_second. Measures first delta -> first audio, next to
+    what waiting for the full text would cost (generation time + synthesize's
+    own time to first audio).
+    """
+    import socketio
+
+    first_audio, full_text_first_audio, errors = [], [], []
+    queue = asyncio.Queue()
+    for i, text in enumerate(texts):
+        queue.put_nowait((text, languages[i % len(languages)]))
+
+    async def worker():
+        client = socketio.AsyncClient()
+        state = {}
+
+        @client.on('audio_chunk', namespace=namespace)
+        async def on_chunk(data):
+            if 'first' not in state:
+                state['first'] = time.perf_counter()
+
+        @client.on('stream_complete', namespace=namespace)
+        async def on_complete(data):
+            state['done'].set_result(True)
+
+        @client.on('error', namespace=namespace)
+        async def on_error(data):
+            errors.append(data)
+
+        @client.on('busy', namespace=namespace)
+        async def on_busy(data):
+            errors.append(data)
+            state['done'].set_result(False)
+
+        async def run(event_sender):
+            state.clear()
+            state['done'] = asyncio.get_running_loop().create_future()
+            start = time.perf_counter()
+            await event_sender()
+            ok = await state['done']
+            return state['first'] - start if ok and 'first' in state else None
+
+        await client.connect(url, namespaces=[namespace])
+        while not queue.empty():
+            text, lang = queue.get_nowait()
+            words = [w + " " for w in text.split()]
+
+            async def send_deltas():
+                for i, word in enumerate(words):
+                    data = {'text': word, 'language': lang} if i == 0 else {'text': word}
+                    await client.emit('text_delta', data, namespace=namespace)
+                    await asyncio.sleep(1.0 / tokens_per_second)
+                await client.emit('text_end', {}, namespace=namespace)
+
+            async def send_full():
+                await client.emit('synthesize', {'text': text, 'language': lang}, namespace=namespace)
+
+            incremental = await run(send_deltas)
+            full = await run(send_full)
+            if incremental is not None and full is not None:
+                first_audio.append(incremental)
+                full_text_first_audio.append(len(words) / tokens_per_second + full)
+        await client.disconnect()
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return {
+        "namespace": namespace,
+        "tokens_per_second": tokens_per_second,
+        "time_to_first_audio": summarize(first_audio),
+        "full_text_time_to_first_audio": summarize(full_text_first_audio),
+        "errors": len(errors),
+    }
+
+
+async def bench_end_to_end(args, texts, languages):
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    server, task = await start_server(port)
+    try:
+        results = {}
+        if not args.skip_rest:
+            results["rest"] = await bench_rest(url, texts, languages, args.concurrency)
+        if not args.skip_socket:
+            results["socket"] = await bench_socket(url, texts, languages, args.concurrency)
+            results["socket_emit"] = await bench_emit(url, args.emit_payload_bytes, args.emit_count)
+            results["socket_incremental"] = await bench_incremental(
+                url, texts, languages, args.concurrency, args.llm_tokens_per_second)
+        return results
+    finally:
+        server.should_exit = True
+        await task
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=32, help="Texts per end-to-end benchmark")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--mix", default="short:0.5,medium:0.3,long:0.2", help="Text length distribution")
+    parser.add_argument("--languages", nargs="+", default=["english"])
+    parser.add_argument("--stage-texts", type=int, default=8, help="Texts per language for per-stage timing")
+    parser.add_argument("--stage-rounds", type=int, default=2)
+    parser.add_argument("--emit-payload-bytes", type=int, default=64 * 1024)
+    parser.add_argument("--emit-count", type=int, default=50)
+    parser.add_argument("--llm-tokens-per-second", type=float, default=30.0, help="Simulated upstream rate for text_delta")
+    parser.add_argument("--real-models", action="store_true", help="Use facebook/mms-tts-* instead of the tiny model")
+    parser.add_argument("--real-translation", action="store_true", help="Use the configured translation backend")
+    parser.add_argument("--keep-cache", action="store_true", help="Leave the audio cache enabled")
+    parser.add_argument("--skip-stages", action="store_true")
+    parser.add_argument("--skip-rest", action="store_true")
+    parser.add_argument("--skip-socket", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results JSON here as well as stdout")
+    args = parser.parse_args()
+
+    # Settings are read when src.core.config is first imported, so configure the environment first
+    if not args.real_translation:
+        os.environ["TRANSLATION_BACKEND"] = "offline"
+    if not args.keep_cache:
+        os.environ["AUDIO_CACHE_MAX_BYTES"] = "0"
+        os.environ["AUDIO_CACHE_DIR"] = ""
+    # The benchmark is one client IP; don't let per-client fairness throttle it
+    os.environ.setdefault("INFERENCE_MAX_PER_CLIENT", str(max(args.concurrency, 4)))
+    os.environ.setdefault("INFERENCE_QUEUE_LIMIT", str(max(args.concurrency * 2, 64)))
+
+    import torch
+    from src.core.config import settings
+    from src.core.tts_engine import engine
+    if not args.real_models:
+        from benchmarks.tiny_model import load_tiny_model
+        engine._load_model = load_tiny_model
+
+    rng = random.Random(args.seed)
+    languages = [lang.lower() for lang in args.languages]
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+            "cpu_count": os.cpu_count(),
+            "model": "facebook/mms-tts-*" if args.real_models else "tiny",
+            "args": vars(args),
+            "settings": settings.model_dump() if hasattr(settings, "model_dump") else settings.dict(),
+        }
+    }
+
+    if not args.skip_stages:
+        results["stages"] = bench_stages(make_texts(args.stage_texts, parse_mix(args.mix), rng), languages, args.stage_rounds)
+    if not (args.skip_rest and args.skip_socket):
+        texts = make_texts(args.requests, parse_mix(args.mix), rng)
+        results.update(asyncio.run(bench_end_to_end(args, texts, languages)))
+
+    output = json.dumps(results, indent=2, default=str)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
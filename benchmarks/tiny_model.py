@@ -0,0 +1,53 @@
+"""
+Tiny randomly-initialized VITS model and character tokenizer, so benchmarks
+can run offline without downloading facebook/mms-tts-* checkpoints.
+Audio is noise, but the compute graph is the same as the real models.
+"""
+import json
+import os
+import tempfile
+
+from transformers import VitsConfig, VitsModel, VitsTokenizer
+
+VOCAB = list(" abcdefghijklmnopqrstuvwxyz'.,!?-0123456789")
+
+
+def tiny_config(sampling_rate: int = 16000) -> VitsConfig:
+    return VitsConfig(
+        vocab_size=len(VOCAB),
+        hidden_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        ffn_dim=128,
+        flow_size=64,
+        spectrogram_bins=65,
+        upsample_initial_channel=64,
+        upsample_rates=[8, 8, 2, 2],
+        upsample_kernel_sizes=[16, 16, 4, 4],
+        resblock_kernel_sizes=[3, 7],
+        resblock_dilation_sizes=[[1, 3], [1, 3]],
+        prior_encoder_num_flows=2,
+        prior_encoder_num_wavenet_layers=2,
+        duration_predictor_num_flows=2,
+        duration_predictor_filter_channels=64,
+        posterior_encoder_num_wavenet_layers=2,
+        sampling_rate=sampling_rate,
+    )
+
+
+def tiny_tokenizer(chars: str = "") -> VitsTokenizer:
+    """Character tokenizer over VOCAB, plus chars (e.g. another script's letters)."""
+    vocab = VOCAB + sorted(set(chars) - set(VOCAB))
+    vocab_path = os.path.join(tempfile.mkdtemp(prefix="tiny-vits-"), "vocab.json")
+    with open(vocab_path, "w") as f:
+        json.dump({c: i for i, c in enumerate(vocab)}, f)
+    return VitsTokenizer(vocab_path, pad_token=" ", unk_token="'", add_blank=True, normalize=True, phonemize=False)
+
+
+def load_tiny_model(lang_code: str = "eng", deterministic: bool = False):
+    """Drop-in replacement for MMSEngine._load_model returning (model, tokenizer)."""
+    model = VitsModel(tiny_config()).eval()
+    if deterministic:
+        model.noise_scale = 0.0
+        model.noise_scale_duration = 0.0
+    return model, tiny_tokenizer()
@@ -1,15 +1,26 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from fastapi.responses import Response
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
-import numpy as np
-import io
-import scipy.io.wavfile as wav
 import asyncio
+import json
+import logging
+from typing import Optional
 from concurrent.futures import ThreadPoolExecutor
 
 from src.core.tts_engine import engine
-from src.core.config import LANG_MAP
+from src.core.batcher import scheduler
+from src.core.audio_cache import AudioCache, audio_cache
+from src.core.audio import FORMATS, OggOpusStream, check_format, encode_audio, format_key, negotiate_format, resample, to_pcm16, wav_header
+from src.core.chunker import prepare_chunks
+from src.core.config import settings, LANG_MAP
+from src.core.workers import QueueFullError, inference_pool, io_executor
+from src.core.metrics import REQUESTS, registry
+from src.core.tracing import new_request_id, request_id_var, span
+from src.core.traffic import prefetcher, traffic_stats
 from src.services.socket_service import socket_manager
+from src.services.batch_service import ArchiveWriter, BatchRunner, parse_items, parse_jsonl
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -17,6 +28,17 @@ class TTSRequest(BaseModel):
     text: str
     language: str
 
+def client_id(request: Request) -> str:
+    """Admission/fairness key for REST callers."""
+    host = request.client.host if request.client else "unknown"
+    return f"rest:{host}"
+
+def bind_request_id(request: Request) -> str:
+    """Adopts the caller's X-Request-ID (or generates one) for logs and trace spans."""
+    request_id = new_request_id(request.headers.get("x-request-id"))
+    request_id_var.set(request_id)
+    return request_id
+
 @router.get("/health")
 def health_check():
     return {"status": "ok"}
@@ -29,53 +51,294 @@ def get_languages():
     languages = [l.capitalize() for l in languages]
     return {"languages": languages}
 
+@router.get("/stats/batching")
+def batching_stats():
+    return scheduler.stats()
+
+@router.get("/stats/cache")
+def cache_stats():
+    return audio_cache.stats()
+
+@router.get("/metrics")
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@router.get("/stats/models")
+def model_stats():
+    return engine.stats()
+
+@router.get("/stats/queue")
+def queue_stats():
+    return inference_pool.stats()
+
+@router.get("/stats/nodes")
+async def node_stats():
+    """Nodes sharing the broker, as of their last heartbeat."""
+    if not settings.BROKER_URL:
+        return {"role": settings.NODE_ROLE, "nodes": {}}
+    from src.core.broker import get_broker
+    return {"role": settings.NODE_ROLE, "nodes": await get_broker(settings.BROKER_URL).nodes()}
+
+@router.get("/admin/models")
+def admin_models():
+    """Traffic statistics behind eviction and prefetch, with recent prefetch decisions."""
+    return {
+        "models": engine.stats(),
+        "traffic": traffic_stats.snapshot(),
+        "ranking": traffic_stats.ranked(),
+        "prefetch": {
+            "enabled": settings.PREFETCH_ENABLED and settings.SERVING_MODE == "thread",
+            "decisions": list(prefetcher.decisions),
+        },
+    }
+
 @router.post("/synthesize")
-async def synthesize(req: TTSRequest):
+async def synthesize(req: TTSRequest, request: Request, format: Optional[str] = None, sample_rate: Optional[int] = None):
+    """
+    Synthesizes the whole text into one file. The format comes from the format
+    parameter (wav, opus, mp3, flac) or else the Accept header, defaulting to WAV;
+    sample_rate resamples the output.
+    """
+    request_id = bind_request_id(request)
+    headers = {"X-Request-ID": request_id}
+    format = (format or negotiate_format(request.headers.get("accept"))).lower()
+    try:
+        check_format(format, sample_rate)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e), headers=headers)
+    media_type = FORMATS[format][2]
+    # Progress goes only to sockets subscribed to this request id: translation, inference, encode
+    progress = socket_manager.progress(request_id, steps=3)
     try:
         lang_name = req.language.lower()
-        print(f"Received request: {req.text} in {lang_name}")
+        logger.info("Received request: %d chars in %s", len(req.text), lang_name)
         
         # Notify clients via socket
-        await socket_manager.emit_status("processing_started", {"text": req.text[:20] + "...", "lang": lang_name})
+        await progress.status("processing_started", {"text": req.text[:20] + "...", "lang": lang_name})
         
         # Resolve code
         lang_code = LANG_MAP.get(lang_name, 'eng')
-        
-        # Translation Step (Run in executor to avoid blocking if heavy, though it's network bound usually)
-        # But MMSEngine.translate_if_needed uses GoogleTranslator which is blocking or uses requests.
-        loop = asyncio.get_event_loop()
-        
-        # We'll run the whole synthesis pipeline in executor to be safe and keep event loop free
-        def run_synthesis_task():
-            # 1. Translate
-            text_to_process = engine.translate_if_needed(req.text, lang_code)
-            
-            # 2. Synthesize
-            # Check if we should emit an update? We can't easily validly from thread to async socket without loop ref.
-            # We'll just return the result.
-            return engine.synthesize(text_to_process, lang=lang_name)
 
-        # Emit "synthesizing" state
-        await socket_manager.emit_progress("Synthesizing audio...", 50)
-        
-        # Run blocking task
-        waveform, sr = await loop.run_in_executor(None, run_synthesis_task)
-        
-        await socket_manager.emit_progress("Conversion complete", 90)
+        # Serve repeated requests straight from the audio cache (skips translation and inference)
+        cache_key = AudioCache.make_key(req.text, lang_code, 1.0, format_key(format, sample_rate))
+        cached = await audio_cache.get_async(cache_key, io_executor)
+        if cached is not None:
+            await progress.finish("completed", {"size": len(cached[0]), "cached": True})
+            REQUESTS.inc(entrypoint="rest", outcome="cached")
+            return Response(content=memoryview(cached[0]), media_type=media_type, headers=headers)
         
-        # Normalize and convert to 16-bit PCM
-        waveform = waveform / np.max(np.abs(waveform)) * 32767
-        waveform = waveform.astype(np.int16)
+        with inference_pool.admit(client_id(request)):
+            loop = asyncio.get_event_loop()
+
+            # 1. Translate (blocking network call, runs on the I/O pool)
+            with span("translation", lang=lang_code):
+                text_to_process = await loop.run_in_executor(io_executor, engine.translate_if_needed, req.text, lang_code)
+            progress.advance("Translation complete")
+
+            # 2. Normalize numbers, dates, money, units and math, per language for code-mixed text,
+            # into budget-sized chunks (no first-chunk latency to favour here)
+            with span("normalize", lang=lang_code):
+                chunks = prepare_chunks(text_to_process, lang_code, first_budget=settings.CHUNK_TOKEN_BUDGET)
+            
+            # 3. Synthesize, micro-batched together and with other concurrent requests per language
+            waveform, sr = await scheduler.submit_chunks(chunks or [text_to_process], lang_name)
+            progress.advance("Synthesis complete")
         
-        # Write to in-memory bytes
-        byte_io = io.BytesIO()
-        wav.write(byte_io, sr, waveform)
-        byte_io.seek(0)
+        # 4. Encode (compressed formats are CPU-heavy, so always off the event loop)
+        with span("encode", format=format):
+            audio_bytes, out_rate = await loop.run_in_executor(
+                io_executor, encode_audio, waveform, sr, format, sample_rate)
+        audio_cache.put(cache_key, audio_bytes, out_rate, io_executor)
+        progress.advance("Encoding complete")
         
-        await socket_manager.emit_status("completed", {"size": len(waveform)})
+        await progress.finish("completed", {"size": len(waveform)})
         
-        return Response(content=byte_io.read(), media_type="audio/wav")
+        REQUESTS.inc(entrypoint="rest", outcome="ok")
+        return Response(content=memoryview(audio_bytes), media_type=media_type, headers=headers)
+    except QueueFullError as e:
+        REQUESTS.inc(entrypoint="rest", outcome="busy")
+        raise HTTPException(status_code=429, detail=str(e), headers=headers)
     except Exception as e:
-        print(f"Error: {e}")
-        await socket_manager.emit_status("error", {"error": str(e)})
-        raise HTTPException(status_code=500, detail=str(e))
+        REQUESTS.inc(entrypoint="rest", outcome="error")
+        logger.exception("Error: %s", e)
+        await progress.finish("error", {"error": str(e)})
+        raise HTTPException(status_code=500, detail=str(e), headers=headers)
+
+@router.post("/synthesize/stream")
+async def synthesize_stream(req: TTSRequest, request: Request, format: str = "wav", sample_rate: Optional[int] = None):
+    """
+    Progressive synthesis: the text is chunked into sentences and each chunk
+    is sent as soon as it is synthesized, so playback can start after the first one.
+    format=wav sends a streaming WAV header followed by 16-bit PCM,
+    format=pcm sends raw 16-bit little-endian mono PCM,
+    format=opus sends an Ogg Opus stream page by page.
+    """
+    request_id = bind_request_id(request)
+    headers = {"X-Request-ID": request_id}
+    if format not in ("wav", "pcm", "opus"):
+        raise HTTPException(status_code=400, detail=f"Unsupported stream format: {format}", headers=headers)
+    try:
+        check_format(format if format == "opus" else "wav", sample_rate)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e), headers=headers)
+    lang_name = req.language.lower()
+    lang_code = LANG_MAP.get(lang_name, 'eng')
+    logger.info("Received stream request: %d chars in %s", len(req.text), lang_name)
+
+    try:
+        admission = inference_pool.admit(client_id(request))
+    except QueueFullError as e:
+        REQUESTS.inc(entrypoint="rest_stream", outcome="busy")
+        raise HTTPException(status_code=429, detail=str(e), headers=headers)
+
+    # Translation, then one step per chunk sent
+    progress = socket_manager.progress(request_id, steps=1)
+    try:
+        loop = asyncio.get_event_loop()
+        with span("translation", lang=lang_code):
+            text_to_process = await loop.run_in_executor(io_executor, engine.translate_if_needed, req.text, lang_code)
+        with span("normalize", lang=lang_code):
+            chunks = prepare_chunks(text_to_process, lang_code)
+        if not chunks:
+            await progress.finish("error", {"error": "No text provided"})
+            raise HTTPException(status_code=400, detail="No text provided", headers=headers)
+        progress.expect(len(chunks))
+        progress.advance("Translation complete")
+
+        # Pipelined: upcoming chunks are synthesized while earlier ones are sent
+        results = scheduler.stream(chunks, lang_name, lookahead=settings.STREAM_LOOKAHEAD)
+
+        # Wait for the first chunk before responding so the sample rate is known
+        # for the headers and early failures still surface as a proper error status
+        _, first, error = await results.__anext__()
+        if error is not None:
+            await results.aclose()
+            REQUESTS.inc(entrypoint="rest_stream", outcome="error")
+            logger.error("Error: %s", error)
+            await progress.finish("error", {"error": str(error)})
+            raise HTTPException(status_code=500, detail=str(error), headers=headers)
+        first_waveform, sr = first
+    except BaseException:
+        admission.release()
+        raise
+
+    out_rate = sample_rate or sr
+    opus = OggOpusStream(sr, out_rate) if format == "opus" else None
+
+    def encode(waveform):
+        if opus is not None:
+            return opus.write(waveform)
+        return memoryview(to_pcm16(resample(waveform, sr, out_rate)))
+
+    async def generate():
+        try:
+            if format == "wav":
+                yield wav_header(out_rate)
+            yield await loop.run_in_executor(io_executor, encode, first_waveform)
+            progress.advance(f"Chunk 1/{len(chunks)} sent")
+            async for index, result, error in results:
+                if error is not None:
+                    # Headers are already sent, all we can do is end the stream early
+                    REQUESTS.inc(entrypoint="rest_stream", outcome="error")
+                    logger.error("Error stream chunk %d: %s", index, error)
+                    await progress.finish("error", {"error": str(error)})
+                    return
+                yield await loop.run_in_executor(io_executor, encode, result[0])
+                progress.advance(f"Chunk {index + 1}/{len(chunks)} sent")
+            if opus is not None:
+                yield opus.close()
+            await progress.finish("completed", {"chunks": len(chunks)})
+            REQUESTS.inc(entrypoint="rest_stream", outcome="ok")
+        finally:
+            # Cancels chunks still in flight if the client went away
+            await results.aclose()
+            if opus is not None:
+                opus.close()
+            admission.release()
+
+    media_type = FORMATS[format][2] if format != "pcm" else f"audio/L16;rate={out_rate};channels=1"
+    return StreamingResponse(generate(), media_type=media_type, headers=headers)
+
+@router.post("/synthesize/batch")
+async def synthesize_batch(request: Request, format: str = "wav", archive: str = "zip",
+                           sample_rate: Optional[int] = None, translate: bool = True):
+    """
+    Bulk synthesis of many (text, language) items into one zip or tar stream.
+
+    Body: JSON {"items": [{"id", "text", "language"}, ...], "completed": [ids]}
+    or JSONL with one item per line. Each item becomes <id>.<ext> in the
+    archive as soon as it's rendered; manifest.jsonl comes last. To resume
+    an interrupted download, send the same items with the ids already
+    received in "completed". Progress goes to the request's room.
+    """
+    request_id = bind_request_id(request)
+    headers = {"X-Request-ID": request_id}
+    try:
+        check_format(format, sample_rate)
+        body = await request.body()
+        if request.headers.get("content-type", "").startswith("application/json"):
+            data = json.loads(body)
+            if not isinstance(data, dict):
+                raise ValueError("Body must be a JSON object")
+            items, completed = data.get("items") or [], data.get("completed") or []
+            if not isinstance(items, list) or not isinstance(completed, list):
+                raise ValueError("items and completed must be lists")
+            if not all(isinstance(item_id, str) for item_id in completed):
+                raise ValueError("completed must list item ids")
+            items = parse_items(items)
+        else:
+            items = parse_jsonl(body.decode("utf-8").splitlines())
+            completed = []
+        writer = ArchiveWriter(archive)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e), headers=headers)
+    if not items:
+        raise HTTPException(status_code=400, detail="No items provided", headers=headers)
+
+    try:
+        admission = inference_pool.admit(client_id(request))
+    except QueueFullError as e:
+        REQUESTS.inc(entrypoint="rest_batch", outcome="busy")
+        raise HTTPException(status_code=429, detail=str(e), headers=headers)
+
+    runner = BatchRunner(items, writer, fmt=format, sample_rate=sample_rate, translate=translate, skip=completed)
+    progress = socket_manager.progress(request_id, steps=max(1, runner.total - runner.skipped))
+    logger.info("Batch request: %d items (%d already completed)", runner.total, runner.skipped)
+    chunks = asyncio.Queue()
+
+    async def on_item(runner, result):
+        progress.advance(f"{runner.done + len(runner.failed)}/{runner.total - runner.skipped} items")
+        chunks.put_nowait(writer.drain())
+
+    async def render():
+        try:
+            await runner.run(on_item)
+            writer.close()
+            chunks.put_nowait(writer.drain())
+            await progress.finish("completed", runner.summary())
+        finally:
+            chunks.put_nowait(None)
+
+    async def generate():
+        task = asyncio.ensure_future(render())
+        try:
+            while True:
+                data = await chunks.get()
+                if data is None:
+                    break
+                if data:
+                    yield data
+            # Surfaces a failure of the run itself (items failing individually are in the manifest summary)
+            await task
+            REQUESTS.inc(entrypoint="rest_batch", outcome="ok")
+        except Exception as e:
+            REQUESTS.inc(entrypoint="rest_batch", outcome="error")
+            logger.error("Batch failed: %s", e)
+        finally:
+            # Stops rendering if the client went away
+            task.cancel()
+            admission.release()
+
+    media_type = "application/zip" if archive == "zip" else "application/x-tar"
+    headers["Content-Disposition"] = f'attachment; filename="batch-{request_id}.{archive}"'
+    return StreamingResponse(generate(), media_type=media_type, headers=headers)
@@ -1,149 +1,425 @@
 
-from src.services.socket_service import socket_manager
+from src.services.socket_service import TextFeed, socket_manager
 from src.core.tts_engine import engine
-from src.core.config import LANG_MAP
+from src.core.batcher import scheduler
+from src.core.config import settings, LANG_MAP
+from src.core.chunker import prepare_chunks
+from src.core.workers import QueueFullError, inference_pool, io_executor
+from src.core.metrics import ACTIVE_SOCKET_SESSIONS, FIRST_AUDIO_SECONDS, REQUESTS
+from src.core.tracing import new_request_id, request_id_var, span
+from src.core.audio import OggOpusStream, check_format, encode_audio, format_key, resample, to_pcm16
+from src.core.audio_cache import AudioCache, audio_cache
 import asyncio
-import io
-import scipy.io.wavfile as wav
-import numpy as np
-import re
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# speaking_rate of every socket stream (higher = faster, 0.9 = slower). 1.0 keeps the
+# audio sockets have always produced, as the rate used to never reach the model
+SOCKET_SPEED = 1.0
 
 def setup_socket_handlers():
     sio = socket_manager.sio
 
+    async def admit(sid, namespace):
+        """Reserve an inference slot for this session, or tell the client we're busy."""
+        try:
+            return inference_pool.admit(f"socket:{sid}")
+        except QueueFullError as e:
+            REQUESTS.inc(entrypoint="socket", outcome="busy")
+            await sio.emit('busy', {'msg': str(e)}, to=sid, namespace=namespace)
+            return None
+
+    def output_format(data):
+        """Requested protocol, chunk format and sample rate; raises ValueError if unsupported."""
+        protocol = int(data.get('protocol') or 1)
+        if protocol not in (1, 2):
+            raise ValueError(f"Unsupported protocol: {protocol}")
+        fmt = str(data.get('format') or ('wav' if protocol == 1 else 'pcm')).lower()
+        sample_rate = data.get('sample_rate')
+        sample_rate = int(sample_rate) if sample_rate else None
+        if protocol == 2:
+            # v2 frames are raw audio of one continuous stream
+            if fmt not in ('pcm', 'opus'):
+                raise ValueError(f"Protocol 2 streams pcm or opus frames, not {fmt}")
+            check_format('wav' if fmt == 'pcm' else fmt, sample_rate)
+        else:
+            check_format(fmt, sample_rate)
+        return protocol, fmt, sample_rate
+
+    async def cancel_stream(sid, data, namespace):
+        """Client asked to stop a stream (or all of its streams); outstanding inference is dropped."""
+        stream_id = (data or {}).get('stream_id')
+        cancelled = socket_manager.streams.cancel(sid, stream_id)
+        await sio.emit('stream_cancelled', {'stream_id': stream_id, 'cancelled': cancelled}, to=sid, namespace=namespace)
+
     # --- 1. FULL SENTIMENT/TRANSLATION SOCKET (/sentiment) ---
     @sio.on('connect', namespace='/sentiment')
     async def connect_sentiment(sid, environ):
-        print(f"Client connected to /sentiment: {sid}")
+        logger.info("Client connected to /sentiment: %s", sid)
+        ACTIVE_SOCKET_SESSIONS.inc(namespace='/sentiment')
         await sio.emit('status', {'msg': 'Connected to Sentiment TTS'}, to=sid, namespace='/sentiment')
 
+    @sio.on('disconnect', namespace='/sentiment')
+    async def disconnect_sentiment(sid, *args):
+        ACTIVE_SOCKET_SESSIONS.dec(namespace='/sentiment')
+        # Nobody will receive the audio, so stop synthesizing it
+        socket_manager.streams.cancel(sid)
+
+    @sio.on('cancel', namespace='/sentiment')
+    async def cancel_sentiment(sid, data=None):
+        await cancel_stream(sid, data, '/sentiment')
+
     @sio.on('synthesize', namespace='/sentiment')
     async def handle_sentiment_synthesize(sid, data):
         """
         Full Pipeline: Translate -> Synthesize (Streaming)
         """
+        received = time.perf_counter()
         text = data.get('text', '')
         lang_name = data.get('language', 'english')
+        request_id_var.set(new_request_id(data.get('request_id')))
         
-        print(f"[Sentiment] Request: {text[:20]}... ({lang_name})")
+        logger.info("[Sentiment] Request: %d chars (%s)", len(text), lang_name)
         
         if not text:
             await sio.emit('error', {'msg': 'No text provided'}, to=sid, namespace='/sentiment')
             return
+        try:
+            protocol, fmt, sample_rate = output_format(data)
+        except ValueError as e:
+            await sio.emit('error', {'msg': str(e)}, to=sid, namespace='/sentiment')
+            return
 
         lang_code = LANG_MAP.get(lang_name.lower(), 'eng')
         
+        admission = await admit(sid, '/sentiment')
+        if admission is None:
+            return
+
         loop = asyncio.get_event_loop()
 
-        try:
-            # Step 1: Translate (Blocking/Sync)
-            # Run in executor
-            translated_text = await loop.run_in_executor(None, engine.translate_if_needed, text, lang_code)
-            
-            if translated_text != text:
-                print(f"[Sentiment] Translated to: {translated_text[:20]}...")
-                # Notify client of translation
-                await sio.emit('translation', {'original': text, 'translated': translated_text}, to=sid, namespace='/sentiment')
-            
-            # Step 2: Synthesize (Streaming similar to Multilingual but on translated text)
-            # We reuse the chunking logic for better UX
-            await stream_synthesis(sid, translated_text, lang_name, namespace='/sentiment')
-            
-        except Exception as e:
-            print(f"[Sentiment] Error: {e}")
-            await sio.emit('error', {'msg': str(e)}, to=sid, namespace='/sentiment')
+        with admission, socket_manager.streams.track(sid, request_id_var.get()):
+            try:
+                # Step 1: Translate (Blocking/Sync)
+                # Run on the I/O pool so it never competes with inference workers
+                with span("translation", lang=lang_code):
+                    translated_text = await loop.run_in_executor(io_executor, engine.translate_if_needed, text, lang_code)
+                
+                if translated_text != text:
+                    logger.debug("[Sentiment] Translated to: %s...", translated_text[:20])
+                    # Notify client of translation
+                    await sio.emit('translation', {'original': text, 'translated': translated_text}, to=sid, namespace='/sentiment')
+                
+                # Step 2: Synthesize (Streaming similar to Multilingual but on translated text)
+                # We reuse the chunking logic for better UX
+                await stream_synthesis(sid, translated_text, lang_name, '/sentiment', fmt, sample_rate, protocol, received)
+                
+            except Exception as e:
+                logger.exception("[Sentiment] Error: %s", e)
+                await sio.emit('error', {'msg': str(e)}, to=sid, namespace='/sentiment')
 
 
     # --- 2. SIMPLE MULTILINGUAL SOCKET (/multilingual) ---
     @sio.on('connect', namespace='/multilingual')
     async def connect_multilingual(sid, environ):
-        print(f"Client connected to /multilingual: {sid}")
+        logger.info("Client connected to /multilingual: %s", sid)
+        ACTIVE_SOCKET_SESSIONS.inc(namespace='/multilingual')
         await sio.emit('status', {'msg': 'Connected to Multilingual TTS'}, to=sid, namespace='/multilingual')
 
+    @sio.on('disconnect', namespace='/multilingual')
+    async def disconnect_multilingual(sid, *args):
+        ACTIVE_SOCKET_SESSIONS.dec(namespace='/multilingual')
+        # Nobody will receive the audio, so stop synthesizing it
+        socket_manager.streams.cancel(sid)
+
+    @sio.on('cancel', namespace='/multilingual')
+    async def cancel_multilingual(sid, data=None):
+        await cancel_stream(sid, data, '/multilingual')
+
     @sio.on('synthesize', namespace='/multilingual')
     async def handle_multilingual_synthesize(sid, data):
         """
         Simple Pipeline: No Translate -> Smart Chunking -> Streaming
         """
+        received = time.perf_counter()
         text = data.get('text', '')
         lang_name = data.get('language', 'english')
+        request_id_var.set(new_request_id(data.get('request_id')))
         
-        print(f"[Multilingual] Request: {text[:20]}... ({lang_name})")
+        logger.info("[Multilingual] Request: %d chars (%s)", len(text), lang_name)
         
         if not text:
             await sio.emit('error', {'msg': 'No text provided'}, to=sid, namespace='/multilingual')
             return
+        try:
+            protocol, fmt, sample_rate = output_format(data)
+        except ValueError as e:
+            await sio.emit('error', {'msg': str(e)}, to=sid, namespace='/multilingual')
+            return
+
+        admission = await admit(sid, '/multilingual')
+        if admission is None:
+            return
 
         # Direct streaming
-        await stream_synthesis(sid, text, lang_name, namespace='/multilingual')
+        with admission, socket_manager.streams.track(sid, request_id_var.get()):
+            await stream_synthesis(sid, text, lang_name, '/multilingual', fmt, sample_rate, protocol, received)
+
+
+    # --- 3. INCREMENTAL TEXT (both namespaces) ---
+    # For upstreams that generate text token by token (LLMs): the client sends
+    # text_delta events as text arrives and text_end when it is done. Each clause
+    # or sentence is synthesized as soon as it completes, so speech starts about
+    # one clause after the first token instead of after the whole response.
+    async def text_delta(sid, data, namespace):
+        """
+        The first delta opens the session and carries its options (language,
+        protocol, format, sample_rate, request_id, as for synthesize); the
+        session then runs in this handler until text_end.
+        """
+        data = data or {}
+        feed = socket_manager.text_feeds.get(sid)
+        if feed is not None:
+            feed.push(data.get('text', ''))
+            return
+
+        lang_name = data.get('language', 'english')
+        lang_code = LANG_MAP.get(lang_name.lower(), 'eng')
+        request_id_var.set(new_request_id(data.get('request_id')))
+        try:
+            protocol, fmt, sample_rate = output_format(data)
+        except ValueError as e:
+            await sio.emit('error', {'msg': str(e)}, to=sid, namespace=namespace)
+            return
+        # Registered before anything awaits, so the next delta joins this session
+        feed = socket_manager.text_feeds[sid] = TextFeed(lang_code, settings.TEXT_SESSION_IDLE_TIMEOUT)
+        feed.push(data.get('text', ''))
+        logger.info("[Incremental] Session opened on %s (%s)", namespace, lang_name)
+
+        try:
+            admission = await admit(sid, namespace)
+            if admission is None:
+                return
+            with admission, socket_manager.streams.track(sid, request_id_var.get()):
+                chunks = feed_chunks(sid, feed, lang_code, namespace, translate=namespace == '/sentiment')
+                await stream_audio(sid, chunks, lang_name, namespace, fmt, sample_rate, protocol,
+                                   feed.received, entrypoint="socket_incremental")
+        except Exception as e:
+            logger.exception("[Incremental] Error: %s", e)
+            await sio.emit('error', {'msg': str(e)}, to=sid, namespace=namespace)
+        finally:
+            if socket_manager.text_feeds.get(sid) is feed:
+                del socket_manager.text_feeds[sid]
+
+    async def text_end(sid, data, namespace):
+        """Flushes the rest of the session's text; a later text_delta opens a new session."""
+        feed = socket_manager.text_feeds.pop(sid, None)
+        if feed is None:
+            return
+        feed.push((data or {}).get('text', ''))
+        feed.end()
+
+    async def feed_chunks(sid, feed, lang_code, namespace, translate):
+        """Chunks of an incremental session's segments, translated (/sentiment) and normalized."""
+        loop = asyncio.get_event_loop()
+        async for segment in feed:
+            text = segment
+            if translate:
+                with span("translation", lang=lang_code):
+                    text = await loop.run_in_executor(io_executor, engine.translate_if_needed, segment, lang_code)
+                if text != segment:
+                    await sio.emit('translation', {'original': segment, 'translated': text}, to=sid, namespace=namespace)
+            # Segments are already clause sized; this only splits ones normalization made too long
+            # (and code-mixed ones per language)
+            with span("normalize", lang=lang_code):
+                chunks = prepare_chunks(text, lang_code, first_budget=settings.CHUNK_TOKEN_BUDGET)
+            for chunk in chunks:
+                yield chunk
+
+    @sio.on('text_delta', namespace='/sentiment')
+    async def text_delta_sentiment(sid, data):
+        await text_delta(sid, data, '/sentiment')
+
+    @sio.on('text_end', namespace='/sentiment')
+    async def text_end_sentiment(sid, data=None):
+        await text_end(sid, data, '/sentiment')
+
+    @sio.on('text_delta', namespace='/multilingual')
+    async def text_delta_multilingual(sid, data):
+        await text_delta(sid, data, '/multilingual')
+
+    @sio.on('text_end', namespace='/multilingual')
+    async def text_end_multilingual(sid, data=None):
+        await text_end(sid, data, '/multilingual')
 
 
     # --- SHARED STREAMING LOGIC ---
-    async def stream_synthesis(sid, text, lang_name, namespace):
-        # Smart Chunking
-        tokens = re.split(r'([.,!?;]+)', text)
-        chunks = []
-        current_chunk = ""
-        word_count = 0
-        SOFT_LIMIT = 5
-        HARD_LIMIT = 10
-        
-        for token in tokens:
-            if not token.strip():
-                continue
-            current_chunk += token
-            word_count += len(token.split())
-            
-            is_end_sentence = any(p in token for p in ".!?")
-            is_comma = "," in token
-            
-            should_send = False
-            if is_end_sentence: should_send = True
-            elif word_count >= SOFT_LIMIT and is_comma: should_send = True
-            elif word_count >= HARD_LIMIT: should_send = True
-                
-            if should_send:
-                final_chunk = current_chunk.strip()
-                # Fix: If chunk is just punctuation, append to previous if possible
-                if final_chunk and not any(c.isalnum() for c in final_chunk) and chunks:
-                    chunks[-1] += final_chunk
-                else:
-                    chunks.append(final_chunk)
-                    
-                current_chunk = ""
-                word_count = 0
-                
-        if current_chunk.strip():
-            chunks.append(current_chunk.strip())
-            
-        await sio.emit('stream_start', {'total_chunks': len(chunks)}, to=sid, namespace=namespace)
-        
+    async def stream_synthesis(sid, text, lang_name, namespace, fmt='wav', sample_rate=None, protocol=1, received=None):
+        # Normalized before chunking so chunks split on the spoken text (e.g. not inside 3.5)
+        lang_code = LANG_MAP.get(lang_name.lower(), 'eng')
+        with span("normalize", lang=lang_code):
+            chunks = prepare_chunks(text, lang_code)
+        await stream_audio(sid, chunks, lang_name, namespace, fmt, sample_rate, protocol, received or time.perf_counter())
+
+    async def stream_audio(sid, chunks, lang_name, namespace, fmt, sample_rate, protocol, received, entrypoint="socket"):
+        """
+        Streams the audio of chunks (a list, or an async iterable of chunks still
+        being produced) with the requested protocol. received is when the request
+        (or its first text delta) came in, for the time-to-first-audio metric.
+        """
+        try:
+            if protocol == 2:
+                await stream_frames(sid, chunks, lang_name, namespace, fmt, sample_rate, received, entrypoint)
+            else:
+                await stream_chunks(sid, chunks, lang_name, namespace, fmt, sample_rate, received, entrypoint)
+        except asyncio.CancelledError:
+            # Cancelled by the client or its disconnect; in-flight chunks were cancelled with it
+            logger.info("Stream cancelled for %s", sid)
+            REQUESTS.inc(entrypoint=entrypoint, outcome="cancelled")
+            raise
+
+    async def recorded(source, seen):
+        """Yields the chunks of an async source, keeping them in seen for event payloads."""
+        async for chunk in source:
+            seen.append(chunk)
+            yield chunk
+
+    # Protocol v1: every audio_chunk event carries a complete file plus its text
+    async def stream_chunks(sid, chunks, lang_name, namespace, fmt, sample_rate, received, entrypoint):
+        lang_code = LANG_MAP.get(lang_name.lower(), 'eng')
         loop = asyncio.get_event_loop()
+        # Incremental sessions don't know their chunks up front
+        total = len(chunks) if isinstance(chunks, list) else None
+        texts = chunks if total is not None else []
+        source = chunks if total is not None else recorded(chunks, texts)
+            
+        await sio.emit('stream_start', {'total_chunks': total, 'format': fmt}, to=sid, namespace=namespace)
         
-        async def process_chunk(chunk_text, index):
+        async def process_chunk(chunk_text, index, waveform, sr):
             try:
-                # Synthesize
-                # Speed 1.1 = Slower = Clearer
-                waveform, sr = await loop.run_in_executor(None, engine.synthesize, chunk_text, lang_name, 1.1)
-                
-                # Convert to bytes
-                waveform = waveform / np.max(np.abs(waveform)) * 32767
-                waveform = waveform.astype(np.int16)
-                byte_io = io.BytesIO()
-                wav.write(byte_io, sr, waveform)
-                wav_bytes = byte_io.getvalue()
+                # Every chunk is a complete file in the requested format. Compressed
+                # chunks are small, so they are cached next to the raw audio
+                cache_key = AudioCache.make_key(chunk_text, lang_code, SOCKET_SPEED, format_key(fmt, sample_rate)) if fmt != 'wav' else None
+                cached = await audio_cache.get_async(cache_key, io_executor) if cache_key else None
+                if cached is not None:
+                    audio_bytes = cached[0]
+                else:
+                    with span("encode", format=fmt):
+                        audio_bytes, out_rate = await loop.run_in_executor(
+                            io_executor, encode_audio, waveform, sr, fmt, sample_rate)
+                    if cache_key:
+                        audio_cache.put(cache_key, audio_bytes, out_rate, io_executor)
                 
-                await sio.emit('audio_chunk', {
-                    'chunk_index': index,
-                    'audio': wav_bytes, 
-                    'text_chunk': chunk_text
-                }, to=sid, namespace=namespace)
+                with span("emit", chunk=index):
+                    await sio.emit('audio_chunk', {
+                        'chunk_index': index,
+                        'audio': audio_bytes, 
+                        'text_chunk': chunk_text
+                    }, to=sid, namespace=namespace)
                 
             except Exception as e:
-                print(f"Error chunk {index}: {e}")
+                logger.error("Error chunk %d: %s", index, e)
                 await sio.emit('error', {'msg': str(e)}, to=sid, namespace=namespace)
 
-        for i, chunk in enumerate(chunks):
-            await process_chunk(chunk, i)
+        # Pipelined: upcoming chunks are synthesized while earlier ones are encoded and emitted
+        async for i, result, error in scheduler.stream(source, lang_name, SOCKET_SPEED, lookahead=settings.STREAM_LOOKAHEAD):
+            if error is not None:
+                logger.error("Error chunk %d: %s", i, error)
+                await sio.emit('error', {'msg': str(error)}, to=sid, namespace=namespace)
+                continue
+            waveform, sr = result
+            await process_chunk(texts[i], i, waveform, sr)
+            if received is not None:
+                FIRST_AUDIO_SECONDS.observe(time.perf_counter() - received, entrypoint=entrypoint)
+                received = None
             
         await sio.emit('stream_complete', {}, to=sid, namespace=namespace)
+        REQUESTS.inc(entrypoint=entrypoint, outcome="ok")
+
+
+    # Protocol v2: one stream header, then binary frames of a single continuous
+    # pcm or Ogg Opus stream, each acknowledged by the client
+    async def stream_frames(sid, chunks, lang_name, namespace, fmt, sample_rate, received, entrypoint):
+        stream_id = request_id_var.get()
+        loop = asyncio.get_event_loop()
+        total = len(chunks) if isinstance(chunks, list) else None
+        # Bounded in-flight window: a slow client holds back encoding and, through the
+        # scheduler lookahead, synthesis instead of letting frames pile up in its buffer
+        window = asyncio.Semaphore(max(1, settings.STREAM_ACK_WINDOW))
+        opus = None
+
+        async def send_frame(index, payload):
+            try:
+                await asyncio.wait_for(window.acquire(), settings.STREAM_ACK_TIMEOUT)
+            except asyncio.TimeoutError:
+                raise TimeoutError("Client stopped acknowledging audio frames")
+            with span("emit", chunk=index):
+                await sio.emit('audio_frame', (stream_id, index, payload), to=sid, namespace=namespace,
+                               callback=lambda *args: window.release())
+
+        async def send_start(out_rate):
+            await sio.emit('stream_start', {
+                'protocol': 2,
+                'stream_id': stream_id,
+                'format': fmt,
+                'sample_rate': out_rate,
+                'channels': 1,
+                'sample_width': 2 if fmt == 'pcm' else None,
+                'total_chunks': total,
+                'chunks': chunks if total is not None else None,
+            }, to=sid, namespace=namespace)
+
+        try:
+            started = False
+            failed = 0
+            async for i, result, error in scheduler.stream(chunks, lang_name, SOCKET_SPEED, lookahead=settings.STREAM_LOOKAHEAD):
+                if error is not None:
+                    logger.error("Error chunk %d: %s", i, error)
+                    failed += 1
+                    await sio.emit('error', {'msg': str(error), 'stream_id': stream_id, 'chunk_index': i}, to=sid, namespace=namespace)
+                    continue
+                waveform, sr = result
+                out_rate = sample_rate or sr
+                if not started:
+                    # The header waits for the first chunk so the sample rate is known
+                    if fmt == 'opus':
+                        opus = OggOpusStream(sr, out_rate)
+                    await send_start(out_rate)
+                    started = True
+
+                with span("encode", format=fmt):
+                    if opus is not None:
+                        payload = await loop.run_in_executor(io_executor, opus.write, waveform)
+                    else:
+                        payload = await loop.run_in_executor(
+                            io_executor, lambda: to_pcm16(resample(waveform, sr, out_rate)))
+                if payload:
+                    # Opus pages can span chunks, so a chunk may not complete one yet
+                    await send_frame(i, payload)
+                    if received is not None:
+                        FIRST_AUDIO_SECONDS.observe(time.perf_counter() - received, entrypoint=entrypoint)
+                        received = None
+
+            if not started:
+                if failed:
+                    # Never started, so it must not look completed: the stream as a whole failed
+                    REQUESTS.inc(entrypoint=entrypoint, outcome="error")
+                    await sio.emit('error', {'msg': 'No audio could be synthesized', 'stream_id': stream_id},
+                                   to=sid, namespace=namespace)
+                    return
+                # Nothing to speak (e.g. an empty incremental session): still a well-formed empty stream
+                await send_start(sample_rate)
+            if opus is not None:
+                # Final Ogg pages, sent as chunk index -1
+                await send_frame(-1, opus.close())
+            await sio.emit('stream_complete', {'stream_id': stream_id}, to=sid, namespace=namespace)
+            REQUESTS.inc(entrypoint=entrypoint, outcome="ok")
+        except TimeoutError as e:
+            logger.warning("Aborting stream for %s: %s", sid, e)
+            REQUESTS.inc(entrypoint=entrypoint, outcome="error")
+            await sio.emit('error', {'msg': str(e), 'stream_id': stream_id}, to=sid, namespace=namespace)
+        finally:
+            if opus is not None:
+                opus.close()
@@ -0,0 +1,89 @@
+"""
+Bulk synthesis from the command line, without the server.
+
+Reads JSONL (one {"id", "text", "language"} object per line) and renders
+every item, grouped by language, into a directory (resumable: finished
+items are listed in manifest.jsonl and skipped on rerun) or an archive.
+
+    python -m src.batch prompts.jsonl --output out/
+    python -m src.batch prompts.jsonl --archive prompts.zip --format mp3
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+
+from src.core.audio import check_format
+from src.core.config import settings
+from src.core.log_config import setup_logging
+from src.services.batch_service import ArchiveWriter, BatchRunner, DirectoryWriter, parse_jsonl
+
+logger = logging.getLogger("src.batch")
+
+
+async def run(args):
+    with open(args.input) as f:
+        items = parse_jsonl(f)
+    if args.archive:
+        writer = ArchiveWriter("tar" if args.archive.endswith(".tar") else "zip")
+        out = open(args.archive, "wb")
+    else:
+        writer = DirectoryWriter(args.output)
+        out = None
+
+    runner = BatchRunner(items, writer, fmt=args.format, sample_rate=args.sample_rate,
+                         translate=not args.no_translate, concurrency=args.concurrency)
+    pending = runner.total - runner.skipped
+    logger.info("%d items, %d already done, %d languages", runner.total, runner.skipped, len(runner.groups))
+    started = time.monotonic()
+    last_report = [started]
+
+    async def on_item(runner, result):
+        if out is not None:
+            out.write(writer.drain())
+        now = time.monotonic()
+        finished = runner.done + len(runner.failed)
+        if now - last_report[0] >= 1.0 or finished == pending:
+            last_report[0] = now
+            elapsed = now - started
+            logger.info("%d/%d items, %.1f items/s, %.1f audio s/s",
+                        finished, pending, finished / elapsed, runner.audio_seconds / elapsed)
+
+    try:
+        await runner.run(on_item)
+    finally:
+        writer.close()
+        if out is not None:
+            out.write(writer.drain())
+            out.close()
+
+    elapsed = time.monotonic() - started
+    summary = runner.summary()
+    summary["wall_seconds"] = round(elapsed, 3)
+    summary["items_per_second"] = round(runner.done / elapsed, 3) if elapsed else 0.0
+    summary["audio_seconds_per_second"] = round(runner.audio_seconds / elapsed, 3) if elapsed else 0.0
+    print(json.dumps(summary, indent=2))
+    return 1 if runner.failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL file of items")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--output", help="Directory to write files and manifest.jsonl into")
+    target.add_argument("--archive", help="Write a .zip or .tar instead")
+    parser.add_argument("--format", default="wav", help="wav, opus, mp3 or flac")
+    parser.add_argument("--sample-rate", type=int)
+    parser.add_argument("--no-translate", action="store_true", help="Texts are already in their target language")
+    parser.add_argument("--concurrency", type=int, default=0, help="Items in flight (default: enough to fill batches)")
+    args = parser.parse_args()
+
+    setup_logging(settings.LOG_LEVEL, settings.LOG_FORMAT)
+    check_format(args.format, args.sample_rate)
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+import io
+import struct
+from math import gcd
+
+import numpy as np
+import soundfile as sf
+from scipy.signal import resample_poly
+
+# 0xFFFFFFFF in the RIFF/data size fields tells players the length is unknown,
+# which is how WAV is streamed before the total size is known
+STREAMING_SIZE = 0xFFFFFFFF
+WAV_HEADER_SIZE = 44
+PCM16_MAX = 32767
+_WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+
+# Output formats: name -> (soundfile format, subtype, media type). WAV uses the encoder below
+FORMATS = {
+    "wav": (None, None, "audio/wav"),
+    "opus": ("OGG", "OPUS", "audio/ogg; codecs=opus"),
+    "mp3": ("MP3", "MPEG_LAYER_III", "audio/mpeg"),
+    "flac": ("FLAC", "PCM_16", "audio/flac"),
+}
+OPUS_RATES = (8000, 12000, 16000, 24000, 48000)
+MAX_SAMPLE_RATE = 48000
+# Accept header media types -> format name
+ACCEPT_FORMATS = {
+    "audio/wav": "wav", "audio/wave": "wav", "audio/x-wav": "wav",
+    "audio/ogg": "opus", "audio/opus": "opus",
+    "audio/mpeg": "mp3", "audio/mp3": "mp3",
+    "audio/flac": "flac", "audio/x-flac": "flac",
+}
+
+
+def normalize_inplace(waveform: np.ndarray, target: float = PCM16_MAX) -> np.ndarray:
+    """
+    Peak-normalizes a waveform to target (the 16-bit range by default), in place in float32.
+
+    Returns the scaled array, which is only a new one when the input wasn't a
+    writable, contiguous float32 array (cache hits are read-only). Silent audio
+    is left as is rather than divided by a zero peak.
+    """
+    if waveform.dtype != np.float32 or not waveform.flags.writeable or not waveform.flags.c_contiguous:
+        waveform = np.array(waveform, dtype=np.float32)
+    if waveform.size:
+        # max/min reduce without the temporary np.abs would allocate
+        peak = max(float(waveform.max()), -float(waveform.min()))
+        if peak > 0:
+            waveform *= target / peak
+    return waveform
+
+
+def pcm16_into(buffer, waveform: np.ndarray, offset: int = 0) -> int:
+    """Normalizes waveform and writes it as little-endian 16-bit PCM into buffer at offset. Returns bytes written."""
+    samples = normalize_inplace(waveform)
+    out = np.frombuffer(memoryview(buffer), dtype="<i2", count=samples.size, offset=offset)
+    # Truncates like astype(np.int16), without the intermediate int16 array
+    np.copyto(out, samples, casting="unsafe")
+    return samples.size * 2
+
+
+def to_pcm16(waveform: np.ndarray) -> bytearray:
+    """Peak-normalizes a float waveform into a new 16-bit PCM buffer."""
+    buffer = bytearray(waveform.size * 2)
+    pcm16_into(buffer, waveform)
+    return buffer
+
+
+def wav_header_into(buffer, sampling_rate: int, num_samples: int = None, channels: int = 1,
+                    sample_width: int = 2, offset: int = 0):
+    if num_samples is None:
+        riff_size = data_size = STREAMING_SIZE
+    else:
+        data_size = num_samples * channels * sample_width
+        riff_size = 36 + data_size
+    byte_rate = sampling_rate * channels * sample_width
+    _WAV_HEADER.pack_into(
+        buffer, offset,
+        b"RIFF", riff_size, b"WAVE",
+        b"fmt ", 16, 1, channels, sampling_rate, byte_rate, channels * sample_width, sample_width * 8,
+        b"data", data_size,
+    )
+
+
+def wav_header(sampling_rate: int, num_samples: int = None, channels: int = 1, sample_width: int = 2) -> bytes:
+    """
+    Builds a 44-byte PCM WAV header. Without num_samples the size fields are
+    set to STREAMING_SIZE so the header can precede audio that is still being generated.
+    """
+    buffer = bytearray(WAV_HEADER_SIZE)
+    wav_header_into(buffer, sampling_rate, num_samples, channels, sample_width)
+    return bytes(buffer)
+
+
+def encode_wav(waveform: np.ndarray, sampling_rate: int) -> bytearray:
+    """
+    Encodes a float waveform as a complete 16-bit mono WAV file.
+
+    Header and samples are written straight into one preallocated buffer, so the
+    only full-size allocation is the output itself (plus a float32 copy for
+    read-only input).
+    """
+    buffer = bytearray(WAV_HEADER_SIZE + waveform.size * 2)
+    wav_header_into(buffer, sampling_rate, waveform.size)
+    pcm16_into(buffer, waveform, WAV_HEADER_SIZE)
+    return buffer
+
+
+def resample(waveform: np.ndarray, from_rate: int, to_rate: int) -> np.ndarray:
+    """Polyphase resampling between integer sample rates."""
+    if from_rate == to_rate:
+        return waveform
+    factor = gcd(from_rate, to_rate)
+    return resample_poly(waveform, to_rate // factor, from_rate // factor).astype(np.float32)
+
+
+def check_format(fmt: str, sample_rate: int = None, sampling_rate: int = None):
+    """Raises ValueError for an unknown format or a sample rate it can't be encoded at."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format: {fmt} (expected one of {', '.join(FORMATS)})")
+    if sample_rate is not None and not 0 < sample_rate <= MAX_SAMPLE_RATE:
+        raise ValueError(f"Unsupported sample rate: {sample_rate}")
+    rate = sample_rate or sampling_rate
+    if fmt == "opus" and rate is not None and rate not in OPUS_RATES:
+        raise ValueError(f"Opus only supports sample rates {', '.join(map(str, OPUS_RATES))}")
+
+
+def negotiate_format(accept: str, default: str = "wav") -> str:
+    """Picks the preferred supported format from an Accept header."""
+    choices = []
+    for position, part in enumerate((accept or "").split(",")):
+        media_type, _, params = part.strip().partition(";")
+        fmt = ACCEPT_FORMATS.get(media_type.strip().lower())
+        if fmt is None:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    pass
+        if quality > 0:
+            choices.append((-quality, position, fmt))
+    return min(choices)[2] if choices else default
+
+
+def format_key(fmt: str, sample_rate: int = None) -> str:
+    """Audio cache format tag, so each format and rate is cached separately."""
+    return f"{fmt}@{sample_rate}" if sample_rate else fmt
+
+
+def encode_audio(waveform: np.ndarray, sampling_rate: int, fmt: str = "wav", sample_rate: int = None):
+    """
+    Encodes a float waveform as a complete file in fmt, resampled to sample_rate
+    if given. Returns (payload, sample rate of the payload). CPU-bound: call it
+    off the event loop.
+    """
+    if sample_rate and sample_rate != sampling_rate:
+        waveform = resample(waveform, sampling_rate, sample_rate)
+        sampling_rate = sample_rate
+    if fmt == "wav":
+        return encode_wav(waveform, sampling_rate), sampling_rate
+    container, subtype, _ = FORMATS[fmt]
+    out = io.BytesIO()
+    sf.write(out, normalize_inplace(waveform, 1.0), sampling_rate, format=container, subtype=subtype)
+    return out.getvalue(), sampling_rate
+
+
+class _PageSink:
+    """Write-only file object that hands libsndfile's output back chunk by chunk."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.position = 0
+
+    def write(self, data):
+        self.buffer += data
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=0):
+        # Only probed when opening; the Ogg writer never seeks back
+        return self.position
+
+    def read(self, size=-1):
+        return b""
+
+    def drain(self) -> bytes:
+        data, self.buffer = bytes(self.buffer), bytearray()
+        return data
+
+
+class OggOpusStream:
+    """
+    Incremental Ogg Opus encoder for chunked responses: write() returns the
+    Ogg pages completed so far (headers come with the first ones), close()
+    returns the rest. The concatenated output is one playable stream.
+    """
+
+    def __init__(self, sampling_rate: int, sample_rate: int = None):
+        self.from_rate = sampling_rate
+        self.rate = sample_rate or sampling_rate
+        self.sink = _PageSink()
+        self.file = sf.SoundFile(self.sink, "w", self.rate, 1, format="OGG", subtype="OPUS")
+
+    def write(self, waveform: np.ndarray) -> bytes:
+        waveform = resample(waveform, self.from_rate, self.rate)
+        self.file.write(normalize_inplace(waveform, 1.0))
+        return self.sink.drain()
+
+    def close(self) -> bytes:
+        if self.file.closed:
+            return b""
+        self.file.close()
+        return self.sink.drain()
@@ -0,0 +1,223 @@
+import asyncio
+import hashlib
+import logging
+import os
+import struct
+import threading
+import unicodedata
+from collections import Counter, OrderedDict
+from typing import Optional, Tuple
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Disk entries are a 4-byte little-endian sampling rate followed by the payload
+_HEADER = struct.Struct("<I")
+
+
+def normalize_cache_text(text: str) -> str:
+    """Canonical form of the input text used for cache keys."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def inference_backend_key() -> str:
+    """What audio is synthesized with (torch, ONNX fp32 / int8...), as part of cache keys."""
+    if settings.INFERENCE_BACKEND == "onnx":
+        return "onnx-int8" if settings.ONNX_QUANTIZE else "onnx-fp32"
+    return settings.INFERENCE_BACKEND
+
+
+class AudioCache:
+    """
+    Content-addressed cache of synthesized audio.
+
+    Entries are keyed on (normalized text, language code, model revision,
+    inference backend, speed, output format) and stored as (payload bytes,
+    sampling rate). A bounded in-memory LRU tier (by bytes) sits in front of an optional
+    on-disk LRU tier that survives restarts. The disk tier is indexed in
+    memory (scanned once at startup), so puts and evictions never walk
+    the cache directory.
+    """
+
+    def __init__(self, max_bytes: int, disk_dir: str = "", disk_max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict() # {key: (payload, sampling_rate)}
+        self.size = 0
+        self.lock = threading.Lock()
+        self.counters = Counter()
+
+        self.disk_dir = disk_dir or None
+        self.disk_max_bytes = disk_max_bytes
+        self.disk_index = OrderedDict() # {path: size}, least recently used first
+        self.disk_size = 0
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            # mtimes are touched on every hit, so they restore the LRU order
+            for path, size, _ in sorted(self._disk_files(), key=lambda f: f[2]):
+                self.disk_index[path] = size
+                self.disk_size += size
+
+    @staticmethod
+    def make_key(text: str, lang_code: str, speed: float = 1.0, fmt: str = "f32",
+                 revision: str = None, backend: str = None) -> str:
+        revision = revision or settings.MODEL_REVISION
+        backend = backend or inference_backend_key()
+        raw = "\x1f".join([normalize_cache_text(text), lang_code, revision, backend, repr(float(speed)), fmt])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[bytes, int]]:
+        entry = self._memory_get(key)
+        return entry if entry is not None else self._disk_lookup(key)
+
+    async def get_async(self, key: str, executor=None) -> Optional[Tuple[bytes, int]]:
+        """get() for the event loop: the memory tier inline, disk reads on executor."""
+        entry = self._memory_get(key)
+        if entry is not None:
+            return entry
+        if not self.disk_dir:
+            # No file access, just counts the miss
+            return self._disk_lookup(key)
+        return await asyncio.get_running_loop().run_in_executor(executor, self._disk_lookup, key)
+
+    def _memory_get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.counters["memory_hits"] += 1
+            return entry
+
+    def _disk_lookup(self, key):
+        # Counts the lookup as a disk hit or a miss
+        entry = self._disk_get(key)
+        if entry is not None:
+            with self.lock:
+                self.counters["disk_hits"] += 1
+            # Promote to the memory tier
+            self._memory_put(key, *entry)
+            return entry
+
+        with self.lock:
+            self.counters["misses"] += 1
+        return None
+
+    def put(self, key: str, payload: bytes, sampling_rate: int, executor=None):
+        """Stores an entry; with an executor the disk write runs there, without waiting for it."""
+        self._memory_put(key, payload, sampling_rate)
+        if self.disk_dir:
+            if executor is not None:
+                executor.submit(self._disk_put, key, payload, sampling_rate)
+            else:
+                self._disk_put(key, payload, sampling_rate)
+
+    def _memory_put(self, key, payload, sampling_rate):
+        if len(payload) > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old[0])
+            self.entries[key] = (payload, sampling_rate)
+            self.size += len(payload)
+            while self.size > self.max_bytes:
+                _, (evicted, _) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.counters["evictions"] += 1
+
+    # --- Disk tier ---
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key + ".bin")
+
+    def _disk_files(self):
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if name.endswith(".bin"):
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, st.st_size, st.st_mtime
+
+    def _disk_get(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        with self.lock:
+            if path not in self.disk_index:
+                return None
+            self.disk_index.move_to_end(path)
+        try:
+            # Entries are read whole (they become the memory tier's bytes), so a plain read
+            with open(path, "rb") as f:
+                data = f.read()
+            (sampling_rate,) = _HEADER.unpack_from(data, 0)
+            # Keeps the LRU order across restarts
+            os.utime(path)
+        except (OSError, struct.error):
+            # Evicted (or corrupted) in the meantime
+            with self.lock:
+                size = self.disk_index.pop(path, None)
+                if size is not None:
+                    self.disk_size -= size
+            return None
+        return data[_HEADER.size:], sampling_rate
+
+    def _disk_put(self, key, payload, sampling_rate):
+        path = self._disk_path(key)
+        with self.lock:
+            if path in self.disk_index:
+                return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(_HEADER.pack(sampling_rate))
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Audio cache disk write failed: %s", e)
+            return
+
+        evicted = []
+        with self.lock:
+            size = _HEADER.size + len(payload)
+            self.disk_size += size - self.disk_index.pop(path, 0)
+            self.disk_index[path] = size
+            # Least recently used first, never the entry just written
+            while self.disk_size > self.disk_max_bytes and len(self.disk_index) > 1:
+                old_path, old_size = self.disk_index.popitem(last=False)
+                self.disk_size -= old_size
+                self.counters["disk_evictions"] += 1
+                evicted.append(old_path)
+        for old_path in evicted:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        lookups = self.counters["memory_hits"] + self.counters["disk_hits"] + self.counters["misses"]
+        hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+        return {
+            "memory_hits": self.counters["memory_hits"],
+            "disk_hits": self.counters["disk_hits"],
+            "misses": self.counters["misses"],
+            "evictions": self.counters["evictions"],
+            "disk_evictions": self.counters["disk_evictions"],
+            "hit_ratio": (hits / lookups) if lookups else 0.0,
+            "entries": len(self.entries),
+            "memory_bytes": self.size,
+            "memory_max_bytes": self.max_bytes,
+            "disk_bytes": self.disk_size,
+            "disk_max_bytes": self.disk_max_bytes if self.disk_dir else 0,
+        }
+
+
+# Shared Singleton
+audio_cache = AudioCache(
+    max_bytes=settings.AUDIO_CACHE_MAX_BYTES,
+    disk_dir=settings.AUDIO_CACHE_DIR,
+    disk_max_bytes=settings.AUDIO_CACHE_DISK_MAX_BYTES,
+)
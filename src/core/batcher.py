@@ -0,0 +1,228 @@
+import asyncio
+from collections import Counter
+from typing import AsyncIterable, Dict, List, Tuple, Union
+
+import numpy as np
+
+from src.core.audio import resample
+from src.core.audio_cache import AudioCache, audio_cache
+from src.core.tracing import request_id_var
+from src.core.traffic import traffic_stats
+from src.core.config import settings, LANG_MAP
+from src.core.tts_engine import engine, synthesize_batch_job
+from src.core.workers import inference_pool, io_executor
+
+
+def _chunk_lang(text: str, lang: str) -> str:
+    """Language code a chunk is synthesized in: its own for a Segment (code-mixed run)."""
+    return LANG_MAP.get(getattr(text, "lang_code", lang).lower(), "eng")
+
+
+class _Job:
+    __slots__ = ("text", "tokens", "future", "cache_key", "request_id")
+
+    def __init__(self, text: str, lang_code: str, future: asyncio.Future, cache_key: str):
+        self.text = text
+        self.request_id = request_id_var.get()
+        self.cache_key = cache_key
+        # Same count the chunker budgets with, so both limits are in tokenizer tokens
+        self.tokens = engine.count_tokens(text, lang_code)
+        self.future = future
+
+
+class BatchScheduler:
+    """
+    Collects pending synthesis jobs per (language, speed) and runs them
+    as a single padded VITS forward pass.
+
+    A batch is flushed when it reaches max_batch_size, when adding a job
+    would exceed max_batch_tokens, or when max_wait_ms has elapsed since
+    the first job of the batch arrived.
+    """
+
+    def __init__(self, max_batch_size: int, max_wait_ms: float, max_batch_tokens: int,
+                 cache: AudioCache = None):
+        self.cache = cache
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_batch_tokens = max_batch_tokens
+        self.pending: Dict[Tuple[str, float], List[_Job]] = {}
+        self.timers: Dict[Tuple[str, float], asyncio.TimerHandle] = {}
+        self.batch_sizes = Counter()
+
+    async def submit(self, text: str, lang: str = "eng", speed: float = 1.0):
+        """
+        Queue a text for synthesis and wait for its (waveform, sampling_rate).
+        A Segment (code-mixed run) goes to its own language's batch.
+        """
+        lang_code = _chunk_lang(text, lang)
+        key = (lang_code, speed)
+
+        # Cache hits never reach the executor
+        cache_key = None
+        if self.cache is not None:
+            cache_key = AudioCache.make_key(text, lang_code, speed, "f32")
+            cached = await self.cache.get_async(cache_key, io_executor)
+            if cached is not None:
+                payload, sr = cached
+                return np.frombuffer(payload, dtype=np.float32), sr
+
+        loop = asyncio.get_running_loop()
+        job = _Job(text, lang_code, loop.create_future(), cache_key)
+
+        queue = self.pending.get(key)
+        if queue and sum(j.tokens for j in queue) + job.tokens > self.max_batch_tokens:
+            self._flush(key)
+            queue = None
+        if queue is None:
+            queue = self.pending[key] = []
+        queue.append(job)
+
+        if len(queue) >= self.max_batch_size or self.max_wait == 0:
+            self._flush(key)
+        elif key not in self.timers:
+            self.timers[key] = loop.call_later(self.max_wait, self._flush, key)
+
+        return await job.future
+
+    async def submit_chunks(self, texts: List[str], lang: str = "eng", speed: float = 1.0):
+        """
+        Synthesizes the chunks of one text and joins their audio. All chunks are
+        queued at once, so they share forward passes instead of running one by one
+        (code-mixed runs batch with the other runs of their language). Audio from
+        models with another sampling rate is resampled to the first chunk's.
+        """
+        # Traffic is counted per request (and language of its code-mixed runs), not per chunk
+        for lang_code in {_chunk_lang(text, lang) for text in texts}:
+            traffic_stats.record(lang_code)
+        results = await asyncio.gather(*(self.submit(text, lang, speed) for text in texts))
+        if len(results) == 1:
+            return results[0]
+        sr = results[0][1]
+        return np.concatenate([resample(waveform, rate, sr) for waveform, rate in results]), sr
+
+    async def stream(self, texts: Union[List[str], AsyncIterable[str]], lang: str = "eng",
+                     speed: float = 1.0, lookahead: int = 1):
+        """
+        Pipelined synthesis of an ordered sequence of chunks.
+
+        Keeps up to `lookahead` chunks in flight ahead of the one being
+        consumed, so inference for upcoming chunks (batched together when
+        they land in the same window) overlaps with encoding/sending of
+        earlier ones. Yields (index, result, error) in input order, all
+        results at the first chunk's sampling rate.
+
+        texts may be an async iterable of chunks that are still being
+        produced (incremental text); each is submitted as soon as it arrives
+        and a window slot is free. Chunks still in flight are cancelled if
+        the consumer stops early.
+        """
+        slots = asyncio.Semaphore(max(1, lookahead) + 1)
+        in_flight = asyncio.Queue() # submitted tasks in input order, None after the last
+        recorded = set() # languages this request was counted for in the traffic stats
+
+        def submit(text):
+            lang_code = _chunk_lang(text, lang)
+            if lang_code not in recorded:
+                recorded.add(lang_code)
+                traffic_stats.record(lang_code)
+            in_flight.put_nowait(asyncio.ensure_future(self.submit(text, lang, speed)))
+
+        async def feed():
+            try:
+                if hasattr(texts, "__aiter__"):
+                    async for text in texts:
+                        await slots.acquire()
+                        submit(text)
+                else:
+                    for text in texts:
+                        await slots.acquire()
+                        submit(text)
+            finally:
+                in_flight.put_nowait(None)
+
+        feeder = asyncio.ensure_future(feed())
+        index = 0
+        sr = None
+        try:
+            while True:
+                task = await in_flight.get()
+                if task is None:
+                    break
+                try:
+                    waveform, rate = await task
+                except Exception as e:
+                    yield index, None, e
+                else:
+                    # Code-mixed runs may come from a model with another sampling rate
+                    sr = sr or rate
+                    yield index, (resample(waveform, rate, sr), sr), None
+                # The slot frees once the consumer is done with this chunk
+                slots.release()
+                index += 1
+            # Surfaces errors raised by the text source
+            await feeder
+        finally:
+            feeder.cancel()
+            while not in_flight.empty():
+                task = in_flight.get_nowait()
+                if task is not None:
+                    task.cancel()
+
+    def _flush(self, key):
+        timer = self.timers.pop(key, None)
+        if timer:
+            timer.cancel()
+        jobs = [j for j in self.pending.pop(key, []) if not j.future.cancelled()]
+        if jobs:
+            asyncio.ensure_future(self._run_batch(key, jobs))
+
+    async def _run_batch(self, key, jobs: List[_Job]):
+        lang_code, speed = key
+        try:
+            # Spans recorded during inference are attributed to every request in the batch
+            request_id_var.set(",".join(sorted({str(j.request_id) for j in jobs})))
+            await inference_pool.prepare(lang_code)
+            # Requests cancelled while the model loaded (client gone) are dropped before inference
+            jobs = [j for j in jobs if not j.future.cancelled()]
+            if not jobs:
+                return
+            self.batch_sizes[len(jobs)] += 1
+            results = await inference_pool.run(
+                synthesize_batch_job, [j.text for j in jobs], lang_code, speed
+            )
+        except Exception as e:
+            for j in jobs:
+                if not j.future.done():
+                    j.future.set_exception(e)
+            return
+
+        for j, result in zip(jobs, results):
+            if self.cache is not None:
+                waveform, sr = result
+                self.cache.put(j.cache_key, np.ascontiguousarray(waveform, dtype=np.float32).tobytes(), sr,
+                               io_executor)
+            if not j.future.done():
+                j.future.set_result(result)
+
+    def stats(self) -> dict:
+        """Achieved batch sizes since startup."""
+        batches = sum(self.batch_sizes.values())
+        requests = sum(size * count for size, count in self.batch_sizes.items())
+        return {
+            "batches": batches,
+            "requests": requests,
+            "mean_batch_size": (requests / batches) if batches else 0.0,
+            "batch_size_histogram": {str(k): v for k, v in sorted(self.batch_sizes.items())},
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+        }
+
+
+# Shared Singleton
+scheduler = BatchScheduler(
+    max_batch_size=settings.BATCH_MAX_SIZE,
+    max_wait_ms=settings.BATCH_MAX_WAIT_MS,
+    max_batch_tokens=settings.BATCH_MAX_TOKENS,
+    cache=audio_cache,
+)
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import time
+from collections import defaultdict, deque
+from typing import AsyncIterator, Dict, Optional
+
+
+class Broker:
+    """
+    Message broker shared by every node of a deployment: pub/sub channels
+    (Socket.IO emits, job results), work queues (jobs for a worker) and a
+    registry of live nodes kept fresh by heartbeats.
+    """
+
+    async def publish(self, channel: str, data: bytes):
+        raise NotImplementedError
+
+    async def subscribe(self, channel: str) -> AsyncIterator[bytes]:
+        """Subscribes to channel and returns its messages; nothing published after this call is missed."""
+        raise NotImplementedError
+
+    async def push(self, queue: str, data: bytes):
+        raise NotImplementedError
+
+    async def pop(self, queue: str, timeout: float) -> Optional[bytes]:
+        """Next item of queue, or None after waiting timeout seconds."""
+        raise NotImplementedError
+
+    async def heartbeat(self, node_id: str, info: dict, ttl: float):
+        raise NotImplementedError
+
+    async def nodes(self) -> Dict[str, dict]:
+        """Nodes whose last heartbeat hasn't expired."""
+        raise NotImplementedError
+
+
+class InMemoryBroker(Broker):
+    """
+    In-process broker. Every instance created for the same name shares state,
+    so several servers in one process (tests, benchmarks) behave like nodes
+    of one deployment.
+    """
+
+    _shared = {}
+
+    def __init__(self, name: str = "default"):
+        state = self._shared.setdefault(name, {
+            "subscribers": defaultdict(list),
+            "queues": defaultdict(deque),
+            "nodes": {},
+        })
+        self.subscribers = state["subscribers"] # {channel: [asyncio.Queue]}
+        self.queues = state["queues"] # {queue: deque}
+        self.registry = state["nodes"] # {node_id: (expires, info)}
+
+    async def publish(self, channel, data):
+        for queue in list(self.subscribers[channel]):
+            queue.put_nowait(data)
+
+    async def subscribe(self, channel):
+        queue = asyncio.Queue()
+        self.subscribers[channel].append(queue)
+
+        async def messages():
+            try:
+                while True:
+                    yield await queue.get()
+            finally:
+                self.subscribers[channel].remove(queue)
+        return messages()
+
+    async def push(self, queue, data):
+        self.queues[queue].append(data)
+
+    async def pop(self, queue, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.queues[queue]:
+                return self.queues[queue].popleft()
+            if time.monotonic() >= deadline:
+                return None
+            await asyncio.sleep(0.005)
+
+    async def heartbeat(self, node_id, info, ttl):
+        self.registry[node_id] = (time.time() + ttl, info)
+
+    async def nodes(self):
+        now = time.time()
+        return {node_id: info for node_id, (expires, info) in self.registry.items() if expires > now}
+
+
+class RedisBroker(Broker):
+    """Broker on a Redis server (pub/sub, lists and expiring keys). Needs the redis package."""
+
+    def __init__(self, url: str, prefix: str = "tts"):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("BROKER_URL is a redis:// URL but the redis package is not installed")
+        self.redis = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def _key(self, *parts):
+        return ":".join((self.prefix,) + parts)
+
+    async def publish(self, channel, data):
+        await self.redis.publish(self._key("channel", channel), data)
+
+    async def subscribe(self, channel):
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(self._key("channel", channel))
+
+        async def messages():
+            try:
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        yield message["data"]
+            finally:
+                await pubsub.unsubscribe()
+                await pubsub.close()
+        return messages()
+
+    async def push(self, queue, data):
+        await self.redis.rpush(self._key("queue", queue), data)
+
+    async def pop(self, queue, timeout):
+        item = await self.redis.blpop([self._key("queue", queue)], timeout=max(1, int(timeout)))
+        return item[1] if item else None
+
+    async def heartbeat(self, node_id, info, ttl):
+        await self.redis.set(self._key("node", node_id), json.dumps(info), px=int(ttl * 1000))
+
+    async def nodes(self):
+        nodes = {}
+        async for key in self.redis.scan_iter(match=self._key("node", "*")):
+            raw = await self.redis.get(key)
+            if raw is not None:
+                info = json.loads(raw)
+                nodes[info["node_id"]] = info
+        return nodes
+
+
+_brokers = {}
+
+
+def get_broker(url: str) -> Broker:
+    """Broker for BROKER_URL: memory://<name> (in-process) or redis://..."""
+    if url not in _brokers:
+        if url.startswith("memory://"):
+            _brokers[url] = InMemoryBroker(url[len("memory://"):] or "default")
+        elif url.startswith(("redis://", "rediss://", "unix://")):
+            _brokers[url] = RedisBroker(url)
+        else:
+            raise ValueError(f"Unsupported BROKER_URL: {url}")
+    return _brokers[url]
@@ -0,0 +1,184 @@
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Callable, List, Optional
+
+from src.core.config import settings
+from src.core.segmenter import Segment, segment
+from src.core.tts_engine import engine
+
+# Sentence and clause punctuation shared by every language. Latin marks only
+# count when followed by whitespace, so "example.com" or "3.5" never split.
+SENTENCE_END = ".!?…"
+CLAUSE_END = ",;:"
+# Extra (sentence, clause) marks per language: the danda of Devanagari,
+# Gurmukhi and the Bengali-Assamese script ends sentences with no space after it
+LANG_PUNCTUATION = {
+    "hin": ("।॥", ""),
+    "san": ("।॥", ""),
+    "pan": ("।॥", ""),
+    "asm": ("।॥", ""),
+    "guj": ("।", ""),
+}
+# Closing quotes and brackets stay with the sentence they end
+CLOSERS = "\"'”’»)]"
+
+
+@lru_cache(maxsize=None)
+def _boundaries(lang_code: str, incremental: bool = False):
+    """
+    Compiled (sentence, clause) boundary patterns for a language. For text
+    still arriving, a Latin mark at the very end doesn't count yet ("3." may
+    continue as "3.5").
+    """
+    extra_sentence, extra_clause = LANG_PUNCTUATION.get(lang_code, ("", ""))
+    after = r"(?=\s)" if incremental else r"(?=\s|$)"
+    patterns = []
+    for latin, native in ((SENTENCE_END, extra_sentence), (CLAUSE_END, extra_clause)):
+        pattern = rf"[{re.escape(latin)}]+[{re.escape(CLOSERS)}]*{after}"
+        if native:
+            pattern += rf"|[{re.escape(native)}]+[{re.escape(CLOSERS)}]*"
+        patterns.append(re.compile(pattern))
+    return patterns
+
+
+def _split_at(text: str, boundary) -> List[str]:
+    pieces = []
+    start = 0
+    for m in boundary.finditer(text):
+        pieces.append(text[start:m.end()].strip())
+        start = m.end()
+    pieces.append(text[start:].strip())
+    return [p for p in pieces if p]
+
+
+def split_into_chunks(text: str, lang_code: str = "eng", budget: Optional[int] = None,
+                      first_budget: Optional[int] = None,
+                      count_tokens: Optional[Callable[[str], int]] = None) -> List[str]:
+    """
+    Splits text into chunks of at most `budget` tokenizer tokens (the first
+    one at most `first_budget`, so streamed playback starts sooner).
+
+    Whole sentences are packed together up to the budget, so short sentences
+    don't each cost a forward pass of their own. A sentence over the budget
+    is split at clauses, then words, then (scripts without spaces) characters.
+    """
+    budget = max(1, budget or settings.CHUNK_TOKEN_BUDGET)
+    first_budget = min(budget, max(1, first_budget or settings.CHUNK_FIRST_TOKEN_BUDGET))
+    count = count_tokens or (lambda piece: engine.count_tokens(piece, lang_code))
+    sentence, clause = _boundaries(lang_code)
+    splitters = [
+        lambda piece: _split_at(piece, clause),
+        str.split,
+        None, # characters, sized to the limit
+    ]
+
+    chunks = []
+    current, current_tokens = [], 0
+    # (piece, how finely it has been split: 0 = sentence)
+    pending = deque((piece, 0) for piece in _split_at(text, sentence))
+    while pending:
+        piece, level = pending.popleft()
+        # Fragments without letters or digits ("...", "!") ride along with their neighbour
+        if not any(c.isalnum() for c in piece) and (current or chunks):
+            if current:
+                current[-1] += piece
+            else:
+                chunks[-1] += piece
+            continue
+        tokens = count(piece)
+        limit = budget if chunks else first_budget
+        if current and current_tokens + tokens > limit:
+            chunks.append(" ".join(current))
+            current, current_tokens = [], 0
+            limit = budget
+        if tokens > limit and level < len(splitters):
+            splitter = splitters[level]
+            if splitter is None:
+                size = max(1, len(piece) * limit // tokens)
+                parts = [piece[i:i + size] for i in range(0, len(piece), size)]
+            else:
+                parts = splitter(piece)
+            if len(parts) > 1 or splitter is None:
+                pending.extendleft((part, level + 1) for part in reversed(parts))
+                continue
+            # Nothing to split at this level; try the next one
+            pending.appendleft((piece, level + 1))
+            continue
+        current.append(piece)
+        current_tokens += tokens
+
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def prepare_chunks(text: str, lang_code: str, budget: Optional[int] = None,
+                   first_budget: Optional[int] = None) -> List[str]:
+    """
+    Normalizes and chunks text for synthesis in lang_code. Runs of code-mixed
+    text in another script are normalized and chunked in their own language
+    and come back as Segments, which the scheduler sends to that language's model.
+    """
+    budget = budget or settings.CHUNK_TOKEN_BUDGET
+    chunks = []
+    for run_lang, run in segment(text, lang_code):
+        run = engine.prepare_text(run, run_lang)
+        pieces = split_into_chunks(run, run_lang, budget, budget if chunks else first_budget)
+        if run_lang != lang_code:
+            pieces = [Segment(piece, run_lang) for piece in pieces]
+        chunks.extend(pieces)
+    return chunks
+
+
+class IncrementalChunker:
+    """
+    Segments text that arrives in pieces (e.g. an LLM token stream) so each
+    part can be synthesized while the rest is still being generated.
+
+    feed() returns the segments a delta completed: up to a sentence end, up
+    to a clause end once min_tokens are buffered, or up to the last word when
+    the buffer outgrows the budget without punctuation. close() returns the rest.
+    """
+
+    def __init__(self, lang_code: str = "eng", budget: Optional[int] = None, min_tokens: Optional[int] = None,
+                 count_tokens: Optional[Callable[[str], int]] = None):
+        self.lang_code = lang_code
+        self.budget = max(1, budget or settings.CHUNK_TOKEN_BUDGET)
+        self.min_tokens = settings.STREAM_CLAUSE_MIN_TOKENS if min_tokens is None else min_tokens
+        self.count = count_tokens or (lambda piece: engine.count_tokens(piece, lang_code))
+        self.sentence, self.clause = _boundaries(lang_code, incremental=True)
+        self.buffer = ""
+
+    def _cut(self) -> Optional[int]:
+        """End of the next complete segment in the buffer, if there is one."""
+        sentence = self.sentence.search(self.buffer)
+        limit = sentence.start() if sentence else len(self.buffer)
+        for clause in self.clause.finditer(self.buffer, 0, limit):
+            if self.count(self.buffer[:clause.end()].strip()) >= self.min_tokens:
+                return clause.end()
+        if sentence:
+            return sentence.end()
+        if self.count(self.buffer) > self.budget:
+            # The last word may still be growing, so cut before it
+            space = self.buffer.rstrip().rfind(" ")
+            return space if space > 0 else len(self.buffer)
+        return None
+
+    def feed(self, delta: str) -> List[str]:
+        self.buffer += delta
+        segments = []
+        cut = self._cut()
+        while cut is not None:
+            segment, self.buffer = self.buffer[:cut].strip(), self.buffer[cut:]
+            # Punctuation-only leftovers ("..." after a sentence) have nothing to say
+            if any(c.isalnum() for c in segment):
+                segments.append(segment)
+            cut = self._cut()
+        return segments
+
+    def close(self) -> List[str]:
+        rest, self.buffer = self.buffer.strip(), ""
+        if not any(c.isalnum() for c in rest):
+            return []
+        return split_into_chunks(rest, self.lang_code, self.budget, self.budget, self.count)
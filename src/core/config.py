@@ -8,11 +8,98 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     DEBUG: bool = False
+    LOG_LEVEL: str = "INFO" # DEBUG also emits per-stage trace spans
+    LOG_FORMAT: str = "text" # text | json
     
     # Model Settings (could be loaded from env)
     MODEL_DEVICE: str = "cpu"
     MAX_LOADED_MODELS: int = 3
-    PRELOAD_LANGS: list = []
+    MODEL_CACHE_MAX_BYTES: int = 0 # Budget for resident model weights, 0 = count limit only
+    MODEL_IDLE_TTL: float = 1800.0 # Unload unpinned models idle this long (seconds), 0 = never
+    MODEL_LOAD_WORKERS: int = 2 # Background model loads (preload / warm-up)
+    PRELOAD_LANGS: list = [] # Loaded in the background at startup and pinned in the cache
+
+    # Traffic-aware model caching
+    TRAFFIC_HALF_LIFE: float = 300.0 # Seconds for per-language request rates to decay by half
+    PREFETCH_ENABLED: bool = True # Load likely-next languages into free capacity when idle
+    PREFETCH_INTERVAL: float = 10.0
+    PREFETCH_MIN_RATE: float = 0.001 # Requests/second below which a language isn't prefetched
+    # Hugging Face revision of the facebook/mms-tts-* checkpoints (part of audio cache keys)
+    MODEL_REVISION: str = "main"
+
+    # Inference backend: torch (eager VitsModel) | onnx (ONNX Runtime, exported on first load)
+    # | compiled (torch.compile'd VitsModel, inputs padded to length buckets, warmed up on load)
+    INFERENCE_BACKEND: str = "torch"
+    TORCH_LENGTH_BUCKETS: list = [64, 128, 256, 512] # Token lengths inputs are padded up to (longer ones run as is)
+    TORCH_COMPILE: bool = True # compiled backend: False = inference_mode and bucket padding only
+    TORCH_COMPILE_MODE: str = "default" # default | reduce-overhead | max-autotune
+    TORCH_WARMUP: bool = True # compiled backend: run every bucket once when a model loads
+    TORCH_INTEROP_THREADS: int = 0 # 0 = torch default
+    ONNX_CACHE_DIR: str = "data/onnx"
+    ONNX_QUANTIZE: bool = False # Dynamic int8 quantization of the exported graph
+    ONNX_PARITY_MAX_DIFF: float = 0.05 # int8 is only served if its audio is this close to torch's (else fp32)
+
+    # Local store of model snapshots whose weights are memory-mapped (python -m src.snapshot)
+    MODEL_STORE_DIR: str = "data/models" # Snapshots exported at runtime (keep it on a volume)
+    # Load models from snapshots (exported on first use) instead of the HF cache. Process mode always does
+    MODEL_STORE_ENABLED: bool = False
+    MODEL_STORE_BAKED_DIR: str = "" # Read-only snapshots baked into the image, used whenever present
+    MODEL_STORE_DTYPE: str = "float32" # Weight dtype snapshots are stored in: float32 | float16 (GPU) | bfloat16 (GPU)
+    MODEL_STORE_VERIFY: bool = False # sha256 every snapshot file on load (sizes are always checked)
+
+    # Inference Workers
+    # thread: one in-process engine shared by INFERENCE_WORKERS threads
+    # process: INFERENCE_WORKERS processes sharing mmap'd weights from MODEL_STORE_DIR
+    SERVING_MODE: str = "thread"
+    INFERENCE_WORKERS: int = 2
+    # Intra-op threads per worker, 0 = split CPU cores evenly between workers. torch applies it per
+    # process: each worker process gets its own, while worker threads share one setting
+    INFERENCE_TORCH_THREADS: int = 0
+    INFERENCE_QUEUE_LIMIT: int = 64 # Max admitted requests before returning 429 / busy
+    INFERENCE_MAX_PER_CLIENT: int = 4 # Max concurrent requests per client IP / socket session
+    IO_WORKERS: int = 8 # Translation and other network I/O
+
+    # Scale-out: nodes sharing one broker (Socket.IO emits reach clients on any node)
+    BROKER_URL: str = "" # "" = single node, "memory://<name>" = in-process (tests), "redis://host:6379/0"
+    NODE_ROLE: str = "standalone" # standalone | frontend (sends synthesis to worker nodes) | worker (runs it)
+    NODE_ID: str = "" # Defaults to <hostname>-<pid>
+    NODE_HEARTBEAT: float = 2.0 # Seconds between worker heartbeats (warm languages, load)
+    JOB_TIMEOUT: float = 120.0 # Seconds a frontend waits for a worker's result
+
+    # Micro-batching Settings
+    # Requests for the same language arriving within BATCH_MAX_WAIT_MS are
+    # merged into one forward pass (up to BATCH_MAX_SIZE texts / BATCH_MAX_TOKENS tokenizer tokens, MMS: ~2 per character)
+    BATCH_MAX_SIZE: int = 8
+    BATCH_MAX_WAIT_MS: float = 10.0
+    BATCH_MAX_TOKENS: int = 4000
+    # Chunking: tokenizer tokens per chunk (MMS: ~2 per character), tuned with benchmarks/bench_chunking.py
+    CHUNK_TOKEN_BUDGET: int = 240
+    CHUNK_FIRST_TOKEN_BUDGET: int = 80 # Smaller first chunk of streamed responses, so playback starts sooner
+    STREAM_CLAUSE_MIN_TOKENS: int = 24 # Incremental text: shortest clause sent to synthesis before its sentence ends
+    TEXT_SESSION_IDLE_TIMEOUT: float = 30.0 # Incremental text: end a session after this long without a delta
+    # Chunks synthesized ahead of the one being sent, per stream
+    STREAM_LOOKAHEAD: int = 2
+    STREAM_ACK_WINDOW: int = 4 # Socket protocol v2: audio frames sent before the client must ack
+    STREAM_ACK_TIMEOUT: float = 30.0 # Socket protocol v2: abort a stream whose client stops acking
+    PROGRESS_MIN_INTERVAL: float = 0.1 # Progress events per request are coalesced to at most one per interval
+
+    # Synthesized Audio Cache
+    AUDIO_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    AUDIO_CACHE_DIR: str = "" # Empty disables the on-disk tier
+    AUDIO_CACHE_DISK_MAX_BYTES: int = 1024 * 1024 * 1024
+
+    # Translation Settings
+    TRANSLATION_BACKEND: str = "google" # google | offline
+    TRANSLATION_CACHE_SIZE: int = 4096
+    TRANSLATION_CACHE_TTL: float = 3600.0
+
+    # Text Normalization Settings
+    TEXT_NORMALIZER_CACHE: int = 4096 # Memoized (text, language) normalizations
+
+    # Code-Mixed Text Settings
+    SEGMENT_MIXED_SCRIPTS: bool = True # Speak runs in another script with that language's model
+    SEGMENT_DETECT_MIN_CHARS: int = 24 # Shorter Latin runs aren't language-detected (read as English)
+    SEGMENT_DETECT_MIN_PROB: float = 0.9 # langdetect confidence needed to pick French over the default
     
     class Config:
         env_file = ".env"
@@ -43,5 +130,5 @@ LANG_MAP: Dict[str, str] = {
     "guj": "guj",
     "assamese": "asm",
     "asm": "asm",
-    "hinglish": "hin", # Approximated via Hindi
+    "hinglish": "hin", # Hindi model; Latin script runs of code-mixed text are read as English
 }
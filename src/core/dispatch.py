@@ -0,0 +1,285 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from collections import Counter
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from src.core.broker import Broker
+from src.core.config import settings, LANG_MAP
+from src.core.metrics import STAGE_SECONDS
+from src.core.tracing import request_id_var
+from src.core.tts_engine import synthesize_batch_job
+from src.core.workers import InferencePool
+
+logger = logging.getLogger(__name__)
+
+# Broker names: each worker has its own job queue, each frontend its own result channel
+JOBS_QUEUE = "jobs:{}"
+RESULTS_CHANNEL = "results:{}"
+
+# The only functions jobs can name: messages are data, never code
+JOB_TYPES = {"synthesize_batch": synthesize_batch_job}
+
+
+def node_id() -> str:
+    return settings.NODE_ID or f"{socket.gethostname()}-{os.getpid()}"
+
+
+def encode_job(job_id: str, reply_to: str, job_type: str, texts: List[str], lang_code: str, speed: float,
+               request_id: str = None) -> bytes:
+    return json.dumps({
+        "id": job_id,
+        "reply_to": reply_to,
+        "type": job_type,
+        "texts": [str(text) for text in texts],
+        "lang_code": lang_code,
+        "speed": float(speed),
+        "request_id": request_id,
+    }).encode("utf-8")
+
+
+def decode_job(message: bytes) -> dict:
+    """Parses and validates a job message; raises ValueError if it doesn't match the schema."""
+    job = json.loads(message)
+    if not isinstance(job, dict):
+        raise ValueError("Job is not an object")
+    for field in ("id", "reply_to", "lang_code"):
+        if not isinstance(job.get(field), str):
+            raise ValueError(f"Job field {field} must be a string")
+    if job.get("type") not in JOB_TYPES:
+        raise ValueError(f"Unknown job type: {job.get('type')!r}")
+    texts = job.get("texts")
+    if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+        raise ValueError("Job texts must be a list of strings")
+    if isinstance(job.get("speed"), bool) or not isinstance(job.get("speed"), (int, float)):
+        raise ValueError("Job speed must be a number")
+    if job.get("request_id") is not None and not isinstance(job["request_id"], str):
+        raise ValueError("Job request_id must be a string")
+    return job
+
+
+def encode_result(job_id: str, results: Optional[List[Tuple[np.ndarray, int]]], error: str = None) -> bytes:
+    """JSON header line, then the float32 samples of every waveform back to back."""
+    waveforms = [np.ascontiguousarray(waveform, dtype=np.float32) for waveform, _ in results or ()]
+    header = {
+        "id": job_id,
+        "error": error,
+        "audio": None if results is None else [[len(w), int(sr)] for w, (_, sr) in zip(waveforms, results)],
+    }
+    return json.dumps(header).encode("utf-8") + b"\n" + b"".join(w.tobytes() for w in waveforms)
+
+
+def decode_result(message: bytes) -> Tuple[str, Optional[List[Tuple[np.ndarray, int]]], Optional[str]]:
+    """(job_id, [(waveform, sampling_rate)] or None, error); raises ValueError on a malformed message."""
+    header, _, payload = message.partition(b"\n")
+    header = json.loads(header)
+    if not isinstance(header, dict) or not isinstance(header.get("id"), str):
+        raise ValueError("Result has no job id")
+    if header.get("error") is not None:
+        return header["id"], None, str(header["error"])
+    audio = header.get("audio")
+    if not isinstance(audio, list):
+        raise ValueError("Result has no audio")
+    samples = np.frombuffer(payload, dtype=np.float32)
+    results = []
+    offset = 0
+    for length, sr in audio:
+        results.append((samples[offset:offset + int(length)], int(sr)))
+        offset += int(length)
+    if offset != len(samples):
+        raise ValueError(f"Result has {len(samples)} samples, header says {offset}")
+    return header["id"], results, None
+
+
+class RemoteInferencePool(InferencePool):
+    """
+    Frontend pool that hands synthesis batches to worker nodes over the broker.
+
+    Workers heartbeat the languages they hold warm and their load. A batch goes
+    to the least loaded worker that already has its language warm, or the
+    least loaded worker overall when none does. Admission limits still apply
+    on the frontend. Only batch synthesis jobs fn(texts, lang_code, speed) are
+    dispatched.
+    """
+
+    def __init__(self, broker: Broker, node: str, queue_limit: int, per_client_limit: int, timeout: float):
+        super().__init__(workers=1, torch_threads=1, queue_limit=queue_limit, per_client_limit=per_client_limit)
+        self.broker = broker
+        self.node = node
+        self.timeout = timeout
+        self.pending = {} # {job_id: Future}
+        self.assigned = Counter() # {worker: jobs sent and not answered yet}
+        self.routes = Counter() # {"warm" | "cold": jobs}
+        self.listener = None
+        self.start_lock = asyncio.Lock()
+
+    async def start(self):
+        """Subscribes to this node's result channel."""
+        async with self.start_lock:
+            if self.listener is None:
+                messages = await self.broker.subscribe(RESULTS_CHANNEL.format(self.node))
+                self.listener = asyncio.ensure_future(self._listen(messages))
+
+    async def _listen(self, messages):
+        async for message in messages:
+            try:
+                job_id, result, error = decode_result(message)
+            except (ValueError, TypeError) as e:
+                # A bad message must not stop the listener, or every later job times out
+                logger.error("Dropping malformed job result: %s", e)
+                continue
+            future = self.pending.pop(job_id, None)
+            if future is None or future.done():
+                continue
+            if error is not None:
+                future.set_exception(RuntimeError(error))
+            else:
+                future.set_result(result)
+
+    async def prepare(self, lang_code: str):
+        # Workers load their own models
+        return None
+
+    async def choose_worker(self, lang_code: str) -> str:
+        workers = {n: info for n, info in (await self.broker.nodes()).items() if info.get("role") == "worker"}
+        if not workers:
+            raise RuntimeError("No inference workers available")
+
+        def load(name):
+            info = workers[name]
+            return (info["load"] + self.assigned[name]) / max(1, info["capacity"])
+
+        warm = [name for name, info in workers.items() if lang_code in info["langs"]]
+        self.routes["warm" if warm else "cold"] += 1
+        return min(warm or workers, key=load)
+
+    async def run(self, fn, texts, lang_code, speed):
+        """Runs fn(texts, lang_code, speed) on a worker node. fn must be one of JOB_TYPES."""
+        job_type = next((name for name, job_fn in JOB_TYPES.items() if job_fn is fn), None)
+        if job_type is None:
+            raise ValueError(f"{fn!r} can't be dispatched to worker nodes")
+        await self.start()
+        enqueued = time.monotonic()
+        worker = await self.choose_worker(lang_code)
+        job_id = uuid.uuid4().hex
+        future = asyncio.get_running_loop().create_future()
+        self.pending[job_id] = future
+        with self.lock:
+            self.queued += 1
+            self.assigned[worker] += 1
+        try:
+            job = encode_job(job_id, self.node, job_type, texts, lang_code, speed, request_id_var.get())
+            await self.broker.push(JOBS_QUEUE.format(worker), job)
+            try:
+                return await asyncio.wait_for(future, self.timeout)
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"No result from worker {worker} after {self.timeout:.0f}s")
+        finally:
+            self.pending.pop(job_id, None)
+            with self.lock:
+                self.queued -= 1
+                self.assigned[worker] -= 1
+                if self.assigned[worker] <= 0:
+                    del self.assigned[worker]
+            STAGE_SECONDS.observe(time.monotonic() - enqueued, stage="dispatch")
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        with self.lock:
+            stats["assigned"] = dict(self.assigned)
+        stats["routes"] = dict(self.routes)
+        return stats
+
+
+class JobWorker:
+    """
+    Worker node side: runs the jobs queued for this node on its local
+    inference pool and heartbeats which languages it holds warm.
+    """
+
+    def __init__(self, broker: Broker, node: str, pool: InferencePool, engine, heartbeat: float):
+        self.broker = broker
+        self.node = node
+        self.pool = pool
+        self.engine = engine
+        self.heartbeat_interval = heartbeat
+        # Enough jobs in hand that the pool's workers never idle between them
+        self.slots = asyncio.Semaphore(max(1, pool.workers * 2))
+        self.active = 0
+        # Worker processes' engines aren't visible here, but they pin the PRELOAD_LANGS
+        self.pinned = set()
+        if settings.SERVING_MODE == "process":
+            self.pinned = {LANG_MAP.get(lang.lower(), lang) for lang in settings.PRELOAD_LANGS}
+        self.tasks = set()
+
+    def info(self) -> dict:
+        # Only languages actually loaded (or loading), so evicted ones stop attracting jobs
+        models = self.engine.stats()
+        queue = self.pool.stats()
+        return {
+            "node_id": self.node,
+            "role": "worker",
+            "langs": sorted(set(models["models"]) | set(models["loading"]) | self.pinned),
+            "load": queue["queued_jobs"] + queue["running_jobs"] + self.active,
+            "capacity": self.pool.workers,
+        }
+
+    async def _heartbeats(self):
+        while True:
+            try:
+                await self.broker.heartbeat(self.node, self.info(), ttl=self.heartbeat_interval * 3)
+            except Exception as e:
+                logger.warning("Heartbeat failed: %s", e)
+            await asyncio.sleep(self.heartbeat_interval)
+
+    async def run(self):
+        logger.info("Worker %s taking jobs", self.node)
+        heartbeats = asyncio.ensure_future(self._heartbeats())
+        try:
+            while True:
+                await self.slots.acquire()
+                try:
+                    message = await self.broker.pop(JOBS_QUEUE.format(self.node), timeout=1.0)
+                except Exception as e:
+                    logger.warning("Job queue unavailable: %s", e)
+                    message = None
+                    await asyncio.sleep(1.0)
+                if message is None:
+                    self.slots.release()
+                    continue
+                try:
+                    job = decode_job(message)
+                except (ValueError, TypeError) as e:
+                    logger.error("Dropping malformed job: %s", e)
+                    self.slots.release()
+                    continue
+                task = asyncio.ensure_future(self._handle(job))
+                self.tasks.add(task)
+                task.add_done_callback(self._done)
+        finally:
+            heartbeats.cancel()
+
+    def _done(self, task):
+        self.tasks.discard(task)
+        self.slots.release()
+
+    async def _handle(self, job):
+        request_id_var.set(job["request_id"] or "-")
+        lang_code = job["lang_code"]
+        self.active += 1
+        try:
+            await self.pool.prepare(lang_code)
+            result = await self.pool.run(JOB_TYPES[job["type"]], job["texts"], lang_code, job["speed"])
+            message = encode_result(job["id"], result)
+        except Exception as e:
+            logger.error("Job %s failed: %s", job["id"], e)
+            message = encode_result(job["id"], None, f"{type(e).__name__}: {e}")
+        finally:
+            self.active -= 1
+        await self.broker.publish(RESULTS_CHANNEL.format(job["reply_to"]), message)
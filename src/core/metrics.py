@@ -0,0 +1,176 @@
+import bisect
+import threading
+from typing import Dict, Tuple
+
+# Seconds; covers sub-millisecond encoding up to multi-second model loads
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def _samples(self):
+        with self.lock:
+            items = list(self.values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values = {}
+
+    def set(self, value: float, **labels):
+        with self.lock:
+            self.values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def _samples(self):
+        with self.lock:
+            items = list(self.values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.values = {} # {label key: [bucket counts..., sum, count]}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def _samples(self):
+        with self.lock:
+            items = [(key, list(state)) for key, state in self.values.items()]
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', '+Inf')])} {state[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {state[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {state[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
+
+
+registry = Registry()
+
+# --- Pipeline metrics ---
+STAGE_SECONDS = registry.register(Histogram(
+    "tts_stage_seconds",
+    "Time spent per synthesis pipeline stage "
+    "(queue_wait, translation, model_load, tokenize, inference, encode, emit).",
+    ("stage",),
+))
+MODEL_CACHE_EVENTS = registry.register(Counter(
+    "tts_model_cache_events_total",
+    "Model cache lookups and evictions per language (result=hit|miss|eviction).",
+    ("lang", "result"),
+))
+REAL_TIME_FACTOR = registry.register(Gauge(
+    "tts_real_time_factor",
+    "Inference seconds per second of audio for the most recent batch.",
+    ("lang",),
+))
+BUCKET_REAL_TIME_FACTOR = registry.register(Histogram(
+    "tts_bucket_real_time_factor",
+    "Inference seconds per second of audio per input length bucket "
+    "(TORCH_LENGTH_BUCKETS tokens; inf = longer than all buckets).",
+    ("bucket",),
+    buckets=(0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0),
+))
+BATCH_SIZE = registry.register(Histogram(
+    "tts_batch_size",
+    "Texts per VITS forward pass.",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+))
+AUDIO_SECONDS = registry.register(Counter(
+    "tts_audio_seconds_total",
+    "Seconds of audio synthesized per language.",
+    ("lang",),
+))
+ACTIVE_SOCKET_SESSIONS = registry.register(Gauge(
+    "tts_active_socket_sessions",
+    "Connected Socket.IO sessions per namespace.",
+    ("namespace",),
+))
+FIRST_AUDIO_SECONDS = registry.register(Histogram(
+    "tts_first_audio_seconds",
+    "Time from a socket request (or the first text delta of an incremental session) to its first audio sent.",
+    ("entrypoint",),
+))
+REQUESTS = registry.register(Counter(
+    "tts_requests_total",
+    "Synthesis requests by entry point and outcome.",
+    ("entrypoint", "outcome"),
+))
@@ -0,0 +1,248 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import shutil
+import struct
+import time
+from typing import Dict, Optional
+
+import torch
+from transformers import AutoTokenizer, VitsConfig, VitsModel
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+WEIGHTS_FILE = "model.safetensors"
+MANIFEST_FILE = "manifest.json"
+# Bumped when the snapshot layout changes; older entries are re-exported
+SNAPSHOT_FORMAT = 1
+
+# safetensors dtype names -> torch dtypes
+_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+# MODEL_STORE_DTYPE values; floating point weights are stored converted
+STORE_DTYPES = {
+    "float32": torch.float32,
+    "float16": torch.float16,
+    "bfloat16": torch.bfloat16,
+}
+
+
+class SnapshotError(Exception):
+    """Raised when a model store entry is missing, stale or corrupt."""
+
+
+def model_dir(lang_code: str, root: str = None) -> str:
+    return os.path.join(root or settings.MODEL_STORE_DIR, f"mms-tts-{lang_code}")
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_snapshot(path: str, model, tokenizer, model_id: str, dtype: str = None) -> str:
+    """
+    Writes a loaded (model, tokenizer) pair as a snapshot: config, tokenizer
+    vocab, safetensors weights already in their final dtype and contiguous,
+    and a manifest with the size and sha256 of every file. The directory is
+    populated under a temporary name and renamed into place, so readers
+    never see a partial snapshot.
+    """
+    from safetensors.torch import save_file
+
+    dtype = dtype or settings.MODEL_STORE_DTYPE
+    if dtype not in STORE_DTYPES:
+        raise ValueError(f"Unsupported model store dtype: {dtype}")
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    model.config.save_pretrained(tmp_path)
+    tokenizer.save_pretrained(tmp_path)
+    state = {}
+    for name, tensor in model.state_dict().items():
+        tensor = tensor.detach().cpu()
+        if tensor.is_floating_point():
+            tensor = tensor.to(STORE_DTYPES[dtype])
+        state[name] = tensor.contiguous()
+    save_file(state, os.path.join(tmp_path, WEIGHTS_FILE), metadata={"revision": settings.MODEL_REVISION})
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "model_id": model_id,
+        "revision": settings.MODEL_REVISION,
+        "dtype": dtype,
+        "created": time.time(),
+        # Arguments to rebuild the tokenizer directly instead of resolving it with AutoTokenizer
+        "tokenizer": {
+            "class": type(tokenizer).__name__,
+            "vocab_file": "vocab.json",
+            "kwargs": {k: v for k, v in tokenizer.init_kwargs.items()
+                       if isinstance(v, (str, int, float, bool, type(None)))},
+        },
+        "files": {
+            name: {"bytes": os.path.getsize(os.path.join(tmp_path, name)), "sha256": _sha256(os.path.join(tmp_path, name))}
+            for name in sorted(os.listdir(tmp_path))
+        },
+    }
+    with open(os.path.join(tmp_path, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+    return path
+
+
+def export_model(lang_code: str, root: str = None) -> str:
+    """Downloads facebook/mms-tts-{lang_code} and writes it to the local store as a snapshot."""
+    model_id = f"facebook/mms-tts-{lang_code}"
+    tokenizer = AutoTokenizer.from_pretrained(model_id, revision=settings.MODEL_REVISION)
+    model = VitsModel.from_pretrained(model_id, revision=settings.MODEL_REVISION)
+    return write_snapshot(model_dir(lang_code, root), model, tokenizer, model_id)
+
+
+def check_snapshot(path: str, verify_hashes: bool = False) -> dict:
+    """
+    Returns the manifest of the snapshot at path, raising SnapshotError if
+    it's missing, from another format, revision or dtype than configured,
+    or a file's size (or, with verify_hashes, sha256) doesn't match.
+    """
+    try:
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise SnapshotError(f"No valid manifest in {path}: {e}")
+    for key, expected in (("format", SNAPSHOT_FORMAT), ("revision", settings.MODEL_REVISION),
+                          ("dtype", settings.MODEL_STORE_DTYPE)):
+        if manifest.get(key) != expected:
+            raise SnapshotError(f"Snapshot {path} has {key} {manifest.get(key)!r}, expected {expected!r}")
+    for name, info in manifest.get("files", {}).items():
+        file_path = os.path.join(path, name)
+        if not os.path.exists(file_path) or os.path.getsize(file_path) != info["bytes"]:
+            raise SnapshotError(f"Snapshot file {file_path} is missing or truncated")
+        if verify_hashes and _sha256(file_path) != info["sha256"]:
+            raise SnapshotError(f"Snapshot file {file_path} failed its sha256 check")
+    return manifest
+
+
+def baked_snapshot(lang_code: str) -> Optional[str]:
+    """Path of an up-to-date snapshot of lang_code in MODEL_STORE_BAKED_DIR, if there is one."""
+    if not settings.MODEL_STORE_BAKED_DIR:
+        return None
+    path = model_dir(lang_code, settings.MODEL_STORE_BAKED_DIR)
+    try:
+        check_snapshot(path)
+    except SnapshotError as e:
+        if os.path.exists(path):
+            logger.warning("Ignoring baked snapshot: %s", e)
+        return None
+    return path
+
+
+def ensure_exported(lang_code: str, root: str = None) -> str:
+    """
+    Returns the store path for lang_code: its baked snapshot, or else the one
+    in root (MODEL_STORE_DIR), exporting it first (once across processes) if
+    there is none or it is stale or truncated.
+    """
+    if root is None:
+        baked = baked_snapshot(lang_code)
+        if baked is not None:
+            return baked
+    path = model_dir(lang_code, root)
+    try:
+        check_snapshot(path)
+        return path
+    except SnapshotError:
+        pass
+
+    import fcntl
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        # Another process may have exported it while we waited for the lock
+        try:
+            check_snapshot(path)
+        except SnapshotError as e:
+            logger.info("Exporting %s to model store at %s (%s)...", lang_code, path, e)
+            export_model(lang_code, root)
+    return path
+
+
+def mmap_safetensors(path: str) -> Dict[str, torch.Tensor]:
+    """
+    Maps a safetensors file and returns tensors that point directly into the
+    mapping (no copy, no read into process memory). The mapping is private
+    copy-on-write, so every process mapping the same file shares its page
+    cache pages as long as the weights are only read.
+    """
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    (header_len,) = struct.unpack_from("<Q", mm, 0)
+    header = json.loads(mm[8:8 + header_len])
+    base = 8 + header_len
+
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = _DTYPES[info["dtype"]]
+        start, end = info["data_offsets"]
+        if end == start:
+            tensors[name] = torch.empty(info["shape"], dtype=dtype)
+            continue
+        count = (end - start) // torch.empty((), dtype=dtype).element_size()
+        tensors[name] = torch.frombuffer(mm, dtype=dtype, count=count, offset=base + start).view(info["shape"])
+    return tensors
+
+
+def load_tokenizer(path: str, manifest: dict):
+    spec = manifest.get("tokenizer") or {}
+    if spec.get("class") == "VitsTokenizer":
+        from transformers import VitsTokenizer
+        return VitsTokenizer(os.path.join(path, spec["vocab_file"]), **spec["kwargs"])
+    return AutoTokenizer.from_pretrained(path)
+
+
+def load_model(path: str, device: str = "cpu", verify_hashes: bool = None):
+    """
+    Loads a (model, tokenizer) pair from the store. The model skeleton is
+    built on the meta device (no weight initialization) and the mmap-backed
+    tensors are assigned in place of its parameters, in the dtype they were
+    stored in. Sizes are checked on every load, sha256 with MODEL_STORE_VERIFY.
+    """
+    verify_hashes = settings.MODEL_STORE_VERIFY if verify_hashes is None else verify_hashes
+    manifest = check_snapshot(path, verify_hashes)
+    if device == "cpu" and manifest["dtype"] != "float32":
+        # CPU kernels mostly lack fast half-precision paths, and the audio comes out in that dtype too
+        logger.warning("Loading %s weights on CPU: inference is usually slower and less accurate than "
+                       "float32 (MODEL_STORE_DTYPE=float32 is recommended on CPU)", manifest["dtype"])
+    tokenizer = load_tokenizer(path, manifest)
+    config = VitsConfig.from_pretrained(path)
+    with torch.device("meta"):
+        model = VitsModel(config)
+    model.load_state_dict(mmap_safetensors(os.path.join(path, WEIGHTS_FILE)), assign=True)
+
+    missing = [name for name, t in list(model.named_parameters()) + list(model.named_buffers()) if t.is_meta]
+    if missing:
+        raise SnapshotError(f"Model store entry {path} is missing tensors: {missing[:5]}")
+
+    model.eval()
+    if device != "cpu":
+        model.to(device)
+    return model, tokenizer
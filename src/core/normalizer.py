@@ -0,0 +1,542 @@
+import re
+from functools import lru_cache
+
+from src.core.config import settings
+
+# --- Number words ---
+
+ENG_ONES = [
+    "zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten",
+    "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen", "seventeen", "eighteen", "nineteen",
+]
+ENG_TENS = ["", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety"]
+ENG_SCALES = [(10**12, "trillion"), (10**9, "billion"), (10**6, "million"), (1000, "thousand")]
+ENG_ORDINALS = {
+    "one": "first", "two": "second", "three": "third", "five": "fifth",
+    "eight": "eighth", "nine": "ninth", "twelve": "twelfth",
+}
+
+FRA_ONES = [
+    "zéro", "un", "deux", "trois", "quatre", "cinq", "six", "sept", "huit", "neuf", "dix",
+    "onze", "douze", "treize", "quatorze", "quinze", "seize",
+]
+FRA_TENS = {2: "vingt", 3: "trente", 4: "quarante", 5: "cinquante", 6: "soixante"}
+
+HIN_BELOW_100 = (
+    "शून्य एक दो तीन चार पाँच छह सात आठ नौ "
+    "दस ग्यारह बारह तेरह चौदह पंद्रह सोलह सत्रह अठारह उन्नीस "
+    "बीस इक्कीस बाईस तेईस चौबीस पच्चीस छब्बीस सत्ताईस अट्ठाईस उनतीस "
+    "तीस इकतीस बत्तीस तैंतीस चौंतीस पैंतीस छत्तीस सैंतीस अड़तीस उनतालीस "
+    "चालीस इकतालीस बयालीस तैंतालीस चवालीस पैंतालीस छियालीस सैंतालीस अड़तालीस उनचास "
+    "पचास इक्यावन बावन तिरेपन चौवन पचपन छप्पन सत्तावन अट्ठावन उनसठ "
+    "साठ इकसठ बासठ तिरसठ चौंसठ पैंसठ छियासठ सड़सठ अड़सठ उनहत्तर "
+    "सत्तर इकहत्तर बहत्तर तिहत्तर चौहत्तर पचहत्तर छिहत्तर सतहत्तर अठहत्तर उन्यासी "
+    "अस्सी इक्यासी बयासी तिरासी चौरासी पचासी छियासी सत्तासी अट्ठासी नवासी "
+    "नब्बे इक्यानबे बानबे तिरानबे चौरानबे पंचानबे छियानबे सत्तानबे अट्ठानबे निन्यानबे"
+).split()
+# Indian numbering: lakh = 10^5, crore = 10^7
+HIN_SCALES = [(10**9, "अरब"), (10**7, "करोड़"), (10**5, "लाख"), (1000, "हज़ार"), (100, "सौ")]
+
+# Languages without full number rules read numbers digit by digit
+DIGIT_WORDS = {
+    "tel": "సున్నా ఒకటి రెండు మూడు నాలుగు ఐదు ఆరు ఏడు ఎనిమిది తొమ్మిది".split(),
+    "tam": "பூஜ்ஜியம் ஒன்று இரண்டு மூன்று நான்கு ஐந்து ஆறு ஏழு எட்டு ஒன்பது".split(),
+    "mal": "പൂജ്യം ഒന്ന് രണ്ട് മൂന്ന് നാല് അഞ്ച് ആറ് ഏഴ് എട്ട് ഒമ്പത്".split(),
+    "kan": "ಸೊನ್ನೆ ಒಂದು ಎರಡು ಮೂರು ನಾಲ್ಕು ಐದು ಆರು ಏಳು ಎಂಟು ಒಂಬತ್ತು".split(),
+    "pan": "ਸਿਫ਼ਰ ਇੱਕ ਦੋ ਤਿੰਨ ਚਾਰ ਪੰਜ ਛੇ ਸੱਤ ਅੱਠ ਨੌਂ".split(),
+    "guj": "શૂન્ય એક બે ત્રણ ચાર પાંચ છ સાત આઠ નવ".split(),
+    "asm": "শূন্য এক দুই তিনি চাৰি পাঁচ ছয় সাত আঠ ন".split(),
+    "san": "शून्यम् एकम् द्वे त्रीणि चत्वारि पञ्च षट् सप्त अष्ट नव".split(),
+}
+
+# Decimal (and other dot) separators read between digit groups in those languages; a bare
+# "." would be taken as a sentence end by the chunker
+DIGIT_POINT = {
+    "tel": "దశాంశం", "tam": "புள்ளி", "mal": "ദശാംശം", "kan": "ದಶಮಾಂಶ",
+    "pan": "ਦਸ਼ਮਲਵ", "guj": "દશાંશ", "asm": "দশমিক", "san": "दशमलव",
+}
+
+# Above this, numbers are read digit by digit (card numbers, IDs)
+MAX_SPOKEN = 10**15
+
+
+def eng_number(n: int) -> str:
+    if n < 20:
+        return ENG_ONES[n]
+    if n < 100:
+        tens, unit = divmod(n, 10)
+        return ENG_TENS[tens] + ("-" + ENG_ONES[unit] if unit else "")
+    if n < 1000:
+        hundreds, rest = divmod(n, 100)
+        return ENG_ONES[hundreds] + " hundred" + (" " + eng_number(rest) if rest else "")
+    for value, word in ENG_SCALES:
+        if n >= value:
+            head, rest = divmod(n, value)
+            return eng_number(head) + " " + word + (" " + eng_number(rest) if rest else "")
+
+
+def eng_ordinal(n: int) -> str:
+    words = eng_number(n)
+    head, sep, last = words.rpartition("-") if "-" in words.split(" ")[-1] else words.rpartition(" ")
+    if last in ENG_ORDINALS:
+        last = ENG_ORDINALS[last]
+    elif last.endswith("y"):
+        last = last[:-1] + "ieth"
+    else:
+        last += "th"
+    return head + sep + last
+
+
+def eng_year(n: int) -> str:
+    if 2000 <= n < 2010 or n < 1000 or n >= 10000:
+        return eng_number(n)
+    century, rest = divmod(n, 100)
+    if rest == 0:
+        return eng_number(century) + " hundred"
+    return eng_number(century) + (" oh " if rest < 10 else " ") + eng_number(rest)
+
+
+def eng_decade(n: int) -> str:
+    """1990 -> nineteen nineties, 80 -> eighties."""
+    words = eng_year(n)
+    return words[:-1] + "ies" if words.endswith("y") else words + "s"
+
+
+def fra_below_100(n: int) -> str:
+    if n <= 16:
+        return FRA_ONES[n]
+    if n < 20:
+        return "dix-" + FRA_ONES[n - 10]
+    tens, unit = divmod(n, 10)
+    if tens in (7, 9):
+        # 70-79 = soixante-dix..., 90-99 = quatre-vingt-dix...
+        base = "soixante" if tens == 7 else "quatre-vingt"
+        rest = n - (60 if tens == 7 else 80)
+        return base + ("-et-" if rest == 11 and tens == 7 else "-") + fra_below_100(rest)
+    if tens == 8:
+        return "quatre-vingts" if unit == 0 else "quatre-vingt-" + FRA_ONES[unit]
+    if unit == 0:
+        return FRA_TENS[tens]
+    return FRA_TENS[tens] + ("-et-un" if unit == 1 else "-" + FRA_ONES[unit])
+
+
+def fra_number(n: int) -> str:
+    if n < 100:
+        return fra_below_100(n)
+    if n < 1000:
+        hundreds, rest = divmod(n, 100)
+        head = "cent" if hundreds == 1 else FRA_ONES[hundreds] + (" cents" if rest == 0 else " cent")
+        return head + (" " + fra_below_100(rest) if rest else "")
+    if n < 10**6:
+        thousands, rest = divmod(n, 1000)
+        head = "mille" if thousands == 1 else fra_number(thousands) + " mille"
+        return head + (" " + fra_number(rest) if rest else "")
+    for value, word in [(10**9, "milliard"), (10**6, "million")]:
+        if n >= value:
+            head, rest = divmod(n, value)
+            return fra_number(head) + " " + word + ("s" if head > 1 else "") + (" " + fra_number(rest) if rest else "")
+
+
+def hin_number(n: int) -> str:
+    if n < 100:
+        return HIN_BELOW_100[n]
+    parts = []
+    for value, word in HIN_SCALES:
+        if n >= value:
+            head, n = divmod(n, value)
+            parts.append(hin_number(head) + " " + word)
+    if n:
+        parts.append(HIN_BELOW_100[n])
+    return " ".join(parts)
+
+
+# --- Per-language rule tables ---
+
+RULES = {
+    "eng": {
+        "number": eng_number,
+        "ordinal": eng_ordinal,
+        "year": eng_year,
+        "decade": eng_decade,
+        # A bare 1100-2099 after one of these (or a month) is a year: "in 1990", "May 2024"
+        "year_cues": {"in", "since", "from", "by", "until", "till", "of", "year", "before", "after", "around",
+                      "circa", "during", "early", "late", "mid", "spring", "summer", "autumn", "fall", "winter"},
+        "ordinal_suffix": r"st|nd|rd|th",
+        "thousands": ",",
+        "thousands_group": r"\d{3}",
+        "decimal": ".",
+        "point": "point",
+        "version_point": "point",
+        "range": "to",
+        "minus": "minus",
+        "and": "and",
+        "url": {".": "dot", "/": "slash", "@": "at", "-": "dash", "_": "underscore", ":": "colon"},
+        "months": "January February March April May June July August September October November December".split(),
+        "date": lambda day, month, year, r: f"{month} {r['ordinal'](day)}, {r['year'](year)}",
+        "month_first": True, # 05/17/2024
+        "time": lambda h, m, r: r["number"](h) + (" o'clock" if m == 0 else (" oh " if m < 10 else " ") + r["number"](m)),
+        "currency": {
+            "$": ("dollar", "dollars", "cent", "cents"),
+            "€": ("euro", "euros", "cent", "cents"),
+            "£": ("pound", "pounds", "penny", "pence"),
+            "₹": ("rupee", "rupees", "paisa", "paise"),
+        },
+        "units": {
+            "km/h": ("kilometre per hour", "kilometres per hour"),
+            "mph": ("mile per hour", "miles per hour"),
+            "km": ("kilometre", "kilometres"), "cm": ("centimetre", "centimetres"),
+            "mm": ("millimetre", "millimetres"), "m": ("metre", "metres"),
+            "kg": ("kilogram", "kilograms"), "mg": ("milligram", "milligrams"), "g": ("gram", "grams"),
+            "ml": ("millilitre", "millilitres"), "l": ("litre", "litres"),
+            "GB": ("gigabyte", "gigabytes"), "MB": ("megabyte", "megabytes"),
+            "min": ("minute", "minutes"),
+            "°C": ("degree Celsius", "degrees Celsius"), "°F": ("degree Fahrenheit", "degrees Fahrenheit"),
+            "°": ("degree", "degrees"), "%": ("percent", "percent"),
+        },
+        "symbols": {
+            "+": "plus", "=": "equals", "×": "times", "*": "times", "÷": "divided by", "/": "divided by",
+            "−": "minus", "²": "squared", "³": "cubed", "^2": "squared", "^3": "cubed", "^": "to the power of",
+            "√": "square root of", "π": "pie", "∫": "integral", "≈": "approximately", "≠": "is not equal to",
+        },
+    },
+    "fra": {
+        "number": fra_number,
+        "ordinal": lambda n: "premier" if n == 1 else (lambda w: (w[:-1] if w.endswith("e") else w) + "ième")(fra_number(n)),
+        "year": fra_number,
+        "decade": None, # les années 80
+        "year_cues": set(),
+        "ordinal_suffix": r"er|re|ème|e",
+        "thousands": " ",
+        "thousands_group": r"\d{3}",
+        "decimal": ",",
+        "point": "virgule",
+        "version_point": "point",
+        "range": "à",
+        "minus": "moins",
+        "and": "et",
+        "url": {".": "point", "/": "slash", "@": "arobase", "-": "tiret", "_": "tiret bas", ":": "deux-points"},
+        "months": "janvier février mars avril mai juin juillet août septembre octobre novembre décembre".split(),
+        "date": lambda day, month, year, r: f"{'premier' if day == 1 else r['number'](day)} {month} {r['year'](year)}",
+        "month_first": False,
+        "time": lambda h, m, r: r["number"](h) + (" heure" if h == 1 else " heures") + (" " + r["number"](m) if m else ""),
+        "currency": {
+            "$": ("dollar", "dollars", "cent", "cents"),
+            "€": ("euro", "euros", "centime", "centimes"),
+            "£": ("livre", "livres", "penny", "pence"),
+            "₹": ("roupie", "roupies", "paisa", "paise"),
+        },
+        "units": {
+            "km/h": ("kilomètre par heure", "kilomètres par heure"),
+            "km": ("kilomètre", "kilomètres"), "cm": ("centimètre", "centimètres"),
+            "mm": ("millimètre", "millimètres"), "m": ("mètre", "mètres"),
+            "kg": ("kilogramme", "kilogrammes"), "mg": ("milligramme", "milligrammes"), "g": ("gramme", "grammes"),
+            "ml": ("millilitre", "millilitres"), "l": ("litre", "litres"),
+            "Go": ("gigaoctet", "gigaoctets"), "Mo": ("mégaoctet", "mégaoctets"),
+            "min": ("minute", "minutes"),
+            "°C": ("degré Celsius", "degrés Celsius"), "°F": ("degré Fahrenheit", "degrés Fahrenheit"),
+            "°": ("degré", "degrés"), "%": ("pour cent", "pour cent"),
+        },
+        "symbols": {
+            "+": "plus", "=": "égale", "×": "fois", "*": "fois", "÷": "divisé par", "/": "divisé par",
+            "−": "moins", "²": "au carré", "³": "au cube", "^2": "au carré", "^3": "au cube", "^": "puissance",
+            "√": "racine carrée de", "π": "pi", "∫": "intégrale", "≈": "environ", "≠": "différent de",
+        },
+    },
+    "hin": {
+        "number": hin_number,
+        "ordinal": hin_number,
+        "year": hin_number,
+        "decade": None,
+        "year_cues": set(),
+        "ordinal_suffix": None,
+        "thousands": ",",
+        "thousands_group": r"\d{2,3}", # Indian grouping: 1,50,000 / 1,00,00,000
+        "decimal": ".",
+        "point": "दशमलव",
+        "version_point": "पॉइंट",
+        "range": "से",
+        "minus": "ऋण",
+        "and": "और",
+        "url": {".": "डॉट", "/": "स्लैश", "@": "एट", "-": "डैश", "_": "अंडरस्कोर", ":": "कोलन"},
+        "months": "जनवरी फ़रवरी मार्च अप्रैल मई जून जुलाई अगस्त सितंबर अक्टूबर नवंबर दिसंबर".split(),
+        "date": lambda day, month, year, r: f"{r['number'](day)} {month} {r['year'](year)}",
+        "month_first": False,
+        "time": lambda h, m, r: r["number"](h) + (" बजे" if m == 0 else " बजकर " + r["number"](m) + " मिनट"),
+        "currency": {
+            "₹": ("रुपया", "रुपये", "पैसा", "पैसे"),
+            "$": ("डॉलर", "डॉलर", "सेंट", "सेंट"),
+            "€": ("यूरो", "यूरो", "सेंट", "सेंट"),
+            "£": ("पाउंड", "पाउंड", "पेंस", "पेंस"),
+        },
+        "units": {
+            "km/h": ("किलोमीटर प्रति घंटा",) * 2,
+            "km": ("किलोमीटर",) * 2, "cm": ("सेंटीमीटर",) * 2, "mm": ("मिलीमीटर",) * 2, "m": ("मीटर",) * 2,
+            "kg": ("किलोग्राम",) * 2, "mg": ("मिलीग्राम",) * 2, "g": ("ग्राम",) * 2,
+            "ml": ("मिलीलीटर",) * 2, "l": ("लीटर",) * 2,
+            "GB": ("गीगाबाइट",) * 2, "MB": ("मेगाबाइट",) * 2,
+            "min": ("मिनट",) * 2,
+            "°C": ("डिग्री सेल्सियस",) * 2, "°F": ("डिग्री फ़ारेनहाइट",) * 2,
+            "°": ("डिग्री",) * 2, "%": ("प्रतिशत",) * 2,
+        },
+        "symbols": {
+            "+": "धन", "=": "बराबर", "×": "गुणा", "*": "गुणा", "÷": "भाग", "/": "भाग",
+            "−": "ऋण", "²": "का वर्ग", "³": "का घन", "^2": "का वर्ग", "^3": "का घन", "^": "की घात",
+            "√": "का वर्गमूल", "π": "पाई", "∫": "समाकलन", "≈": "लगभग", "≠": "बराबर नहीं",
+        },
+    },
+}
+
+
+def _alternation(options):
+    # Longest first so e.g. km/h wins over km
+    return "|".join(re.escape(o) for o in sorted(options, key=len, reverse=True))
+
+
+class Normalizer:
+    """
+    Spells out numbers, dates, times, money, units and math symbols for one
+    language. The rules are compiled once into a single regex whose
+    alternatives are tried in priority order (URLs and e-mails first, then
+    dates, times, money, measurements, ordinals, numbers and symbols), so a
+    text is scanned in one pass.
+    """
+
+    def __init__(self, lang_code: str):
+        self.lang_code = lang_code
+        self.rules = RULES.get(lang_code)
+        self.digits = DIGIT_WORDS.get(lang_code)
+        alternatives, starts = self._build()
+        # Trying every alternative at every character dominates the cost, so a lookahead
+        # on the characters a match can start with skips ordinary words. E-mails can start
+        # with any letter, so texts containing "@" use a second pattern without it.
+        email = r"(?P<email>(?<![\w.+-])[\w.+-]+@[\w-]+(?:\.[\w-]+)+)"
+        self.pattern = re.compile(f"(?=[{starts}])(?:{'|'.join(alternatives)})")
+        self.email_pattern = re.compile("|".join([alternatives[0], email] + alternatives[1:]))
+
+    def _build(self):
+        """Alternatives in priority order, and a character class of what they can start with."""
+        r = self.rules
+        # Trailing sentence punctuation isn't part of the address
+        alternatives = [r"(?P<url>(?:https?://|www\.)\S+?)(?=[.,;:!?)]*(?:\s|$))"]
+        if r is None:
+            # Digit-by-digit reading only; COVID-19 drops the hyphen as in number below
+            alternatives.append(rf"{_WORD_HYPHEN}(?P<digits>\d+(?:\.\d+)*)")
+            return alternatives, r"\dhw\-"
+
+        thousands = re.escape(r["thousands"]) if r["thousands"] != " " else r"[   ]"
+        decimal = re.escape(r["decimal"])
+        # 1,234,567.89, Indian 1,50,000 or French 1 234 567,89. Only the Indian style has
+        # 2-digit groups: with spaces as separators they would merge separate numbers
+        group = r["thousands_group"]
+        number = rf"\d{{1,3}}(?:{thousands}{group})*{thousands}\d{{3}}(?:{decimal}\d+)?(?!\d)|\d+(?:{decimal}\d+)?"
+        # Dotted versions (2.0.1); one dot is enough where "." isn't the decimal separator
+        dots = "{2,}" if r["decimal"] == "." else "+"
+
+        alternatives += [
+            r"(?P<date_iso>(?P<iso_y>\d{4})-(?P<iso_m>\d{1,2})-(?P<iso_d>\d{1,2}))(?!\d)",
+            r"(?P<date_slash>(?P<sl_a>\d{1,2})[/.](?P<sl_b>\d{1,2})[/.](?P<sl_y>\d{4}))(?!\d)",
+            r"(?P<time>(?P<time_h>[01]?\d|2[0-3]):(?P<time_m>[0-5]\d))(?![\d:])",
+            rf"(?P<money>(?P<money_sym>{_alternation(r['currency'])}|Rs\.?\s?|INR\s?)\s?(?P<money_num>{number}))",
+            # 12,50 € as written in French
+            rf"(?P<money_after>(?P<after_num>{number})\s?(?P<after_sym>{_alternation(r['currency'])}))",
+            rf"(?P<measure>(?P<measure_sign>(?<![\w)])[-−])?(?P<measure_num>{number})\s?(?P<measure_unit>{_alternation(r['units'])})(?!\w))",
+            rf"(?P<version>(?<![\w.])(?P<version_v>v)?(?P<version_num>\d+(?:\.\d+){dots}))(?!\w|\.\d)",
+            # 2-3, 10–20, 1990-95 (spaced hyphens are subtractions)
+            r"(?P<range>(?<![\w.,-])(?P<range_a>\d+)(?:-|\s?–\s?)(?P<range_b>\d+))(?![\w.,]\d|[\w-])",
+            # 555-123-4567: more hyphenated groups than a range (phone numbers, IDs)
+            r"(?P<groups>(?<![\w.,-])\d+(?:-\d+){2,})(?![\w.,]\d|[\w-])",
+        ]
+        if r["decade"]:
+            # 1990s, '80s
+            alternatives.append(r"(?P<decade>(?<![\w.,])'?(?P<decade_num>1\d\d0|20\d0|[1-9]0)'?s)(?!\w)")
+        if r["ordinal_suffix"]:
+            alternatives.append(rf"(?P<ordinal>(?P<ordinal_num>\d+)(?:{r['ordinal_suffix']})(?!\w))")
+        alternatives += [
+            # A leading minus only where it can't be a hyphen or an operator,
+            # or a hyphen joining a word to it (COVID-19), which is dropped
+            rf"(?P<number>{_WORD_HYPHEN}(?P<number_sign>(?<![\w)])[-−])?(?P<number_num>{number}))",
+            r"(?P<power>\^\s?(?P<power_exp>\d+))",
+            # Division only between numbers (dates were matched above; URLs and and/or stay)
+            r"(?P<divide>(?:(?<=[\dπ)])|(?<=[\dπ)] ))/(?= ?[\dπ(]))",
+            r"(?P<minus>(?<=[\d)] )[-−](?= [\d(]))",
+            rf"(?P<symbol>{_alternation(s for s in r['symbols'] if s not in ('/', '^', '^2', '^3'))})",
+        ]
+        symbols = "".join(set(key[0] for key in list(r["currency"]) + list(r["symbols"])))
+        return alternatives, r"\dhwRIv'\-−/" + re.escape(symbols)
+
+    # --- Handlers (one per alternative) ---
+
+    def _value(self, text):
+        """(integer part, decimal digits) of a matched number."""
+        r = self.rules
+        whole, _, fraction = text.partition(r["decimal"])
+        return int(_NON_DIGITS.sub("", whole)), fraction
+
+    def _spell(self, text, sign=""):
+        r = self.rules
+        whole, fraction = self._value(text)
+        if whole >= MAX_SPOKEN or (text[0] == "0" and len(text) > 1 and text[1].isdigit()):
+            words = self._digit_by_digit(_NON_DIGITS.sub("", text.partition(r["decimal"])[0]))
+        else:
+            words = r["number"](whole)
+        if fraction:
+            words += " " + r["point"] + " " + self._digit_by_digit(fraction)
+        return (r["minus"] + " " + words) if sign else words
+
+    def _is_year(self, text, m=None):
+        """A bare 1100-2099; in running text (m given) only after a year cue word."""
+        if not _YEAR.fullmatch(text):
+            return False
+        if m is None:
+            return True
+        # Only the text just before the number: scanning from the start is quadratic on long inputs
+        before = _LAST_WORD.search(m.string, max(0, m.start() - _CUE_WINDOW), m.start())
+        return before is not None and (before.group(1).lower() in self.rules["year_cues"]
+                                       or before.group(1).capitalize() in self.rules["months"])
+
+    def _range(self, a, b):
+        """a to b, or None where it doesn't read as a range (555-1234, 5-3)."""
+        r = self.rules
+        if len(a) == 4 and len(b) == 2 and self._is_year(a) and int(b) > int(a) % 100:
+            # 1990-95
+            return r["year"](int(a)) + " " + r["range"] + " " + r["number"](int(b))
+        if int(a) >= int(b) or len(b) > max(len(a), 2):
+            return None
+        if self._is_year(a) and self._is_year(b):
+            return r["year"](int(a)) + " " + r["range"] + " " + r["year"](int(b))
+        return self._spell(a) + " " + r["range"] + " " + self._spell(b)
+
+    def _digit_groups(self, groups, separator):
+        """555-1234 as five five five - one two three four."""
+        return separator.join(self._digit_by_digit(group) for group in groups)
+
+    def _digit_by_digit(self, digits):
+        if self.rules is not None:
+            return " ".join(self.rules["number"](int(d)) for d in digits)
+        return " ".join(self.digits[int(d)] for d in digits)
+
+    def _date(self, day, month, year):
+        r = self.rules
+        if not (1 <= month <= 12 and 1 <= day <= 31):
+            return None
+        return r["date"](day, r["months"][month - 1], year, r)
+
+    def _replace(self, m):
+        kind = m.lastgroup
+        r = self.rules
+        if kind in ("url", "email"):
+            # Read out separators so neither the symbol rules nor the chunker split on them
+            if r is None:
+                return None
+            address = re.sub(r"^https?://", "", m.group(0)).rstrip("/")
+            return _URL_SEPARATORS.sub(lambda s: " " + r["url"][s.group(0)] + " ", address)
+        if kind == "digits":
+            if not self.digits:
+                return None
+            return (" " + DIGIT_POINT[self.lang_code] + " ").join(
+                self._digit_by_digit(group) for group in m.group("digits").split("."))
+
+        words = None
+        if kind == "date_iso":
+            words = self._date(int(m.group("iso_d")), int(m.group("iso_m")), int(m.group("iso_y")))
+        elif kind == "date_slash":
+            a, b = int(m.group("sl_a")), int(m.group("sl_b"))
+            if r["month_first"] and a <= 12:
+                a, b = b, a
+            words = self._date(a, b, int(m.group("sl_y")))
+        elif kind == "time":
+            words = r["time"](int(m.group("time_h")), int(m.group("time_m")), r)
+        elif kind in ("money", "money_after"):
+            before = kind == "money"
+            symbol = m.group("money_sym" if before else "after_sym").strip()
+            symbol = "₹" if symbol.startswith(("Rs", "INR")) else symbol
+            major, majors, minor, minors = r["currency"][symbol]
+            whole, fraction = self._value(m.group("money_num" if before else "after_num"))
+            words = r["number"](whole) + " " + (major if whole == 1 else majors)
+            cents = int((fraction + "00")[:2]) if fraction else 0
+            if cents:
+                words += " " + r["and"] + " " + r["number"](cents) + " " + (minor if cents == 1 else minors)
+        elif kind == "measure":
+            whole, fraction = self._value(m.group("measure_num"))
+            singular, plural = r["units"][m.group("measure_unit")]
+            words = self._spell(m.group("measure_num"), m.group("measure_sign")) + " " + (singular if whole == 1 and not fraction else plural)
+        elif kind == "version":
+            parts = m.group("version_num").split(".")
+            separator = " " + r["version_point"] + " "
+            if any(len(part) > 2 for part in parts[1:]):
+                # 192.168.1.1, 555.123.4567: addresses and phone numbers, not versions
+                words = self._digit_groups(parts, separator)
+            else:
+                words = separator.join(self._spell(part) for part in parts)
+            if m.group("version_v"):
+                words = "v " + words
+        elif kind == "range":
+            a, b = m.group("range_a"), m.group("range_b")
+            words = self._range(a, b) or self._digit_groups((a, b), " - ")
+        elif kind == "groups":
+            words = self._digit_groups(m.group("groups").split("-"), " - ")
+        elif kind == "decade":
+            words = r["decade"](int(m.group("decade_num")))
+        elif kind == "ordinal":
+            words = r["ordinal"](int(m.group("ordinal_num")))
+        elif kind == "number":
+            text = m.group("number_num")
+            if not m.group("number_sign") and self._is_year(text, m):
+                words = r["year"](int(text))
+            else:
+                words = self._spell(text, m.group("number_sign"))
+        elif kind == "power":
+            exponent = m.group("power_exp")
+            words = r["symbols"].get("^" + exponent) or r["symbols"]["^"] + " " + self._spell(exponent)
+        elif kind == "divide":
+            words = r["symbols"]["/"]
+        elif kind == "minus":
+            words = r["minus"]
+        elif kind == "symbol":
+            words = r["symbols"][m.group(0)]
+        return words
+
+    def normalize(self, text: str) -> str:
+        pattern = self.email_pattern if "@" in text else self.pattern
+        previous_end = -1
+
+        def replace(m):
+            # Words are separated from their surroundings here rather than squeezing
+            # spaces in a second pass; a match right after another one is already separated
+            nonlocal previous_end
+            words = self._replace(m)
+            if words is None:
+                return m.group(0)
+            start, end = m.span()
+            if start and start != previous_end and not text[start - 1].isspace() and text[start - 1] not in "([":
+                words = " " + words
+            if end < len(text) and not text[end].isspace() and text[end] not in ",.;:!?)]":
+                words += " "
+            previous_end = end
+            return words
+
+        return pattern.sub(replace, text)
+
+
+# A hyphen right after a letter, consumed (and so dropped) with the digits that follow it
+_WORD_HYPHEN = r"(?:(?<=[^\W\d_])-(?=\d))?"
+_NON_DIGITS = re.compile(r"\D")
+_YEAR = re.compile(r"1[1-9]\d\d|20\d\d")
+_LAST_WORD = re.compile(r"(\w+)[\s,]*$")
+_CUE_WINDOW = 64 # chars before a number searched for a year cue word
+_URL_SEPARATORS = re.compile(r"[./@:_-]")
+
+_normalizers = {}
+
+
+def get_normalizer(lang_code: str) -> Normalizer:
+    normalizer = _normalizers.get(lang_code)
+    if normalizer is None:
+        normalizer = _normalizers[lang_code] = Normalizer(lang_code)
+    return normalizer
+
+
+@lru_cache(maxsize=settings.TEXT_NORMALIZER_CACHE)
+def normalize_text(text: str, lang_code: str) -> str:
+    """Spells out numbers, dates, money, units and math for lang_code. Memoized."""
+    return get_normalizer(lang_code).normalize(text)
@@ -0,0 +1,234 @@
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+import torch
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _VitsExportWrapper(torch.nn.Module):
+    """
+    Exposes VitsModel as (input_ids, attention_mask, speaking_rate) ->
+    (waveform, sequence_lengths) for export.
+    """
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask, speaking_rate):
+        output = self.model(input_ids=input_ids, attention_mask=attention_mask, speaking_rate=speaking_rate)
+        return output.waveform, output.sequence_lengths
+
+
+class OnnxVitsOutput:
+    def __init__(self, waveform, sequence_lengths):
+        self.waveform = waveform
+        self.sequence_lengths = sequence_lengths
+
+
+class OnnxVitsModel:
+    """
+    ONNX Runtime replacement for VitsModel with the same call signature and
+    output fields used by MMSEngine.synthesize_batch (waveform, sequence_lengths, config).
+    """
+
+    def __init__(self, path: str, config, intra_op_threads: int = 0):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        if intra_op_threads > 0:
+            options.intra_op_num_threads = intra_op_threads
+        # Inter-op parallelism is handled by our own inference workers
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.config = config
+        self.path = path
+        # Exports from before speaking_rate was a graph input have it fixed at the config's
+        self.has_speaking_rate = "speaking_rate" in {i.name for i in self.session.get_inputs()}
+
+    def __call__(self, input_ids, attention_mask, speaking_rate: float = None):
+        feed = {
+            "input_ids": input_ids.cpu().numpy().astype(np.int64),
+            "attention_mask": attention_mask.cpu().numpy().astype(np.int64),
+        }
+        if self.has_speaking_rate:
+            speaking_rate = self.config.speaking_rate if speaking_rate is None else speaking_rate
+            feed["speaking_rate"] = np.array(speaking_rate, dtype=np.float32)
+        waveform, lengths = self.session.run(None, feed)
+        return OnnxVitsOutput(torch.from_numpy(waveform), torch.from_numpy(lengths))
+
+
+def export_onnx(model, tokenizer, path: str):
+    """
+    Exports a VitsModel to ONNX with dynamic batch and sequence axes and the
+    speaking rate as a (scalar) input.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    sample = tokenizer(["hello world", "hi"], return_tensors="pt", padding=True)
+    speaking_rate = torch.tensor(float(model.config.speaking_rate))
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with torch.no_grad():
+        torch.onnx.export(
+            _VitsExportWrapper(model).eval(),
+            (sample.input_ids, sample.attention_mask, speaking_rate),
+            tmp_path,
+            input_names=["input_ids", "attention_mask", "speaking_rate"],
+            output_names=["waveform", "sequence_lengths"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "tokens"},
+                "attention_mask": {0: "batch", 1: "tokens"},
+                "waveform": {0: "batch", 1: "samples"},
+                "sequence_lengths": {0: "batch"},
+            },
+            opset_version=17,
+            # VITS has data-dependent output lengths, which the TorchScript exporter handles
+            dynamo=False,
+        )
+    os.replace(tmp_path, path)
+
+
+def quantize_onnx(path: str, quantized_path: str):
+    """Dynamic int8 quantization of the weights (activations stay float)."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    tmp_path = f"{quantized_path}.tmp-{os.getpid()}"
+    quantize_dynamic(path, tmp_path, weight_type=QuantType.QInt8)
+    os.replace(tmp_path, quantized_path)
+
+
+def onnx_path(lang_code: str, quantized: bool = False) -> str:
+    name = "model.int8.onnx" if quantized else "model.onnx"
+    return os.path.join(settings.ONNX_CACHE_DIR, settings.MODEL_REVISION, f"mms-tts-{lang_code}", name)
+
+
+def check_quantization(model, tokenizer, workdir: str) -> dict:
+    """
+    Quantizes a noise-free export of model in workdir and compares it with
+    torch on parity_texts. Returns check_parity's result.
+    """
+    noise = model.noise_scale, model.noise_scale_duration
+    model.noise_scale = model.noise_scale_duration = 0.0
+    try:
+        fp32_path = os.path.join(workdir, "parity.onnx")
+        int8_path = os.path.join(workdir, "parity.int8.onnx")
+        export_onnx(model, tokenizer, fp32_path)
+        quantize_onnx(fp32_path, int8_path)
+        return check_parity(model, OnnxVitsModel(int8_path, model.config), tokenizer, parity_texts(tokenizer))
+    finally:
+        model.noise_scale, model.noise_scale_duration = noise
+
+
+def quantization_parity(lang_code: str, model, tokenizer) -> dict:
+    """check_quantization for lang_code, run once and kept next to its exports."""
+    path = os.path.join(os.path.dirname(onnx_path(lang_code)), "int8_parity.json")
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
+    logger.info("Checking int8 parity of %s with torch...", lang_code)
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(path)) as workdir:
+        parity = check_quantization(model, tokenizer, workdir)
+    with open(path, "w") as f:
+        json.dump(parity, f)
+    return parity
+
+
+def load_onnx_model(lang_code: str, model, tokenizer, quantize: bool = None, intra_op_threads: int = 0):
+    """
+    Returns an OnnxVitsModel for lang_code, exporting (and quantizing) the
+    given torch model on first use. Exports are cached on disk.
+    """
+    quantize = settings.ONNX_QUANTIZE if quantize is None else quantize
+    path = onnx_path(lang_code)
+    if not os.path.exists(path):
+        logger.info("Exporting %s to ONNX at %s...", lang_code, path)
+        export_onnx(model, tokenizer, path)
+    if quantize:
+        parity = quantization_parity(lang_code, model, tokenizer)
+        if parity_ok(parity):
+            quantized_path = onnx_path(lang_code, quantized=True)
+            if not os.path.exists(quantized_path):
+                logger.info("Quantizing %s to int8...", path)
+                quantize_onnx(path, quantized_path)
+            path = quantized_path
+        else:
+            logger.warning("int8 %s doesn't match torch (lengths match: %s, max abs diff %.4f, limit %.4f). "
+                           "Serving fp32.", lang_code, parity["lengths_match"], parity["max_abs_diff"],
+                           settings.ONNX_PARITY_MAX_DIFF)
+    onnx_model = OnnxVitsModel(path, model.config, intra_op_threads=intra_op_threads)
+    if not onnx_model.has_speaking_rate:
+        # Cached by an older version, which ignored the requested speed
+        logger.info("Re-exporting %s to ONNX with a speaking_rate input...", lang_code)
+        for stale in (onnx_path(lang_code), onnx_path(lang_code, quantized=True)):
+            if os.path.exists(stale):
+                os.remove(stale)
+        return load_onnx_model(lang_code, model, tokenizer, quantize, intra_op_threads)
+    return onnx_model
+
+
+def parity_texts(tokenizer, lengths=(12, 40, 90), seed: int = 0) -> List[str]:
+    """Words of random characters from the tokenizer's vocabulary, so any language's model can be checked."""
+    rng = random.Random(seed)
+    special = {tokenizer.pad_token, tokenizer.unk_token}
+    chars = sorted(c for c in tokenizer.get_vocab() if len(c) == 1 and c not in special and not c.isspace())
+    texts = []
+    for length in lengths:
+        words = []
+        while sum(len(word) + 1 for word in words) < length:
+            words.append("".join(rng.choice(chars) for _ in range(rng.randint(2, 7))))
+        texts.append(" ".join(words))
+    return texts
+
+
+def parity_ok(parity: dict, max_abs_diff: float = None) -> bool:
+    """Whether an ONNX graph is close enough to torch to serve (same lengths, samples within max_abs_diff)."""
+    max_abs_diff = settings.ONNX_PARITY_MAX_DIFF if max_abs_diff is None else max_abs_diff
+    return parity["lengths_match"] and parity["max_abs_diff"] <= max_abs_diff
+
+
+def check_parity(torch_model, onnx_model, tokenizer, texts: List[str]) -> dict:
+    """
+    Compares torch and ONNX outputs on the same inputs. Both models must have
+    been built with noise_scale = noise_scale_duration = 0 for the comparison
+    to be deterministic.
+    """
+    inputs = tokenizer(texts, return_tensors="pt", padding=True)
+    with torch.no_grad():
+        expected = torch_model(input_ids=inputs.input_ids, attention_mask=inputs.attention_mask)
+    actual = onnx_model(inputs.input_ids, inputs.attention_mask)
+
+    expected_lengths = expected.sequence_lengths.numpy()
+    actual_lengths = actual.sequence_lengths.numpy()
+    max_abs_diff = 0.0
+    for i in range(len(texts)):
+        n = min(expected_lengths[i], actual_lengths[i])
+        diff = np.abs(expected.waveform[i, :n].numpy() - actual.waveform[i, :n].numpy())
+        max_abs_diff = max(max_abs_diff, float(diff.max()) if n else 0.0)
+    return {
+        "lengths_match": bool(np.array_equal(expected_lengths, actual_lengths)),
+        "max_abs_diff": max_abs_diff,
+    }
+
+
+def real_time_factor(model, tokenizer, texts: List[str], runs: int = 3) -> float:
+    """Seconds of compute per second of audio (lower is better), best of `runs`."""
+    inputs = tokenizer(texts, return_tensors="pt", padding=True)
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        with torch.no_grad():
+            output = model(input_ids=inputs.input_ids, attention_mask=inputs.attention_mask)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    audio_seconds = float(output.sequence_lengths.sum()) / model.config.sampling_rate
+    return best / audio_seconds if audio_seconds else 0.0
@@ -0,0 +1,136 @@
+import logging
+import re
+from typing import List, Optional, Tuple
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Letters of each script MMS has models for. The danda (U+0964/5) is shared by
+# every Indic script, so like digits, spaces and punctuation it belongs to no run.
+SCRIPT_LETTERS = {
+    "devanagari": r"\u0900-\u0963\u0966-\u097f\ua8e0-\ua8ff",
+    "bengali": r"\u0980-\u09ff",
+    "gurmukhi": r"\u0a00-\u0a7f",
+    "gujarati": r"\u0a80-\u0aff",
+    "tamil": r"\u0b80-\u0bff",
+    "telugu": r"\u0c00-\u0c7f",
+    "kannada": r"\u0c80-\u0cff",
+    "malayalam": r"\u0d00-\u0d7f",
+    "latin": r"A-Za-z\u00c0-\u00d6\u00d8-\u00f6\u00f8-\u024f",
+}
+# Languages written in each script; the first one reads runs the target language can't
+SCRIPT_LANGS = {
+    "devanagari": ("hin", "san"),
+    "bengali": ("asm",),
+    "gurmukhi": ("pan",),
+    "gujarati": ("guj",),
+    "tamil": ("tam",),
+    "telugu": ("tel",),
+    "kannada": ("kan",),
+    "malayalam": ("mal",),
+    "latin": ("eng", "fra"),
+}
+LANG_SCRIPTS = {lang: script for script, langs in SCRIPT_LANGS.items() for lang in langs}
+# langdetect (ISO 639-1) results for the Latin script languages
+DETECTED_LANGS = {"en": "eng", "fr": "fra"}
+
+SCRIPT_PATTERN = re.compile("|".join(f"(?P<{script}>[{letters}]+)" for script, letters in SCRIPT_LETTERS.items()))
+SCRIPT_PATTERNS = {script: re.compile(f"[{letters}]") for script, letters in SCRIPT_LETTERS.items()}
+# Letters of any script but the target's: when absent the text is a single run
+FOREIGN_PATTERNS = {
+    script: re.compile("[" + "".join(letters for other, letters in SCRIPT_LETTERS.items() if other != script) + "]")
+    for script in SCRIPT_LETTERS
+}
+
+
+class Segment(str):
+    """Chunk text to be spoken by another language's model than the request's."""
+
+    def __new__(cls, text: str, lang_code: str):
+        segment = super().__new__(cls, text)
+        segment.lang_code = lang_code
+        return segment
+
+    def __reduce__(self):
+        return Segment, (str(self), self.lang_code)
+
+
+def detect_latin(text: str, default: Optional[str] = None) -> Optional[str]:
+    """
+    MMS language of Latin script text per langdetect, or default when the
+    text is too short to tell or no supported language is likely enough.
+    """
+    if len(text) < settings.SEGMENT_DETECT_MIN_CHARS:
+        return default
+    try:
+        from langdetect import DetectorFactory, LangDetectException, detect_langs
+    except ImportError:
+        return default
+    # langdetect is randomized; seeded so the same text always gets the same model
+    DetectorFactory.seed = 0
+    try:
+        candidates = detect_langs(text)
+    except LangDetectException:
+        return default
+    for candidate in candidates:
+        lang_code = DETECTED_LANGS.get(candidate.lang)
+        if lang_code is not None and candidate.prob >= settings.SEGMENT_DETECT_MIN_PROB:
+            return lang_code
+    return default
+
+
+def in_target_script(text: str, lang_code: str) -> bool:
+    """
+    True if text is (at least partly) written in lang_code already, so it can
+    be spoken without translation: runs in other scripts are routed to their
+    own models by segment().
+    """
+    script = LANG_SCRIPTS.get(lang_code)
+    if script is None:
+        return False
+    if script == "latin":
+        # Any Latin script language could be meant; only detection can tell
+        return detect_latin(text) == lang_code
+    return SCRIPT_PATTERNS[script].search(text) is not None
+
+
+def segment(text: str, lang_code: str) -> List[Tuple[str, str]]:
+    """
+    Splits code-mixed text into (lang_code, text) runs per script, e.g. the
+    English words of Hindi text written in Latin letters. Digits, spaces and
+    punctuation stay with the run before them. Runs in the target language's
+    script use the target language; Latin runs elsewhere are detected as
+    English or French.
+    """
+    script = LANG_SCRIPTS.get(lang_code)
+    if not settings.SEGMENT_MIXED_SCRIPTS or script is None or not FOREIGN_PATTERNS[script].search(text):
+        return [(lang_code, text)]
+
+    # 1. Script runs: [script, start], neighbouring letters of one script merged
+    runs = []
+    for m in SCRIPT_PATTERN.finditer(text):
+        if not runs or runs[-1][0] != m.lastgroup:
+            runs.append([m.lastgroup, m.start()])
+    runs[0][1] = 0
+
+    # 2. Language per run
+    segments = []
+    for i, (run_script, start) in enumerate(runs):
+        end = runs[i + 1][1] if i + 1 < len(runs) else len(text)
+        langs = SCRIPT_LANGS[run_script]
+        if lang_code in langs:
+            run_lang = lang_code
+        elif run_script == "latin":
+            run_lang = detect_latin(text[start:end].strip(), langs[0])
+        else:
+            run_lang = langs[0]
+        # Runs of different scripts may still be one language (e.g. both read as English)
+        if segments and segments[-1][0] == run_lang:
+            segments[-1][1] += text[start:end]
+        else:
+            segments.append([run_lang, text[start:end]])
+
+    if len(segments) > 1:
+        logger.debug("Segmented %d chars for %s into %s", len(text), lang_code, [lang for lang, _ in segments])
+    return [(run_lang, run) for run_lang, run in segments]
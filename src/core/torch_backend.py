@@ -0,0 +1,127 @@
+import logging
+import time
+from typing import List, Optional
+
+import torch
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def length_bucket(length: int, buckets: List[int] = None) -> Optional[int]:
+    """Smallest bucket that fits an input of `length` tokens, or None if it's longer than all of them."""
+    for bucket in sorted(buckets or settings.TORCH_LENGTH_BUCKETS):
+        if length <= bucket:
+            return bucket
+    return None
+
+
+def configure_threads(interop_threads: int = None):
+    """
+    Applies TORCH_INTEROP_THREADS. Torch only accepts it before the first
+    inter-op parallel work, so call it at startup and in worker initializers.
+    """
+    interop_threads = settings.TORCH_INTEROP_THREADS if interop_threads is None else interop_threads
+    if interop_threads <= 0 or torch.get_num_interop_threads() == interop_threads:
+        return
+    try:
+        torch.set_num_interop_threads(interop_threads)
+    except RuntimeError as e:
+        logger.warning("Could not set %d inter-op threads: %s", interop_threads, e)
+
+
+def compile_errors() -> tuple:
+    """
+    Exceptions of torch.compile itself (dynamo, or the backend compiler such
+    as inductor), as opposed to errors the model raises when run. Imported
+    here, as torch._dynamo is slow to import and only loaded once compiling.
+    Called while handling the error, so names missing from this torch are skipped.
+    """
+    from torch._dynamo import exc
+    names = ("BackendCompilerFailed", "InternalTorchDynamoError", "InvalidBackend", "Unsupported")
+    return tuple(error for error in (getattr(exc, name, None) for name in names) if error is not None)
+
+
+class OptimizedVitsModel(torch.nn.Module):
+    """
+    VitsModel run under torch.inference_mode with inputs padded up to a small
+    set of length buckets, so a compiled graph is reused per bucket instead of
+    specialized per input length. Padded positions are masked out, so the
+    audio is the same as unpadded. Same call signature and outputs as VitsModel
+    for MMSEngine.synthesize_batch.
+    """
+
+    def __init__(self, model, pad_token_id: int, buckets: List[int] = None, compile: bool = None,
+                 compile_mode: str = None):
+        super().__init__()
+        self.model = model.eval()
+        self.config = model.config
+        self.pad_token_id = pad_token_id
+        self.buckets = sorted(buckets or settings.TORCH_LENGTH_BUCKETS)
+        compile = settings.TORCH_COMPILE if compile is None else compile
+        self.compiled = None
+        if compile:
+            # Input shapes are fixed per bucket, but the decoder's depend on the predicted
+            # durations, so dynamic shapes stay automatic (generalized during warm-up)
+            self.compiled = torch.compile(model, mode=compile_mode or settings.TORCH_COMPILE_MODE)
+
+    def pad(self, input_ids, attention_mask):
+        bucket = length_bucket(input_ids.shape[1], self.buckets)
+        if bucket is None or bucket == input_ids.shape[1]:
+            return input_ids, attention_mask
+        padding = (0, bucket - input_ids.shape[1])
+        input_ids = torch.nn.functional.pad(input_ids, padding, value=self.pad_token_id)
+        attention_mask = torch.nn.functional.pad(attention_mask, padding, value=0)
+        return input_ids, attention_mask
+
+    def forward(self, input_ids, attention_mask, speaking_rate: float = None):
+        input_ids, attention_mask = self.pad(input_ids, attention_mask)
+        # A tensor rather than a float, so a new speed is not a new graph
+        speaking_rate = torch.tensor(self.config.speaking_rate if speaking_rate is None else speaking_rate,
+                                     device=input_ids.device)
+        with torch.inference_mode():
+            if self.compiled is not None:
+                try:
+                    return self.compiled(input_ids=input_ids, attention_mask=attention_mask,
+                                         speaking_rate=speaking_rate)
+                except Exception as e:
+                    if isinstance(e, compile_errors()):
+                        # e.g. no C compiler for the inductor backend: it won't compile later
+                        # either, so keep serving eagerly
+                        logger.warning("Compiling failed, serving eagerly from now on: %s", e)
+                        self.compiled = None
+                    else:
+                        # Anything else (e.g. out of memory) is retried eagerly, for this call only
+                        logger.warning("Compiled inference failed, retrying eagerly: %s", e)
+            return self.model(input_ids=input_ids, attention_mask=attention_mask, speaking_rate=speaking_rate)
+
+    def warm_up(self, batch_sizes=(1, 2)) -> dict:
+        """
+        Runs every bucket per batch size (1 is specialized separately by the
+        compiler) with short and full-length inputs, so the compiled graphs
+        cover the range of audio lengths and no request pays for compilation.
+        Returns seconds spent per bucket.
+        """
+        token_id = next(i for i in range(self.config.vocab_size) if i != self.pad_token_id)
+        seconds = {}
+        for bucket in self.buckets:
+            started = time.perf_counter()
+            for batch_size in batch_sizes:
+                for length in (min(bucket, 8), bucket // 2, bucket):
+                    input_ids = torch.full((batch_size, bucket), token_id, dtype=torch.long, device=self.model.device)
+                    attention_mask = torch.zeros_like(input_ids)
+                    attention_mask[:, :length] = 1
+                    self(input_ids=input_ids, attention_mask=attention_mask)
+            seconds[bucket] = time.perf_counter() - started
+        return seconds
+
+
+def load_optimized_model(lang_code: str, model, tokenizer, warm_up: bool = None) -> OptimizedVitsModel:
+    """Wraps a loaded VitsModel for the compiled backend, warming up every bucket (TORCH_WARMUP)."""
+    optimized = OptimizedVitsModel(model, tokenizer.pad_token_id)
+    if settings.TORCH_WARMUP if warm_up is None else warm_up:
+        seconds = optimized.warm_up()
+        logger.info("Warmed up %s buckets in %.1fs: %s", lang_code, sum(seconds.values()),
+                    {bucket: round(s, 2) for bucket, s in seconds.items()})
+    return optimized
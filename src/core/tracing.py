@@ -0,0 +1,41 @@
+import contextvars
+import logging
+import re
+import time
+import uuid
+from contextlib import contextmanager
+
+from src.core.metrics import STAGE_SECONDS
+
+logger = logging.getLogger("tts.trace")
+
+# Propagated from the route/socket event through the scheduler into inference workers.
+# Batched inference carries the comma-joined ids of every request in the batch.
+request_id_var = contextvars.ContextVar("request_id", default="-")
+
+# Client ids also name socket rooms, stream ids and download filenames
+_REQUEST_ID_RE = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+
+def new_request_id(candidate=None) -> str:
+    """Uses a well-formed client-supplied id when present, otherwise generates one."""
+    if candidate is not None and _REQUEST_ID_RE.fullmatch(str(candidate)):
+        return str(candidate)
+    return uuid.uuid4().hex[:16]
+
+
+@contextmanager
+def span(stage: str, **attrs):
+    """
+    Times a pipeline stage into tts_stage_seconds and, when DEBUG logging
+    is enabled for tts.trace, emits a trace span line for it.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("span stage=%s ms=%.2f %s", stage, elapsed * 1000.0,
+                         " ".join(f"{k}={v}" for k, v in attrs.items()))
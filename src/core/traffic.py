@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Dict, List
+
+from src.core.config import settings
+from src.core.tts_engine import engine
+from src.core.workers import inference_pool
+
+logger = logging.getLogger(__name__)
+
+
+class TrafficStats:
+    """
+    Rolling per-language request statistics.
+
+    Keeps an exponentially decayed request rate per language (half_life
+    seconds) and an hour-of-day histogram, and blends the two into a
+    predicted near-term rate used for eviction and prefetch decisions.
+    """
+
+    def __init__(self, half_life: float, hourly_weight: float = 0.3):
+        self.decay = math.log(2) / half_life
+        self.hourly_weight = hourly_weight
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.recent = {} # {lang_code: (decayed count, last update)}
+        self.hourly = {} # {lang_code: [24 request counts]}
+        self.totals = {} # {lang_code: requests}
+
+    def record(self, lang_code: str, now: float = None):
+        now = now or time.time()
+        with self.lock:
+            value, last = self.recent.get(lang_code, (0.0, now))
+            self.recent[lang_code] = (value * math.exp(-self.decay * (now - last)) + 1.0, now)
+            hours = self.hourly.setdefault(lang_code, [0] * 24)
+            hours[time.localtime(now).tm_hour] += 1
+            self.totals[lang_code] = self.totals.get(lang_code, 0) + 1
+
+    def _recent_rate(self, lang_code, now):
+        # Caller must hold self.lock. Decayed count * decay constant ~= requests/second
+        value, last = self.recent.get(lang_code, (0.0, now))
+        return value * math.exp(-self.decay * (now - last)) * self.decay
+
+    def _hourly_rate(self, lang_code, now):
+        # Caller must hold self.lock. Average requests/second seen at this hour of day
+        hours = self.hourly.get(lang_code)
+        if not hours:
+            return 0.0
+        days = max(1.0, (now - self.started) / 86400.0)
+        return hours[time.localtime(now).tm_hour] / (days * 3600.0)
+
+    def predicted_rate(self, lang_code: str, now: float = None) -> float:
+        now = now or time.time()
+        with self.lock:
+            return ((1 - self.hourly_weight) * self._recent_rate(lang_code, now)
+                    + self.hourly_weight * self._hourly_rate(lang_code, now))
+
+    def ranked(self, now: float = None) -> List[str]:
+        """Languages with traffic, most likely next first."""
+        now = now or time.time()
+        with self.lock:
+            langs = list(self.totals)
+        return sorted(langs, key=lambda code: self.predicted_rate(code, now), reverse=True)
+
+    def snapshot(self) -> Dict:
+        now = time.time()
+        with self.lock:
+            langs = list(self.totals)
+            data = {
+                code: {
+                    "total": self.totals[code],
+                    "recent_rate": self._recent_rate(code, now),
+                    "hourly_rate": self._hourly_rate(code, now),
+                    "hourly_histogram": list(self.hourly.get(code, [])),
+                }
+                for code in langs
+            }
+        for code in langs:
+            data[code]["predicted_rate"] = self.predicted_rate(code, now)
+        return data
+
+
+class TrafficAwareEviction:
+    """
+    Eviction policy for MMSEngine: among evictable models (LRU ordered),
+    evict the one with the lowest predicted request rate; LRU breaks ties.
+    """
+
+    def __init__(self, stats: TrafficStats):
+        self.stats = stats
+
+    def __call__(self, candidates: List[str]) -> str:
+        now = time.time()
+        return min(candidates, key=lambda code: self.stats.predicted_rate(code, now))
+
+
+class Prefetcher:
+    """
+    Loads likely-next languages into free cache capacity while the
+    inference pool is idle. Every decision is kept for inspection.
+    """
+
+    def __init__(self, engine, pool, stats: TrafficStats, interval: float, min_rate: float):
+        self.engine = engine
+        self.pool = pool
+        self.stats = stats
+        self.interval = interval
+        self.min_rate = min_rate
+        self.decisions = deque(maxlen=100)
+
+    def _free_slots(self, loaded) -> int:
+        engine = self.engine
+        slots = engine.max_models - len(loaded) - len(engine.loading)
+        if engine.max_bytes and loaded:
+            # Assume a new model is about the size of the ones already loaded
+            used = sum(m["bytes"] for m in loaded.values())
+            average = used / len(loaded)
+            if average:
+                slots = min(slots, int((engine.max_bytes - used) // average))
+        return slots
+
+    def _decide(self, action, lang_code, reason):
+        self.decisions.append({
+            "time": time.time(),
+            "action": action,
+            "lang": lang_code,
+            "predicted_rate": self.stats.predicted_rate(lang_code),
+            "reason": reason,
+        })
+
+    def step(self):
+        """One prefetch round. Returns languages whose load was started."""
+        queue = self.pool.stats()
+        if queue["queued_jobs"] or queue["running_jobs"]:
+            return []
+        loaded = self.engine.stats()["models"]
+        slots = self._free_slots(loaded)
+        started = []
+        for lang_code in self.stats.ranked():
+            if slots <= 0:
+                break
+            if lang_code in loaded or lang_code in self.engine.loading:
+                continue
+            if self.stats.predicted_rate(lang_code) < self.min_rate:
+                break
+            self._decide("prefetch", lang_code, f"free slots={slots}")
+            logger.info("Prefetching model for %s", lang_code)
+            self.engine.prefetch(lang_code)
+            started.append(lang_code)
+            slots -= 1
+        return started
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.step()
+            except Exception as e:
+                logger.warning("Prefetch round failed: %s", e)
+
+
+# Shared Singletons
+traffic_stats = TrafficStats(half_life=settings.TRAFFIC_HALF_LIFE)
+prefetcher = Prefetcher(engine, inference_pool, traffic_stats,
+                        interval=settings.PREFETCH_INTERVAL, min_rate=settings.PREFETCH_MIN_RATE)
@@ -0,0 +1,239 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List
+
+from src.core.config import settings
+from src.core.segmenter import in_target_script
+
+logger = logging.getLogger(__name__)
+
+# Map MMS (ISO 639-3) codes to the ISO 639-1 codes used by translation services
+TRANSLATION_LANG_MAP: Dict[str, str] = {
+    "eng": "en",
+    "fra": "fr",
+    "hin": "hi",
+    "san": "sa",
+    "tel": "te",
+    "tam": "ta",
+    "mal": "ml",
+    "kan": "kn",
+    "pan": "pa",
+    "guj": "gu",
+    "asm": "as",
+}
+
+
+class TranslationBackend:
+    """Interface for translation providers. Targets are ISO 639-1 codes."""
+    name = "base"
+
+    def translate(self, text: str, target: str) -> str:
+        raise NotImplementedError
+
+    def translate_batch(self, texts: List[str], target: str) -> List[str]:
+        return [self.translate(text, target) for text in texts]
+
+
+class GoogleTranslationBackend(TranslationBackend):
+    name = "google"
+    # Google Translate rejects requests above 5000 characters
+    MAX_REQUEST_CHARS = 4500
+
+    def __init__(self):
+        from deep_translator import GoogleTranslator
+        self._translator_cls = GoogleTranslator
+        # GoogleTranslator keeps the text of the request being sent on the instance,
+        # so instances are per thread: a shared one mixes up concurrent translations
+        self._local = threading.local()
+
+    def _translator(self, target):
+        translators = getattr(self._local, "translators", None)
+        if translators is None:
+            translators = self._local.translators = {}
+        translator = translators.get(target)
+        if translator is None:
+            translator = translators[target] = self._translator_cls(source='auto', target=target)
+        return translator
+
+    def translate(self, text: str, target: str) -> str:
+        return self._translator(target).translate(text)
+
+    def translate_batch(self, texts: List[str], target: str) -> List[str]:
+        """
+        Translates many chunks per round-trip by joining them with newlines
+        and splitting the result. Falls back to per-chunk calls if the line
+        structure does not survive translation.
+        """
+        results = []
+        group = []
+        group_chars = 0
+        for text in texts:
+            line = " ".join(text.split())
+            if group and group_chars + len(line) + 1 > self.MAX_REQUEST_CHARS:
+                results.extend(self._translate_lines(group, target))
+                group, group_chars = [], 0
+            group.append(line)
+            group_chars += len(line) + 1
+        if group:
+            results.extend(self._translate_lines(group, target))
+        return results
+
+    def _translate_lines(self, lines, target):
+        if len(lines) == 1:
+            return [self.translate(lines[0], target)]
+        translated = self.translate("\n".join(lines), target).split("\n")
+        if len(translated) == len(lines):
+            return [t.strip() for t in translated]
+        return [self.translate(line, target) for line in lines]
+
+
+class OfflineTranslationBackend(TranslationBackend):
+    """
+    Network-free backend for tests and benchmarks. Returns the text unchanged
+    unless a (text, target) pair is present in the phrasebook.
+    """
+    name = "offline"
+
+    def __init__(self, phrasebook: Dict = None, delay: float = 0.0):
+        self.phrasebook = phrasebook or {}
+        self.delay = delay
+        self.calls = 0
+
+    def translate(self, text: str, target: str) -> str:
+        return self.translate_batch([text], target)[0]
+
+    def translate_batch(self, texts: List[str], target: str) -> List[str]:
+        # One simulated round-trip per batch
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return [self.phrasebook.get((text, target), text) for text in texts]
+
+
+BACKENDS = {
+    "google": GoogleTranslationBackend,
+    "offline": OfflineTranslationBackend,
+}
+
+
+def get_backend(name: str) -> TranslationBackend:
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown translation backend: {name}")
+
+
+class TranslationService:
+    """
+    Translation front-end shared by all pipelines.
+
+    Results are kept in a bounded LRU cache with a TTL, keyed on
+    (source text, target language). Identical concurrent requests are
+    coalesced so only one of them reaches the backend.
+    """
+
+    def __init__(self, backend: TranslationBackend, max_entries: int, ttl: float):
+        self.backend = backend
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.cache = OrderedDict() # {(text, target): (expires_at, translated)}
+        self.inflight = {} # {(text, target): Future}
+        self.lock = threading.Lock()
+
+    def _lookup(self, key, now):
+        # Caller must hold self.lock
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        expires_at, translated = entry
+        if expires_at < now:
+            del self.cache[key]
+            return None
+        self.cache.move_to_end(key)
+        return translated
+
+    def _store(self, key, translated, now):
+        # Caller must hold self.lock
+        self.cache[key] = (now + self.ttl, translated)
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+
+    def translate(self, text: str, lang_code: str) -> str:
+        return self.translate_batch([text], lang_code)[0]
+
+    def translate_batch(self, texts: List[str], lang_code: str) -> List[str]:
+        """
+        Translates texts into the MMS language lang_code. Cached texts and
+        texts already (partly) written in the target script are returned
+        directly, the rest go to the backend in a single batch.
+        On failure the original text is returned (and not cached).
+        """
+        if lang_code == 'eng':
+            return list(texts)
+        target = TRANSLATION_LANG_MAP.get(lang_code, lang_code)
+
+        # Code-mixed text is segmented per script instead (segmenter.segment)
+        native = {text for text in texts if in_target_script(text, lang_code)}
+
+        results = {}
+        owned = {} # keys this call is responsible for translating
+        waiting = {} # keys another thread is already translating
+        now = time.monotonic()
+        with self.lock:
+            for text in texts:
+                key = (text, target)
+                if key in results or key in owned or key in waiting:
+                    continue
+                if text in native:
+                    results[key] = text
+                    continue
+                cached = self._lookup(key, now)
+                if cached is not None:
+                    results[key] = cached
+                elif key in self.inflight:
+                    waiting[key] = self.inflight[key]
+                else:
+                    owned[key] = self.inflight[key] = Future()
+
+        if owned:
+            misses = [text for text, _ in owned]
+            translated = misses
+            failed = True
+            try:
+                logger.debug("Translating %d text(s) to %s", len(misses), target)
+                translated = self.backend.translate_batch(misses, target)
+                if len(translated) != len(misses):
+                    raise ValueError(f"{len(translated)} translations for {len(misses)} texts")
+                failed = False
+            except Exception as te:
+                logger.warning("Translation failed: %s. Using original text.", te)
+            finally:
+                # Also on BaseException (e.g. cancellation), so waiters on these keys never hang
+                if failed:
+                    translated = misses
+                with self.lock:
+                    now = time.monotonic()
+                    for key, value in zip(owned, translated):
+                        if not failed:
+                            self._store(key, value, now)
+                        del self.inflight[key]
+                for (key, future), value in zip(owned.items(), translated):
+                    results[key] = value
+                    future.set_result(value)
+
+        for key, future in waiting.items():
+            results[key] = future.result()
+
+        return [results[(text, target)] for text in texts]
+
+
+# Shared Singleton
+translator = TranslationService(
+    get_backend(settings.TRANSLATION_BACKEND),
+    max_entries=settings.TRANSLATION_CACHE_SIZE,
+    ttl=settings.TRANSLATION_CACHE_TTL,
+)
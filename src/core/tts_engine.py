@@ -1,146 +1,347 @@
+import asyncio
+import logging
+import os
 import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 import torch
 import numpy as np
 import scipy.io.wavfile as wav
-import re
 import io
 from transformers import VitsModel, AutoTokenizer
-from deep_translator import GoogleTranslator
 from src.core.config import settings, LANG_MAP
+from src.core.translation import translator
+from src.core.normalizer import normalize_text
+from src.core.metrics import AUDIO_SECONDS, BATCH_SIZE, BUCKET_REAL_TIME_FACTOR, MODEL_CACHE_EVENTS, REAL_TIME_FACTOR
+from src.core.torch_backend import length_bucket
+from src.core.tracing import span
 from collections import OrderedDict
 
-def normalize_math_english(text):
+logger = logging.getLogger(__name__)
+
+def model_nbytes(model) -> int:
+    """Resident size of a loaded model's weights."""
+    if isinstance(model, torch.nn.Module):
+        tensors = list(model.parameters()) + list(model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    # ONNX Runtime sessions: the graph file is a good proxy for weight memory
+    path = getattr(model, "path", None)
+    return os.path.getsize(path) if path and os.path.exists(path) else 0
+
+class ModelHandle:
     """
-    English-specific math normalization.
+    Reference-counted handle to a loaded (model, tokenizer) pair.
+    Obtained from MMSEngine.load_lang and used for the whole inference;
+    the engine will not evict the model while a handle is held.
     """
-    # Superscripts
-    text = re.sub(r'(\w+)\^2', r'\1 squared', text)
-    text = re.sub(r'(\w+)\^3', r'\1 cubed', text)
-    
-    # Operators
-    text = text.replace('+', ' plus ')
-    text = text.replace('=', ' equals ')
-    text = text.replace('*', ' times ')
-    text = text.replace('/', ' divided by ')
-    
-    # Common symbols
-    text = text.replace('∫', 'integral ')
-    text = text.replace('π', 'pie')
-    
-    return text
+    def __init__(self, engine, lang_code, model, tokenizer):
+        self.engine = engine
+        self.lang_code = lang_code
+        self.model = model
+        self.tokenizer = tokenizer
+        self.refs = 0
+        self.nbytes = model_nbytes(model)
+        self.last_used = time.monotonic()
+
+    def release(self):
+        self.engine._release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
 
 class MMSEngine:
     def __init__(self):
-        self.loaded_models = OrderedDict() # Cache: {lang_code: (model, tokenizer)}
+        self.loaded_models = OrderedDict() # Cache: {lang_code: ModelHandle}
         self.device = settings.MODEL_DEVICE
         self.max_models = settings.MAX_LOADED_MODELS
+        # Resident weight budget across cached models (0 = count limit only)
+        self.max_bytes = settings.MODEL_CACHE_MAX_BYTES
+        # Models unused for this long are unloaded by evict_expired (0 = never)
+        self.idle_ttl = settings.MODEL_IDLE_TTL
+        # Never evicted (the PRELOAD_LANGS)
+        self.pinned = set()
+        # Picks the victim from evictable models (LRU ordered); plain LRU by default
+        self.eviction_policy = lambda candidates: candidates[0]
+        # Guards the cache and ref counts only; never held during model loading or inference
         self.lock = threading.Lock()
+        # In-progress loads, shared by every caller waiting on the same language
+        self.loading = {} # {lang_code: Future[ModelHandle]}
+        # Background loads (prefetch / warm-up) so they never occupy inference workers
+        self.loader = ThreadPoolExecutor(max_workers=settings.MODEL_LOAD_WORKERS, thread_name_prefix="model-load")
+        # Load from the local mmap-able model store instead of the HF cache (always in worker processes;
+        # baked snapshots are used either way)
+        self.use_model_store = settings.MODEL_STORE_ENABLED
+
+    def _load_model(self, lang_code):
+        from src.core.model_store import baked_snapshot, ensure_exported, load_model
+        baked = baked_snapshot(lang_code)
+        if baked is not None or self.use_model_store:
+            model, tokenizer = load_model(baked or ensure_exported(lang_code), self.device)
+        else:
+            model_id = f"facebook/mms-tts-{lang_code}"
+            tokenizer = AutoTokenizer.from_pretrained(model_id, revision=settings.MODEL_REVISION)
+            model = VitsModel.from_pretrained(model_id, revision=settings.MODEL_REVISION)
+            model.to(self.device)
+
+        if settings.INFERENCE_BACKEND == "onnx":
+            from src.core.onnx_backend import load_onnx_model
+            model = load_onnx_model(lang_code, model, tokenizer, intra_op_threads=torch.get_num_threads())
+        elif settings.INFERENCE_BACKEND == "compiled":
+            from src.core.torch_backend import load_optimized_model
+            model = load_optimized_model(lang_code, model, tokenizer)
+        return model, tokenizer
+
+    def _acquire_cached(self, lang_code):
+        # Caller must hold self.lock
+        handle = self.loaded_models.get(lang_code)
+        if handle is not None:
+            # Move to end (most recently used)
+            self.loaded_models.move_to_end(lang_code)
+            handle.refs += 1
+            handle.last_used = time.monotonic()
+            MODEL_CACHE_EVENTS.inc(lang=lang_code, result="hit")
+        return handle
+
+    def _start_load(self, lang_code):
+        """
+        Returns (future, owner). Caller must hold self.lock. If owner is True
+        the caller is responsible for running _load_into_cache for the future.
+        """
+        future = self.loading.get(lang_code)
+        if future is not None:
+            return future, False
+        future = self.loading[lang_code] = Future()
+        return future, True
+
+    def _load_into_cache(self, lang_code, future):
+        logger.info("Loading model for language: %s...", lang_code)
+        MODEL_CACHE_EVENTS.inc(lang=lang_code, result="miss")
+        model_id = f"facebook/mms-tts-{lang_code}"
+        try:
+            with span("model_load", lang=lang_code):
+                model, tokenizer = self._load_model(lang_code)
+        except Exception as e:
+            logger.error("Error loading model %s: %s", model_id, e)
+            with self.lock:
+                del self.loading[lang_code]
+            future.set_exception(e)
+            return
 
-    def load_lang(self, lang_code):
         with self.lock:
-            # 1. Check if already loaded
-            if lang_code in self.loaded_models:
-                # Move to end (most recently used)
-                self.loaded_models.move_to_end(lang_code)
-                return
+            # Add to cache
+            handle = ModelHandle(self, lang_code, model, tokenizer)
+            self.loaded_models[lang_code] = handle
+            del self.loading[lang_code]
 
-            print(f"Loading model for language: {lang_code}...")
-            model_id = f"facebook/mms-tts-{lang_code}"
-            
-            try:
-                tokenizer = AutoTokenizer.from_pretrained(model_id)
-                model = VitsModel.from_pretrained(model_id)
-                model.to(self.device)
-                
-                # 2. Check if cache is full
-                if len(self.loaded_models) >= self.max_models:
-                    # Remove first item (least recently used)
-                    removed_lang, _ = self.loaded_models.popitem(last=False)
-                    print(f"Cache full. Unloaded model: {removed_lang}")
-                
-                # 3. Add to cache
-                self.loaded_models[lang_code] = (model, tokenizer)
-                print(f"Successfully loaded {model_id}. Cached models: {list(self.loaded_models.keys())}")
-                
-            except Exception as e:
-                print(f"Error loading model {model_id}: {e}")
-                raise
-
-    @property
-    def model(self):
-        """Helper to get current model (last used)"""
-        if not self.loaded_models:
-            return None
-        return list(self.loaded_models.values())[-1][0]
-
-    @property
-    def tokenizer(self):
-        """Helper to get current tokenizer (last used)"""
-        if not self.loaded_models:
-            return None
-        return list(self.loaded_models.values())[-1][1]
+            # Check if cache is full (never evicting the model we just loaded)
+            self._evict_idle(protect=lang_code)
+            logger.info("Successfully loaded %s (%.1f MB). Cached models: %s",
+                        model_id, handle.nbytes / 1e6, list(self.loaded_models.keys()))
+        future.set_result(handle)
+
+    def load_lang(self, lang_code) -> ModelHandle:
+        """
+        Returns a handle for lang_code, loading the model if needed.
+        Concurrent callers for the same cold language share one load.
+        The caller must release the handle (or use it as a context manager).
+        """
+        while True:
+            with self.lock:
+                # 1. Check if already loaded
+                handle = self._acquire_cached(lang_code)
+                if handle is not None:
+                    return handle
+                future, owner = self._start_load(lang_code)
+
+            # 2. Load here, or wait for whoever is already loading it
+            if owner:
+                self._load_into_cache(lang_code, future)
+            future.result()
+            # 3. Acquire from the cache (retries if it was evicted in between)
+
+    def prefetch(self, lang_code) -> Future:
+        """
+        Starts loading lang_code in the background without taking a reference.
+        Returns a future resolving when the model is in the cache.
+        """
+        with self.lock:
+            handle = self.loaded_models.get(lang_code)
+            if handle is not None:
+                future = Future()
+                future.set_result(handle)
+                return future
+            future, owner = self._start_load(lang_code)
+        if owner:
+            self.loader.submit(self._load_into_cache, lang_code, future)
+        return future
+
+    async def ensure_loaded(self, lang_code):
+        """Awaits a (background) load of lang_code without blocking the event loop."""
+        await asyncio.wrap_future(self.prefetch(lang_code))
+
+    def pin(self, lang_code):
+        with self.lock:
+            self.pinned.add(lang_code)
+
+    def _release(self, handle):
+        with self.lock:
+            handle.refs -= 1
+            handle.last_used = time.monotonic()
+            if handle.refs == 0:
+                # Evictions deferred while this model was in use can happen now
+                self._evict_idle()
+
+    def _evictable(self, protect=None):
+        # Caller must hold self.lock. Least recently used first.
+        return [code for code, h in self.loaded_models.items()
+                if h.refs == 0 and code not in self.pinned and code != protect]
+
+    def _over_budget(self):
+        if len(self.loaded_models) > self.max_models:
+            return True
+        if self.max_bytes:
+            return sum(h.nbytes for h in self.loaded_models.values()) > self.max_bytes
+        return False
+
+    def _unload(self, lang_code, reason):
+        # Caller must hold self.lock
+        del self.loaded_models[lang_code]
+        MODEL_CACHE_EVENTS.inc(lang=lang_code, result="eviction")
+        logger.info("%s. Unloaded model: %s", reason, lang_code)
+
+    def _evict_idle(self, protect=None):
+        # Caller must hold self.lock
+        while self._over_budget():
+            # Remove least recently used model that has no in-flight users
+            victims = self._evictable(protect)
+            if not victims:
+                # Every model is busy or pinned, retry when a handle is released
+                break
+            self._unload(self.eviction_policy(victims), "Cache full")
+
+    def evict_expired(self):
+        """Unloads unpinned models that have been idle longer than MODEL_IDLE_TTL."""
+        if not self.idle_ttl:
+            return
+        now = time.monotonic()
+        with self.lock:
+            for code in self._evictable():
+                if now - self.loaded_models[code].last_used > self.idle_ttl:
+                    self._unload(code, "Idle")
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self.lock:
+            models = {
+                code: {
+                    "bytes": h.nbytes,
+                    "in_use": h.refs,
+                    "idle_seconds": now - h.last_used,
+                    "pinned": code in self.pinned,
+                }
+                for code, h in self.loaded_models.items()
+            }
+            loading = list(self.loading)
+        return {
+            "models": models,
+            "loading": loading,
+            "resident_bytes": sum(m["bytes"] for m in models.values()),
+            "max_bytes": self.max_bytes,
+            "max_models": self.max_models,
+            "idle_ttl": self.idle_ttl,
+        }
 
     def translate_if_needed(self, text: str, lang_code: str) -> str:
         """
-        Translates text to the target language if it's not English.
-        Uses Google Translator.
-        """
-        if lang_code == 'eng':
-            return text
-
-        # Map MMS code to Google Translate code
-        gt_lang = lang_code
-        if lang_code == "san": gt_lang = "sa"
-        if lang_code == "hin": gt_lang = "hi"
-        if lang_code == "fra": gt_lang = "fr"
-        if lang_code == "tel": gt_lang = "te"
-        if lang_code == "tam": gt_lang = "ta"
-        if lang_code == "mal": gt_lang = "ml"
-        if lang_code == "kan": gt_lang = "kn"
-        if lang_code == "pan": gt_lang = "pa"
-        if lang_code == "guj": gt_lang = "gu"
-        if lang_code == "asm": gt_lang = "as"
-        
-        try:
-            print(f"Translating to {gt_lang}...")
-            translated = GoogleTranslator(source='auto', target=gt_lang).translate(text)
-            print(f"Translated: {translated}")
-            return translated
-        except Exception as te:
-            print(f"Translation failed: {te}. Using original text.")
-            return text
+        Translates text to the target language unless it is English or already
+        (partly) written in the target script.
+        Uses the configured translation backend (cached, coalesced).
+        """
+        return translator.translate(text, lang_code)
 
-    def synthesize(self, text: str, lang: str="eng", speed: float=1.0):
+    def translate_batch_if_needed(self, texts, lang_code: str):
+        """
+        Translates many chunks to the target language in as few backend round-trips as possible.
+        """
+        return translator.translate_batch(texts, lang_code)
+
+    def prepare_text(self, text: str, lang_code: str) -> str:
+        """
+        Applies language-specific normalization (numbers, dates, money, units, math).
+        Callers run it before chunking, so chunk boundaries follow the spoken text.
+        """
+        return normalize_text(text, lang_code)
+
+    def count_tokens(self, text: str, lang_code: str) -> int:
+        """
+        Input length of text for lang_code's model, as used for chunking. MMS
+        tokenizers are character level and interleave a blank token between
+        characters, so this is the tokenizer's count, or slightly more where it
+        drops characters. It never depends on whether the model is loaded: the
+        same text always gets the same chunks, and so the same cache keys.
+        """
+        return 2 * len(text) + 1
+
+    def synthesize_batch(self, texts, lang: str="eng", speed: float=1.0):
+        """
+        Synthesizes several texts of the same language in one padded forward pass.
+        Returns a list of (waveform, sampling_rate) tuples in input order.
+        """
         # 1. Resolve Language
         lang_code = LANG_MAP.get(lang.lower(), "eng")
-        
-        # 2. Normalize (English only for now)
-        if lang_code == "eng":
-            text = normalize_math_english(text)
+
+        logger.debug("Synthesizing batch of %d in %s", len(texts), lang_code)
+        BATCH_SIZE.observe(len(texts))
+
+        # 2. Load Model (held for the whole inference so it can't be evicted or swapped)
+        with self.load_lang(lang_code) as handle:
+            # 3. Infer
+            # Padding + attention mask lets VITS ignore the pad positions of shorter inputs
+            with span("tokenize", lang=lang_code, batch=len(texts)):
+                inputs = handle.tokenizer(texts, return_tensors="pt", padding=True)
+                inputs = inputs.to(self.device)
+
+            # MMS/VITS Parameters:
+            # noise_scale: How random/expressive (0.667 default). 
+            # speaking_rate: 1.0=Normal, 0.9=Slower(Clearer), 1.1=Faster (durations scale by 1/rate).
+            # Passed per call rather than set on the model, which other workers share.
             
-        print(f"Synthesizing '{text}' in {lang_code}...")
-        
-        # 3. Load Model
-        self.load_lang(lang_code)
-        
-        # 4. Infer
-        inputs = self.tokenizer(text, return_tensors="pt")
-        inputs = inputs.to(self.device)
-
-        # MMS/VITS Parameters:
-        # noise_scale: How random/expressive (0.667 default). 
-        # length_scale: Speed inverse. 1.0=Normal, 1.1=Slower(Clearer), 0.9=Faster.
-        
-        with torch.no_grad():
-            output = self.model(
-                input_ids=inputs.input_ids, 
-                attention_mask=inputs.attention_mask,
-            ).waveform
-        
-        # Convert to numpy
-        waveform = output.cpu().numpy().squeeze()
-        
-        return waveform, self.model.config.sampling_rate
+            started = time.perf_counter()
+            with span("inference", lang=lang_code, batch=len(texts)), torch.no_grad():
+                output = handle.model(
+                    input_ids=inputs.input_ids, 
+                    attention_mask=inputs.attention_mask,
+                    speaking_rate=speed,
+                )
+            elapsed = time.perf_counter() - started
+            sr = handle.model.config.sampling_rate
+
+        # 4. Split the padded batch back out using per-sample lengths
+        waveforms = output.waveform.cpu().numpy()
+        lengths = output.sequence_lengths.cpu().numpy()
+
+        audio_seconds = float(lengths.sum()) / sr
+        AUDIO_SECONDS.inc(audio_seconds, lang=lang_code)
+        if audio_seconds:
+            REAL_TIME_FACTOR.set(elapsed / audio_seconds, lang=lang_code)
+            # Per bucket of the (unpadded) input length, for choosing TORCH_LENGTH_BUCKETS
+            bucket = length_bucket(inputs.input_ids.shape[1])
+            BUCKET_REAL_TIME_FACTOR.observe(elapsed / audio_seconds, bucket=str(bucket or "inf"))
+
+        return [(waveforms[i, :lengths[i]], sr) for i in range(len(texts))]
+
+    def synthesize(self, text: str, lang: str="eng", speed: float=1.0):
+        return self.synthesize_batch([text], lang=lang, speed=speed)[0]
 
 # Shared Singleton
 engine = MMSEngine()
+
+def synthesize_batch_job(texts, lang: str="eng", speed: float=1.0):
+    """
+    Module-level entry point for inference pools. Picklable, so it can be sent
+    to worker processes where it runs against that process's own engine.
+    """
+    return engine.synthesize_batch(texts, lang, speed)
@@ -0,0 +1,265 @@
+import asyncio
+import contextvars
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from src.core.config import settings, LANG_MAP
+from src.core.metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when a request can't be admitted because the inference queue is full."""
+
+
+def _init_inference_worker(torch_threads: int):
+    # torch's thread settings are process-wide, so this runs once per process
+    import torch
+    from src.core.torch_backend import configure_threads
+    torch.set_num_threads(torch_threads)
+    configure_threads()
+
+
+def _init_process_worker(torch_threads: int, preload_langs):
+    _init_inference_worker(torch_threads)
+    from src.core.tts_engine import engine
+    # Weights come from the shared model store, mmap'd read-only by every worker
+    engine.use_model_store = True
+    for lang in preload_langs:
+        try:
+            lang_code = LANG_MAP.get(lang.lower(), lang)
+            engine.pin(lang_code)
+            engine.load_lang(lang_code).release()
+        except Exception as e:
+            logger.error("[Worker %d] Failed to preload %s: %s", os.getpid(), lang, e)
+
+
+def _timed_call(fn, *args):
+    # Runs in the worker process; reports when the job actually started
+    return time.time(), fn(*args)
+
+
+class Admission:
+    """Slot in the admission queue. Release exactly once when the request finishes."""
+    def __init__(self, pool, client_id):
+        self.pool = pool
+        self.client_id = client_id
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.pool._release(self.client_id)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class InferencePool:
+    """
+    Dedicated executor for model inference, separate from the default pool.
+
+    Requests must be admitted before they queue work. Admission is bounded
+    globally (queue_limit) and per client (per_client_limit) so a single
+    REST caller or socket session can't crowd out everyone else; requests
+    over the limit get QueueFullError (429 / 'busy').
+    """
+
+    def __init__(self, workers: int, torch_threads: int, queue_limit: int, per_client_limit: int):
+        if torch_threads <= 0:
+            # Split the cores between workers so intra-op threads don't oversubscribe
+            torch_threads = max(1, (os.cpu_count() or 1) // max(1, workers))
+        self.workers = workers
+        self.torch_threads = torch_threads
+        # Created on first use so importing this module in a worker process doesn't build a nested pool
+        self._executor = None
+        self.queue_limit = queue_limit
+        self.per_client_limit = per_client_limit
+        self.lock = threading.Lock()
+        self.admitted = Counter() # {client_id: active requests}
+        self.counters = Counter()
+        self.queued = 0 # jobs waiting for a worker
+        self.running = 0
+        self.wait_times = deque(maxlen=1024) # seconds spent waiting for a worker
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = self._create_executor()
+        return self._executor
+
+    def _create_executor(self):
+        # Worker threads share one torch intra-op setting, applied here once: concurrent
+        # inferences each use up to torch_threads threads. Only process mode isolates them.
+        _init_inference_worker(self.torch_threads)
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+
+    async def start(self):
+        """Builds the pool (applying the torch thread settings) up front instead of on the first request."""
+        self.executor
+
+    async def prepare(self, lang_code: str):
+        """
+        Makes sure lang_code's model is loaded before a batch is dispatched.
+        Cold loads run on the engine's loader threads, so inference workers
+        (and batches for already-loaded languages) never wait behind them.
+        """
+        from src.core.tts_engine import engine
+        await engine.ensure_loaded(lang_code)
+
+    def admit(self, client_id: str) -> Admission:
+        with self.lock:
+            total = sum(self.admitted.values())
+            if total >= self.queue_limit:
+                self.counters["rejected"] += 1
+                raise QueueFullError("Server busy, inference queue is full")
+            if self.admitted[client_id] >= self.per_client_limit:
+                self.counters["rejected"] += 1
+                raise QueueFullError("Too many concurrent requests for this client")
+            self.admitted[client_id] += 1
+            self.counters["admitted"] += 1
+        return Admission(self, client_id)
+
+    def _release(self, client_id):
+        with self.lock:
+            self.admitted[client_id] -= 1
+            if self.admitted[client_id] <= 0:
+                del self.admitted[client_id]
+
+    async def run(self, fn, *args):
+        """Runs fn(*args) on an inference worker."""
+        enqueued = time.monotonic()
+        with self.lock:
+            self.queued += 1
+
+        def task():
+            started = time.monotonic()
+            with self.lock:
+                self.queued -= 1
+                self.running += 1
+                self.wait_times.append(started - enqueued)
+            STAGE_SECONDS.observe(started - enqueued, stage="queue_wait")
+            try:
+                return fn(*args)
+            finally:
+                with self.lock:
+                    self.running -= 1
+
+        # Carry the request id (and other context) into the worker thread
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(self.executor, context.run, task)
+
+    def stats(self) -> dict:
+        with self.lock:
+            waits = sorted(self.wait_times)
+            admitted = sum(self.admitted.values())
+            queued, running = self.queued, self.running
+        def pct(p):
+            return waits[min(len(waits) - 1, int(p * len(waits)))] * 1000.0 if waits else 0.0
+        return {
+            "workers": self.workers,
+            "torch_threads": self.torch_threads,
+            "admitted_requests": admitted,
+            "queue_limit": self.queue_limit,
+            "queued_jobs": queued,
+            "running_jobs": running,
+            "wait_ms_p50": pct(0.5),
+            "wait_ms_p95": pct(0.95),
+            "wait_ms_max": waits[-1] * 1000.0 if waits else 0.0,
+            "total_admitted": self.counters["admitted"],
+            "total_rejected": self.counters["rejected"],
+        }
+
+
+class ProcessInferencePool(InferencePool):
+    """
+    Inference pool backed by worker processes, each with its own MMSEngine.
+
+    Model weights are exported once to the model store and memory-mapped by
+    every worker, so N workers share one copy of each model's weights in RAM.
+    Jobs must be picklable module-level functions (see synthesize_batch_job).
+    Stage metrics recorded inside workers stay in the worker; the front-end
+    process still reports queue wait, translation, encoding and emit times.
+    """
+
+    def __init__(self, workers: int, torch_threads: int, queue_limit: int, per_client_limit: int,
+                 preload_langs=()):
+        super().__init__(workers, torch_threads, queue_limit, per_client_limit)
+        self.preload_langs = list(preload_langs)
+
+    def _create_executor(self):
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            # spawn: forking a process that already holds torch thread pools is unsafe
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_process_worker,
+            initargs=(self.torch_threads, self.preload_langs),
+        )
+
+    async def start(self):
+        """Spawns all workers up front (running their preloads) instead of on first request."""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self.executor, time.time) for _ in range(self.workers)])
+
+    async def prepare(self, lang_code: str):
+        # Each worker process loads from the mmap'd model store on first use
+        return None
+
+    async def run(self, fn, *args):
+        """Runs fn(*args) in a worker process."""
+        enqueued = time.time()
+        with self.lock:
+            # Start times are only known on completion, so jobs count as queued until then
+            self.queued += 1
+        try:
+            started, result = await asyncio.get_running_loop().run_in_executor(
+                self.executor, _timed_call, fn, *args
+            )
+        finally:
+            with self.lock:
+                self.queued -= 1
+        with self.lock:
+            self.wait_times.append(max(0.0, started - enqueued))
+        STAGE_SECONDS.observe(max(0.0, started - enqueued), stage="queue_wait")
+        return result
+
+
+# Shared Singletons
+if settings.NODE_ROLE == "frontend":
+    # Deferred import: the remote pool builds on InferencePool above
+    from src.core.broker import get_broker
+    from src.core.dispatch import RemoteInferencePool, node_id
+    inference_pool = RemoteInferencePool(
+        broker=get_broker(settings.BROKER_URL),
+        node=node_id(),
+        queue_limit=settings.INFERENCE_QUEUE_LIMIT,
+        per_client_limit=settings.INFERENCE_MAX_PER_CLIENT,
+        timeout=settings.JOB_TIMEOUT,
+    )
+elif settings.SERVING_MODE == "process":
+    inference_pool = ProcessInferencePool(
+        workers=settings.INFERENCE_WORKERS,
+        torch_threads=settings.INFERENCE_TORCH_THREADS,
+        queue_limit=settings.INFERENCE_QUEUE_LIMIT,
+        per_client_limit=settings.INFERENCE_MAX_PER_CLIENT,
+        preload_langs=settings.PRELOAD_LANGS,
+    )
+else:
+    inference_pool = InferencePool(
+        workers=settings.INFERENCE_WORKERS,
+        torch_threads=settings.INFERENCE_TORCH_THREADS,
+        queue_limit=settings.INFERENCE_QUEUE_LIMIT,
+        per_client_limit=settings.INFERENCE_MAX_PER_CLIENT,
+    )
+
+# Translation and other blocking I/O, kept off the inference workers
+io_executor = ThreadPoolExecutor(max_workers=settings.IO_WORKERS, thread_name_prefix="io")
@@ -2,29 +2,94 @@ import socketio
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from src.core.config import settings
+from src.core.config import settings, LANG_MAP
+from src.core.log_config import setup_logging
 from src.api.routes import router as api_router
 from src.services.socket_service import socket_manager
+import asyncio
+import logging
 import os
+import time
 
 from src.api.socket_handlers import setup_socket_handlers
 
+setup_logging(settings.LOG_LEVEL, settings.LOG_FORMAT)
+logger = logging.getLogger(__name__)
+
 # Initialize FastAPI
 fast_app = FastAPI(title=settings.APP_NAME, version=settings.VERSION)
 
 # Register Socket Handlers
 setup_socket_handlers()
 
+# Strong references to long-running startup tasks
+background_tasks = set()
+
+async def preload(lang_code):
+    """Loads (or, in process mode, exports) one preloaded language in the background."""
+    from src.core.tts_engine import engine
+    try:
+        if settings.SERVING_MODE == "process":
+            # Export weights once here, then every worker process maps the same files
+            from src.core.model_store import ensure_exported
+            await asyncio.get_running_loop().run_in_executor(engine.loader, ensure_exported, lang_code)
+        else:
+            await engine.ensure_loaded(lang_code)
+    except Exception as e:
+        logger.error("Failed to preload %s: %s", lang_code, e)
+
+async def preload_all(lang_codes):
+    started = time.monotonic()
+    await asyncio.gather(*[preload(code) for code in lang_codes])
+    if settings.SERVING_MODE == "process":
+        from src.core.workers import inference_pool
+        await inference_pool.start()
+    logger.info("Pre-loading complete in %.1fs.", time.monotonic() - started)
+
+async def model_janitor():
+    """Periodically unloads models idle for longer than MODEL_IDLE_TTL."""
+    from src.core.tts_engine import engine
+    interval = max(5.0, settings.MODEL_IDLE_TTL / 4)
+    while True:
+        await asyncio.sleep(interval)
+        engine.evict_expired()
+
 @fast_app.on_event("startup")
 async def startup_event():
-    print(f"Pre-loading languages: {settings.PRELOAD_LANGS}...")
     from src.core.tts_engine import engine
-    for lang in settings.PRELOAD_LANGS:
-        try:
-            engine.load_lang(lang)
-        except Exception as e:
-            print(f"Failed to preload {lang}: {e}")
-    print("Pre-loading complete.")
+    from src.core.workers import inference_pool
+    if settings.NODE_ROLE == "frontend":
+        # Models live on the worker nodes, just start listening for their results
+        await inference_pool.start()
+        return
+    # Before any model load, as inter-op threads can't change once torch has used them
+    if settings.SERVING_MODE == "thread":
+        # Also sets the process-wide intra-op threads the inference worker threads share
+        await inference_pool.start()
+    else:
+        from src.core.torch_backend import configure_threads
+        configure_threads()
+    lang_codes = [LANG_MAP.get(lang.lower(), lang) for lang in settings.PRELOAD_LANGS]
+    logger.info("Pre-loading languages: %s...", lang_codes)
+    for code in lang_codes:
+        engine.pin(code)
+    # Loads run in parallel in the background; the server accepts requests meanwhile,
+    # and requests for a language still loading wait on that same load
+    background_tasks.add(asyncio.create_task(preload_all(lang_codes)))
+    if settings.MODEL_IDLE_TTL:
+        background_tasks.add(asyncio.create_task(model_janitor()))
+    if settings.SERVING_MODE == "thread":
+        # Worker processes own their caches in process mode, so only the in-process engine is traffic-aware
+        from src.core.traffic import TrafficAwareEviction, prefetcher, traffic_stats
+        engine.eviction_policy = TrafficAwareEviction(traffic_stats)
+        if settings.PREFETCH_ENABLED:
+            background_tasks.add(asyncio.create_task(prefetcher.run()))
+    if settings.NODE_ROLE == "worker":
+        # Takes synthesis jobs from frontends through the broker
+        from src.core.broker import get_broker
+        from src.core.dispatch import JobWorker, node_id
+        worker = JobWorker(get_broker(settings.BROKER_URL), node_id(), inference_pool, engine, settings.NODE_HEARTBEAT)
+        background_tasks.add(asyncio.create_task(worker.run()))
 
 # CORS config
 fast_app.add_middleware(
@@ -45,7 +110,7 @@ if os.path.exists(static_dir):
     # Mount root to static for UI (index.html)
     fast_app.mount("/", StaticFiles(directory=static_dir, html=True), name="static")
 else:
-    print(f"Warning: Static directory {static_dir} not found.")
+    logger.warning("Static directory %s not found.", static_dir)
 
 # Wrap with Socket.IO
 # socket_path defaults to 'socket.io'
@@ -0,0 +1,274 @@
+import asyncio
+import io
+import json
+import logging
+import os
+import re
+import tarfile
+import time
+import zipfile
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional
+
+from src.core.audio import encode_audio
+from src.core.batcher import scheduler
+from src.core.chunker import prepare_chunks
+from src.core.config import settings, LANG_MAP
+from src.core.tts_engine import engine
+from src.core.workers import io_executor
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.jsonl"
+# File extension per output format
+EXTENSIONS = {"wav": "wav", "opus": "ogg", "mp3": "mp3", "flac": "flac"}
+
+
+class BatchItem:
+    def __init__(self, id: str, text: str, language: str):
+        self.id = id
+        self.text = text
+        self.language = language.lower()
+        self.lang_code = LANG_MAP.get(self.language, "eng")
+
+
+def parse_items(records: Iterable[dict]) -> List[BatchItem]:
+    """
+    Validates (text, language[, id]) records. Items without an id are numbered
+    by position, so rerunning the same input resumes with the same names.
+    """
+    items = []
+    seen = set()
+    for index, record in enumerate(records):
+        if not isinstance(record, dict):
+            raise ValueError(f"Item {index}: not an object")
+        text = record.get("text") or ""
+        language = record.get("language") or "english"
+        if not isinstance(text, str) or not isinstance(language, str):
+            raise ValueError(f"Item {index}: text and language must be strings")
+        text = text.strip()
+        if not text:
+            raise ValueError(f"Item {index}: no text")
+        item_id = str(record.get("id") or f"{index:06d}")
+        if not re.fullmatch(r"[\w.-]+", item_id) or item_id in seen:
+            raise ValueError(f"Item {index}: invalid or duplicate id {item_id!r}")
+        seen.add(item_id)
+        items.append(BatchItem(item_id, text, language))
+    return items
+
+
+def parse_jsonl(lines: Iterable[str]) -> List[BatchItem]:
+    return parse_items(json.loads(line) for line in lines if line.strip())
+
+
+def plan(items: List[BatchItem]) -> "OrderedDict[str, List[BatchItem]]":
+    """
+    Groups items by language so each model is loaded once, largest group
+    first. Within a group, items are sorted by length so micro-batches hold
+    texts of similar length and waste little on padding.
+    """
+    groups: Dict[str, List[BatchItem]] = {}
+    for item in items:
+        groups.setdefault(item.lang_code, []).append(item)
+    ordered = OrderedDict()
+    for lang_code in sorted(groups, key=lambda code: -len(groups[code])):
+        ordered[lang_code] = sorted(groups[lang_code], key=lambda item: len(item.text))
+    return ordered
+
+
+class DirectoryWriter:
+    """
+    Writes one file per item plus manifest.jsonl. The manifest records
+    finished items, so a rerun into the same directory skips them.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.manifest = os.path.join(path, MANIFEST)
+
+    def completed(self) -> set:
+        done = set()
+        if os.path.exists(self.manifest):
+            with open(self.manifest) as f:
+                for line in f:
+                    try:
+                        done.add(json.loads(line)["id"])
+                    except (ValueError, KeyError):
+                        # A line cut short by an interrupted run
+                        continue
+        return done
+
+    def write(self, name: str, payload: bytes, record: dict):
+        target = os.path.join(self.path, name)
+        tmp = target + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(payload)
+        os.replace(tmp, target)
+        # The manifest line goes last: an item is done only once its file is complete
+        with open(self.manifest, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def close(self):
+        return None
+
+
+class _Sink(io.RawIOBase):
+    """Write-only stream whose output is drained as archive entries are added."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer += data
+        return len(data)
+
+    def drain(self) -> bytes:
+        data, self.buffer = bytes(self.buffer), bytearray()
+        return data
+
+
+class ArchiveWriter:
+    """
+    Streams a zip or tar archive: drain() returns the bytes of entries added
+    so far. The manifest is added as the last entry on close.
+    """
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.sink = _Sink()
+        self.records = []
+        if kind == "zip":
+            # Audio is already compressed or doesn't compress much; stored entries stream fastest
+            self.archive = zipfile.ZipFile(self.sink, "w", compression=zipfile.ZIP_STORED)
+        elif kind == "tar":
+            self.archive = tarfile.open(fileobj=self.sink, mode="w|")
+        else:
+            raise ValueError(f"Unsupported archive: {kind}")
+
+    def completed(self) -> set:
+        return set()
+
+    def _add(self, name, payload):
+        if self.kind == "zip":
+            self.archive.writestr(name, payload)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(payload)
+            info.mtime = int(time.time())
+            self.archive.addfile(info, io.BytesIO(payload))
+
+    def write(self, name: str, payload: bytes, record: dict):
+        self._add(name, payload)
+        self.records.append(record)
+
+    def close(self):
+        self._add(MANIFEST, "".join(json.dumps(r) + "\n" for r in self.records).encode("utf-8"))
+        self.archive.close()
+
+    def drain(self) -> bytes:
+        return self.sink.drain()
+
+
+class BatchRunner:
+    """
+    Renders many items through the regular pipeline for throughput: one
+    language at a time (the next language's model loads in the background
+    while the current one runs), translation in batched round trips, and
+    enough items in flight to fill every micro-batch.
+    """
+
+    def __init__(self, items: List[BatchItem], writer, fmt: str = "wav", sample_rate: int = None,
+                 translate: bool = True, concurrency: int = 0, skip: Iterable[str] = ()):
+        self.writer = writer
+        self.fmt = fmt
+        self.sample_rate = sample_rate
+        self.translate = translate
+        # Enough concurrent items to keep every inference worker busy with full batches
+        self.concurrency = concurrency or settings.BATCH_MAX_SIZE * max(1, settings.INFERENCE_WORKERS) * 2
+        done = set(skip) | writer.completed()
+        self.total = len(items)
+        self.skipped = sum(1 for item in items if item.id in done)
+        self.groups = plan([item for item in items if item.id not in done])
+        self.done = 0
+        self.failed = []
+        self.audio_seconds = 0.0
+
+    def _prefetch(self, lang_code):
+        if settings.NODE_ROLE == "frontend":
+            return
+        stats = engine.stats()
+        if lang_code not in stats["models"] and len(stats["models"]) + len(stats["loading"]) < engine.max_models:
+            engine.prefetch(lang_code)
+
+    async def _render(self, item: BatchItem, text: str):
+        loop = asyncio.get_event_loop()
+        chunks = prepare_chunks(text, item.lang_code, first_budget=settings.CHUNK_TOKEN_BUDGET)
+        waveform, sr = await scheduler.submit_chunks(chunks or [text], item.lang_code)
+        payload, out_rate = await loop.run_in_executor(
+            io_executor, encode_audio, waveform, sr, self.fmt, self.sample_rate)
+        name = f"{item.id}.{EXTENSIONS[self.fmt]}"
+        record = {
+            "id": item.id,
+            "file": name,
+            "language": item.language,
+            "text": item.text,
+            "seconds": round(len(waveform) / sr, 3),
+            "sample_rate": out_rate,
+        }
+        self.audio_seconds += len(waveform) / sr
+        return name, payload, record
+
+    async def run(self, on_item: Optional[Callable] = None):
+        """
+        Renders every pending item, handing each finished one to the writer.
+        on_item(runner, record_or_error) is called after each item.
+        """
+        loop = asyncio.get_event_loop()
+        lang_codes = list(self.groups)
+        for position, lang_code in enumerate(lang_codes):
+            items = self.groups[lang_code]
+            if position + 1 < len(lang_codes):
+                self._prefetch(lang_codes[position + 1])
+            texts = [item.text for item in items]
+            if self.translate:
+                texts = await loop.run_in_executor(io_executor, engine.translate_batch_if_needed, texts, lang_code)
+
+            pending = set()
+            for item, text in zip(items, texts):
+                if len(pending) >= self.concurrency:
+                    finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    await self._collect(finished, on_item)
+                task = asyncio.ensure_future(self._render(item, text))
+                task.item = item
+                pending.add(task)
+            if pending:
+                finished, _ = await asyncio.wait(pending)
+                await self._collect(finished, on_item)
+
+    async def _collect(self, finished, on_item):
+        for task in finished:
+            try:
+                name, payload, record = task.result()
+            except Exception as e:
+                logger.error("Batch item %s failed: %s", task.item.id, e)
+                self.failed.append({"id": task.item.id, "error": str(e)})
+                result = self.failed[-1]
+            else:
+                self.writer.write(name, payload, record)
+                self.done += 1
+                result = record
+            if on_item is not None:
+                await on_item(self, result)
+
+    def summary(self) -> dict:
+        return {
+            "total": self.total,
+            "skipped": self.skipped,
+            "done": self.done,
+            "failed": self.failed,
+            "audio_seconds": round(self.audio_seconds, 3),
+        }
@@ -1,37 +1,236 @@
 import socketio
 import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from socketio.async_pubsub_manager import AsyncPubSubManager
+
+from src.core.broker import Broker, get_broker
+from src.core.chunker import IncrementalChunker
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class StreamRegistry:
+    """
+    Active synthesis streams per socket session, so a stream can be cancelled
+    by the client or aborted when its session disconnects.
+    """
+
+    def __init__(self):
+        self.streams = {} # {sid: {stream_id: asyncio.Task}}
+
+    @contextmanager
+    def track(self, sid: str, stream_id: str):
+        """Registers the current task as stream_id of sid for the duration of the block."""
+        self.streams.setdefault(sid, {})[stream_id] = asyncio.current_task()
+        try:
+            yield
+        finally:
+            session = self.streams.get(sid, {})
+            session.pop(stream_id, None)
+            if not session:
+                self.streams.pop(sid, None)
+
+    def cancel(self, sid: str, stream_id: str = None) -> int:
+        """Cancels one stream of sid, or all of them. Returns how many were cancelled."""
+        session = self.streams.get(sid, {})
+        tasks = [session[stream_id]] if stream_id in session else [] if stream_id else list(session.values())
+        for task in tasks:
+            task.cancel()
+        return len(tasks)
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self.streams),
+            "streams": sum(len(session) for session in self.streams.values()),
+        }
+
+class TextFeed:
+    """
+    Text of one incremental session (text_delta ... text_end). Deltas are cut
+    into segments as soon as a clause or sentence completes; iterating the
+    feed yields them until text_end, or until no delta arrived for idle_timeout.
+    """
+
+    def __init__(self, lang_code: str, idle_timeout: float):
+        self.chunker = IncrementalChunker(lang_code)
+        self.segments = asyncio.Queue() # None marks the end
+        self.idle_timeout = idle_timeout
+        self.ended = False
+        self.received = time.perf_counter() # First delta, for time-to-first-audio
+        self.last_delta = time.monotonic()
+
+    def push(self, delta: str):
+        if not self.ended:
+            self.last_delta = time.monotonic()
+            for segment in self.chunker.feed(delta):
+                self.segments.put_nowait(segment)
+
+    def end(self):
+        if not self.ended:
+            for segment in self.chunker.close():
+                self.segments.put_nowait(segment)
+            self.ended = True
+            self.segments.put_nowait(None)
+
+    async def __aiter__(self):
+        while True:
+            try:
+                timeout = None if self.ended else max(0.0, self.last_delta + self.idle_timeout - time.monotonic())
+                segment = await asyncio.wait_for(self.segments.get(), timeout)
+            except asyncio.TimeoutError:
+                if time.monotonic() - self.last_delta >= self.idle_timeout:
+                    logger.warning("Incremental text idle for %.0fs, ending the session", self.idle_timeout)
+                    self.end()
+                continue
+            if segment is None:
+                return
+            yield segment
+
+class ProgressReporter:
+    """
+    Progress of one request, emitted only to that request's room.
+
+    Percentages come from completed pipeline stages (done / expected). Updates
+    closer together than min_interval are coalesced so only the latest one is
+    sent; finish() always sends immediately.
+    """
+
+    def __init__(self, manager, request_id: str, steps: int, min_interval: float):
+        self.manager = manager
+        self.request_id = request_id
+        self.steps = max(1, steps)
+        self.done = 0
+        self.min_interval = min_interval
+        self.last_emit = 0.0
+        self.pending = None # Latest coalesced update not sent yet
+        self.timer = None
+
+    def expect(self, steps: int):
+        """Adds pipeline steps discovered along the way (e.g. stream chunks)."""
+        self.steps += steps
+
+    def advance(self, message: str, steps: int = 1):
+        """Records completed pipeline step(s) and reports progress."""
+        self.done = min(self.steps, self.done + steps)
+        self.pending = {'message': message, 'percent': int(100 * self.done / self.steps), 'request_id': self.request_id}
+        loop = asyncio.get_running_loop()
+        wait = self.last_emit + self.min_interval - loop.time()
+        if wait <= 0:
+            self._flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(wait, self._flush)
+
+    def _flush(self):
+        self.timer = None
+        if self.pending is not None:
+            payload, self.pending = self.pending, None
+            self.last_emit = asyncio.get_running_loop().time()
+            self.manager.spawn(self.manager.emit_progress(payload, request_id=self.request_id))
+
+    async def status(self, status: str, details: dict = None):
+        await self.manager.emit_status(status, details, request_id=self.request_id)
+
+    async def finish(self, status: str, details: dict = None):
+        """Sends any coalesced update, then the final status."""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if self.pending is not None:
+            payload, self.pending = self.pending, None
+            await self.manager.emit_progress(payload, request_id=self.request_id)
+        await self.status(status, details)
+
+class BrokerClientManager(AsyncPubSubManager):
+    """
+    Socket.IO client manager on the shared broker, so emits to rooms and to
+    clients connected to other nodes reach them. Emits to a client connected
+    to this node (audio chunks, frames) are delivered locally without
+    going through the broker.
+    """
+    name = 'broker'
+
+    def __init__(self, broker: Broker, channel='socketio'):
+        super().__init__(channel=channel)
+        self.broker = broker
+
+    async def emit(self, event, data, namespace=None, room=None, skip_sid=None, callback=None, to=None, **kwargs):
+        room = to or room
+        if room is not None and self.is_connected(room, namespace or '/'):
+            kwargs['ignore_queue'] = True
+        return await super().emit(event, data, namespace=namespace, room=room, skip_sid=skip_sid,
+                                  callback=callback, **kwargs)
+
+    async def _publish(self, data):
+        await self.broker.publish(self.channel, self.json.dumps(data).encode('utf-8'))
+
+    async def _listen(self):
+        async for message in await self.broker.subscribe(self.channel):
+            yield message
 
 class SocketManager:
     def __init__(self):
-        self.sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins='*')
+        # With a BROKER_URL, emits are shared between every node of the deployment
+        client_manager = BrokerClientManager(get_broker(settings.BROKER_URL)) if settings.BROKER_URL else None
+        self.sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins='*', client_manager=client_manager)
         self.app = socketio.ASGIApp(self.sio)
+        self.streams = StreamRegistry()
+        self.text_feeds = {} # {sid: TextFeed} of incremental text sessions
+        # Strong references to fire-and-forget emits
+        self.tasks = set()
         self.setup_handlers()
 
     def setup_handlers(self):
         @self.sio.event
         async def connect(sid, environ):
-            print(f"Socket Client connected: {sid}")
+            logger.info("Socket Client connected: %s", sid)
             await self.sio.emit('status', {'msg': 'Connected to TTS Server'}, to=sid)
 
         @self.sio.event
         async def disconnect(sid):
-            print(f"Socket Client disconnected: {sid}")
+            logger.info("Socket Client disconnected: %s", sid)
             
+        @self.sio.on('subscribe')
+        async def on_subscribe(sid, data):
+            """Join a request's room to receive its progress and status (REST clients pick the id via X-Request-ID)."""
+            request_id = (data or {}).get('request_id')
+            if request_id:
+                await self.sio.enter_room(sid, self.room(request_id))
+
+        @self.sio.on('unsubscribe')
+        async def on_unsubscribe(sid, data):
+            request_id = (data or {}).get('request_id')
+            if request_id:
+                await self.sio.leave_room(sid, self.room(request_id))
+
         @self.sio.on('ping')
         async def on_ping(sid, data):
-            print(f"Ping from {sid}: {data}")
+            logger.debug("Ping from %s: %s", sid, data)
             await self.sio.emit('pong', {'data': data}, to=sid)
 
-    async def emit_progress(self, message: str, percent: int = 0):
-        """Emit a progress update to all clients (broadcast)"""
-        await self.sio.emit('progress', {'message': message, 'percent': percent})
+    @staticmethod
+    def room(request_id: str) -> str:
+        return f"request:{request_id}"
+
+    def spawn(self, coro):
+        task = asyncio.ensure_future(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    def progress(self, request_id: str, steps: int) -> ProgressReporter:
+        return ProgressReporter(self, request_id, steps, settings.PROGRESS_MIN_INTERVAL)
+
+    async def emit_progress(self, payload: dict, request_id: str):
+        """Emit a progress update to the request's subscribers"""
+        await self.sio.emit('progress', payload, room=self.room(request_id))
 
-    async def emit_status(self, status: str, details: dict = None):
-        """Emit a status update"""
-        payload = {'status': status}
+    async def emit_status(self, status: str, details: dict = None, request_id: str = None):
+        """Emit a status update to the request's subscribers"""
+        payload = {'status': status, 'request_id': request_id}
         if details:
             payload.update(details)
-        await self.sio.emit('status', payload)
+        await self.sio.emit('status', payload, room=self.room(request_id))
 
 # Global instance
 socket_manager = SocketManager()
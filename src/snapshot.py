@@ -0,0 +1,123 @@
+"""
+Manages the local model store (MODEL_STORE_DIR): converts facebook/mms-tts-*
+models into memory-mappable snapshots once, so servers load them without
+going through from_pretrained.
+
+    python -m src.snapshot bake english hindi tel      # e.g. in a Dockerfile RUN step
+    python -m src.snapshot bake --all --force
+    python -m src.snapshot verify                      # sha256 of every file
+    python -m src.snapshot list
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+from src.core.config import settings, LANG_MAP
+from src.core.log_config import setup_logging
+from src.core.model_store import SnapshotError, check_snapshot, export_model, model_dir
+
+logger = logging.getLogger("src.snapshot")
+
+
+def resolve(names, all_langs=False):
+    if all_langs:
+        return sorted(set(LANG_MAP.values()))
+    codes = []
+    for name in names:
+        code = LANG_MAP.get(name.lower())
+        if code is None:
+            raise SystemExit(f"Unknown language: {name}")
+        if code not in codes:
+            codes.append(code)
+    return codes
+
+
+def stored_langs():
+    codes = []
+    for code in sorted(set(LANG_MAP.values())):
+        if os.path.isdir(model_dir(code)):
+            codes.append(code)
+    return codes
+
+
+def bake(args):
+    failed = 0
+    for code in resolve(args.languages, args.all):
+        path = model_dir(code)
+        if not args.force:
+            try:
+                check_snapshot(path)
+                logger.info("%s: up to date at %s", code, path)
+                continue
+            except SnapshotError:
+                pass
+        started = time.monotonic()
+        try:
+            export_model(code)
+        except Exception as e:
+            logger.error("%s: export failed: %s", code, e)
+            failed += 1
+            continue
+        manifest = check_snapshot(path, verify_hashes=True)
+        logger.info("%s: exported to %s in %.1fs (%.1f MB, %s)", code, path, time.monotonic() - started,
+                    sum(f["bytes"] for f in manifest["files"].values()) / 1e6, manifest["dtype"])
+    return 1 if failed else 0
+
+
+def verify(args):
+    failed = 0
+    for code in resolve(args.languages) if args.languages else stored_langs():
+        try:
+            check_snapshot(model_dir(code), verify_hashes=True)
+            logger.info("%s: ok", code)
+        except SnapshotError as e:
+            logger.error("%s: %s", code, e)
+            failed += 1
+    return 1 if failed else 0
+
+
+def list_snapshots(args):
+    entries = {}
+    for code in stored_langs():
+        path = model_dir(code)
+        try:
+            manifest = check_snapshot(path)
+        except SnapshotError as e:
+            entries[code] = {"path": path, "error": str(e)}
+            continue
+        entries[code] = {
+            "path": path,
+            "revision": manifest["revision"],
+            "dtype": manifest["dtype"],
+            "bytes": sum(f["bytes"] for f in manifest["files"].values()),
+        }
+    print(json.dumps(entries, indent=2))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    bake_parser = commands.add_parser("bake", help="Export snapshots (skips ones that are up to date)")
+    bake_parser.add_argument("languages", nargs="*", help="Language names or codes")
+    bake_parser.add_argument("--all", action="store_true", help="Every supported language")
+    bake_parser.add_argument("--force", action="store_true", help="Re-export even if up to date")
+    bake_parser.set_defaults(run=bake)
+    verify_parser = commands.add_parser("verify", help="Check the sha256 of every snapshot file")
+    verify_parser.add_argument("languages", nargs="*", help="Language names or codes (default: all stored)")
+    verify_parser.set_defaults(run=verify)
+    list_parser = commands.add_parser("list", help="Show stored snapshots")
+    list_parser.set_defaults(run=list_snapshots)
+    args = parser.parse_args()
+
+    setup_logging(settings.LOG_LEVEL, settings.LOG_FORMAT)
+    if args.command == "bake" and not args.languages and not args.all:
+        parser.error("bake needs languages or --all")
+    sys.exit(args.run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import os
+import sys
+
+import pytest
+
+# Run from anywhere: the app and benchmarks import as src.* / benchmarks.*
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def tiny_engine(monkeypatch):
+    """MMSEngine whose models are tiny random VITS models (no download), noise off."""
+    import torch
+
+    from benchmarks.tiny_model import load_tiny_model
+    from src.core.tts_engine import MMSEngine
+
+    torch.manual_seed(0)
+    engine = MMSEngine()
+    engine.loads = []
+
+    def load(lang_code):
+        engine.loads.append(lang_code)
+        return load_tiny_model(lang_code, deterministic=True)
+
+    monkeypatch.setattr(engine, "_load_model", load)
+    yield engine
+    engine.loader.shutdown(wait=True)
+
+
+@pytest.fixture
+def shared_engine(tiny_engine, monkeypatch):
+    """tiny_engine installed as the shared engine singleton, for the routes and services using it."""
+    # Imported before patching, so none of them keeps tiny_engine once the test is over
+    import src.api.routes, src.batch  # noqa: F401
+    from src.core import tts_engine
+
+    shared = tts_engine.engine
+    for module in list(sys.modules.values()):
+        if module is not None and module.__name__.startswith("src.") and getattr(module, "engine", None) is shared:
+            monkeypatch.setattr(module, "engine", tiny_engine)
+    return tiny_engine
+
+
+@pytest.fixture
+def client(shared_engine):
+    """TestClient for the REST routes, synthesizing with tiny models."""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from src.api.routes import router
+
+    app = FastAPI()
+    app.include_router(router)
+    with TestClient(app) as client:
+        yield client
@@ -0,0 +1,147 @@
+import io
+import struct
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from src.core.audio import (
+    PCM16_MAX, STREAMING_SIZE, WAV_HEADER_SIZE, OggOpusStream, check_format, encode_audio, encode_wav,
+    negotiate_format, normalize_inplace, pcm16_into, wav_header,
+)
+
+
+def tone(seconds=0.5, rate=16000):
+    t = np.arange(int(seconds * rate), dtype=np.float32) / rate
+    return (0.3 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+
+def test_wav_header_sizes_parse_back():
+    waveform = tone(0.25)
+    wav = encode_wav(waveform, 16000)
+    (riff, riff_size, wave, fmt, fmt_size, pcm, channels, rate, byte_rate, align, bits,
+     data, data_size) = struct.unpack_from("<4sI4s4sIHHIIHH4sI", wav)
+    assert (riff, wave, fmt, data) == (b"RIFF", b"WAVE", b"fmt ", b"data")
+    assert (fmt_size, pcm, channels, rate, byte_rate, align, bits) == (16, 1, 1, 16000, 32000, 2, 16)
+    assert data_size == waveform.size * 2 == len(wav) - WAV_HEADER_SIZE
+    assert riff_size == len(wav) - 8
+    audio, decoded_rate = sf.read(io.BytesIO(bytes(wav)), dtype="int16")
+    assert decoded_rate == 16000 and len(audio) == waveform.size
+    assert np.abs(audio).max() == PCM16_MAX
+
+
+def test_streaming_wav_header_has_unknown_sizes():
+    header = wav_header(24000)
+    assert len(header) == WAV_HEADER_SIZE
+    assert struct.unpack_from("<I", header, 4)[0] == struct.unpack_from("<I", header, 40)[0] == STREAMING_SIZE
+
+
+def test_silence_is_not_divided_by_its_zero_peak():
+    silence = np.zeros(160, dtype=np.float32)
+    assert normalize_inplace(silence) is silence
+    assert not np.isnan(silence).any() and not silence.any()
+    wav = encode_wav(np.zeros(160, dtype=np.float32), 16000)
+    assert not any(wav[WAV_HEADER_SIZE:])
+    assert encode_wav(np.zeros(0, dtype=np.float32), 16000) == wav_header(16000, 0)
+
+
+def test_normalization_scales_the_input_in_place():
+    waveform = np.array([0.25, -0.5, 0.1], dtype=np.float32)
+    assert normalize_inplace(waveform) is waveform
+    assert waveform.min() == -PCM16_MAX
+
+
+def test_read_only_input_is_copied():
+    waveform = np.array([0.25, -0.5], dtype=np.float32)
+    waveform.flags.writeable = False
+    scaled = normalize_inplace(waveform)
+    assert scaled is not waveform
+    assert waveform[1] == -0.5 and scaled[1] == -PCM16_MAX
+
+
+def test_pcm16_is_written_into_the_callers_buffer():
+    waveform = np.array([0.5, -1.0, 0.0], dtype=np.float32)
+    buffer = bytearray(4 + waveform.size * 2)
+    assert pcm16_into(buffer, waveform, offset=4) == 6
+    assert buffer[:4] == b"\0\0\0\0"
+    assert np.frombuffer(buffer, dtype="<i2", offset=4).tolist() == [PCM16_MAX // 2, -PCM16_MAX, 0]
+    # The float input itself is what was normalized
+    assert waveform[1] == -PCM16_MAX
+
+
+@pytest.mark.parametrize("accept, expected", [
+    ("audio/mpeg", "mp3"),
+    ("audio/ogg; codecs=opus", "opus"),
+    ("audio/flac;q=0.5, audio/mpeg;q=0.9", "mp3"),
+    ("audio/ogg, audio/mpeg", "opus"), # equal quality: first listed wins
+    ("audio/mpeg;q=0, audio/x-flac", "flac"),
+    ("audio/wav;q=0.1, */*", "wav"),
+    ("text/html, audio/aac", "wav"),
+    ("audio/mpeg;q=abc", "mp3"), # unparseable q counts as 1
+    ("", "wav"),
+    (None, "wav"),
+])
+def test_negotiate_format(accept, expected):
+    assert negotiate_format(accept) == expected
+
+
+def test_negotiate_format_fallback():
+    assert negotiate_format("application/json", default="mp3") == "mp3"
+
+
+@pytest.mark.parametrize("fmt, sample_rate, sampling_rate", [
+    ("aac", None, None),
+    ("wav", 0, None),
+    ("wav", 96000, None),
+    ("opus", 22050, None),
+    ("opus", None, 22050),
+])
+def test_check_format_rejects(fmt, sample_rate, sampling_rate):
+    with pytest.raises(ValueError):
+        check_format(fmt, sample_rate, sampling_rate)
+
+
+@pytest.mark.parametrize("fmt, sample_rate", [("wav", 44100), ("opus", 48000), ("opus", None), ("mp3", 22050)])
+def test_check_format_accepts(fmt, sample_rate):
+    check_format(fmt, sample_rate, 16000)
+
+
+@pytest.mark.parametrize("fmt, sample_rate", [
+    ("wav", None), ("flac", None), ("flac", 24000), ("mp3", 24000), ("opus", 48000),
+])
+def test_encoded_audio_decodes_at_its_rate_and_length(fmt, sample_rate):
+    payload, rate = encode_audio(tone(), 16000, fmt, sample_rate)
+    assert rate == (sample_rate or 16000)
+    audio, decoded_rate = sf.read(io.BytesIO(bytes(payload)))
+    assert decoded_rate == rate
+    # Lossy codecs pad with encoder delay and frame rounding
+    assert len(audio) / decoded_rate == pytest.approx(0.5, abs=0.06)
+
+
+def ogg_pages(data):
+    """(header type flags, serial number) of each Ogg page, walking the page headers."""
+    position = 0
+    while position < len(data):
+        assert data[position:position + 4] == b"OggS"
+        flags = data[position + 5]
+        serial = int.from_bytes(data[position + 14:position + 18], "little")
+        segments = data[position + 26]
+        body = sum(data[position + 27:position + 27 + segments])
+        position += 27 + segments + body
+        yield flags, serial
+
+
+def test_ogg_opus_stream_is_one_stream_across_chunks():
+    stream = OggOpusStream(16000, 48000)
+    parts = [stream.write(tone(0.25)) for _ in range(4)]
+    parts.append(stream.close())
+    assert stream.close() == b""
+    data = b"".join(parts)
+    # One logical stream: every page has its serial number, one begins it and the last ends it
+    pages = list(ogg_pages(data))
+    assert len({serial for _, serial in pages}) == 1
+    assert [flags & 0x02 for flags, _ in pages].count(0x02) == 1
+    assert pages[0][0] & 0x02 and pages[-1][0] & 0x04
+    audio, rate = sf.read(io.BytesIO(data))
+    assert rate == 48000
+    assert len(audio) / rate == pytest.approx(1.0, abs=0.06)
@@ -0,0 +1,106 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from src.core.audio_cache import AudioCache
+from src.core.config import settings
+
+
+def test_key_normalizes_text_and_separates_fields():
+    key = AudioCache.make_key("hello  world", "eng", revision="main")
+    assert key == AudioCache.make_key(" hello world\n", "eng", revision="main")
+    assert key != AudioCache.make_key("hello world", "fra", revision="main")
+    assert key != AudioCache.make_key("hello world", "eng", speed=1.1, revision="main")
+    assert key != AudioCache.make_key("hello world", "eng", fmt="mp3", revision="main")
+    assert key != AudioCache.make_key("hello world", "eng", revision="other")
+
+
+def test_key_separates_inference_backends(monkeypatch):
+    keys = set()
+    for backend, quantize in [("torch", False), ("compiled", False), ("onnx", False), ("onnx", True)]:
+        monkeypatch.setattr(settings, "INFERENCE_BACKEND", backend)
+        monkeypatch.setattr(settings, "ONNX_QUANTIZE", quantize)
+        keys.add(AudioCache.make_key("hello world", "eng"))
+    assert len(keys) == 4
+
+
+def test_memory_tier_is_lru_by_bytes():
+    cache = AudioCache(max_bytes=10)
+    cache.put("a", b"aaaa", 16000)
+    cache.put("b", b"bbbb", 16000)
+    cache.get("a")
+    cache.put("c", b"cccc", 16000)
+    assert cache.get("b") is None
+    assert cache.get("a") == (b"aaaa", 16000)
+    assert cache.get("c") == (b"cccc", 16000)
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["misses"], stats["evictions"]) == (3, 1, 1)
+    assert stats["memory_bytes"] == 8
+
+
+def test_oversized_entry_skips_memory_tier():
+    cache = AudioCache(max_bytes=4)
+    cache.put("a", b"too large", 16000)
+    assert cache.get("a") is None
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    cache = AudioCache(max_bytes=0, disk_dir=str(tmp_path), disk_max_bytes=1000)
+    cache.put("ab12", b"payload", 22050)
+    restarted = AudioCache(max_bytes=100, disk_dir=str(tmp_path), disk_max_bytes=1000)
+    assert restarted.stats()["disk_bytes"] == 4 + len(b"payload")
+    assert restarted.get("ab12") == (b"payload", 22050)
+    # Promoted to memory
+    assert restarted.get("ab12") == (b"payload", 22050)
+    stats = restarted.stats()
+    assert (stats["disk_hits"], stats["memory_hits"]) == (1, 1)
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    entry = 4 + 10
+    cache = AudioCache(max_bytes=0, disk_dir=str(tmp_path), disk_max_bytes=2 * entry)
+    cache.put("aa", b"x" * 10, 16000)
+    cache.put("bb", b"y" * 10, 16000)
+    assert cache.get("aa") is not None
+    cache.put("cc", b"z" * 10, 16000)
+    assert not os.path.exists(cache._disk_path("bb"))
+    assert cache.get("bb") is None
+    assert cache.get("aa") == (b"x" * 10, 16000)
+    assert cache.get("cc") == (b"z" * 10, 16000)
+    stats = cache.stats()
+    assert stats["disk_bytes"] == 2 * entry
+    assert stats["disk_evictions"] == 1
+
+
+def test_disk_file_removed_externally_is_a_miss(tmp_path):
+    cache = AudioCache(max_bytes=0, disk_dir=str(tmp_path), disk_max_bytes=1000)
+    cache.put("aa", b"payload", 16000)
+    os.remove(cache._disk_path("aa"))
+    assert cache.get("aa") is None
+    assert cache.stats()["disk_bytes"] == 0
+
+
+class RecordingExecutor(ThreadPoolExecutor):
+    def __init__(self):
+        super().__init__(max_workers=1)
+        self.calls = []
+
+    def submit(self, fn, *args, **kwargs):
+        self.calls.append(fn.__name__)
+        return super().submit(fn, *args, **kwargs)
+
+
+def test_disk_io_runs_on_the_executor(tmp_path):
+    executor = RecordingExecutor()
+    cache = AudioCache(max_bytes=100, disk_dir=str(tmp_path), disk_max_bytes=1000)
+    cache.put("aa", b"payload", 16000, executor)
+    executor.shutdown(wait=True)
+    assert executor.calls == ["_disk_put"]
+
+    restarted = AudioCache(max_bytes=100, disk_dir=str(tmp_path), disk_max_bytes=1000)
+    executor = RecordingExecutor()
+    assert asyncio.run(restarted.get_async("aa", executor)) == (b"payload", 16000)
+    # Now in memory: answered without the executor
+    assert asyncio.run(restarted.get_async("aa", executor)) == (b"payload", 16000)
+    assert executor.calls == ["_disk_lookup"]
+    executor.shutdown()
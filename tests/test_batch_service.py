@@ -0,0 +1,156 @@
+import argparse
+import asyncio
+import io
+import json
+import tarfile
+import zipfile
+
+import pytest
+
+from src import batch
+from src.services.batch_service import ArchiveWriter, BatchRunner, DirectoryWriter, parse_items, parse_jsonl, plan
+
+
+def test_parse_items_numbers_items_without_an_id():
+    items = parse_items([{"text": " hello ", "language": "Hindi"}, {"id": "b", "text": "bye"}])
+    assert [(i.id, i.text, i.language, i.lang_code) for i in items] == [
+        ("000000", "hello", "hindi", "hin"), ("b", "bye", "english", "eng")]
+
+
+@pytest.mark.parametrize("records, error", [
+    ([{"text": ""}], "Item 0: no text"),
+    (["hello"], "Item 0: not an object"),
+    ([{"text": "a"}, {"text": 5}], "Item 1: text and language must be strings"),
+    ([{"text": "a", "language": ["eng"]}], "Item 0: text and language must be strings"),
+    ([{"id": "a b", "text": "a"}], "Item 0: invalid or duplicate id"),
+    ([{"id": "a", "text": "a"}, {"id": "a", "text": "b"}], "Item 1: invalid or duplicate id"),
+])
+def test_parse_items_rejects_malformed_records(records, error):
+    with pytest.raises(ValueError, match=error):
+        parse_items(records)
+
+
+def test_parse_jsonl_skips_blank_lines():
+    items = parse_jsonl(['{"id": "a", "text": "one"}', "", '{"id": "b", "text": "two"}\n'])
+    assert [item.id for item in items] == ["a", "b"]
+    with pytest.raises(ValueError):
+        parse_jsonl(["not json"])
+
+
+def test_plan_groups_by_language_largest_first_shortest_first():
+    items = parse_items([
+        {"id": "h1", "text": "namaste ji", "language": "hindi"},
+        {"id": "e1", "text": "a longer one"},
+        {"id": "e2", "text": "short"},
+        {"id": "e3", "text": "medium one"},
+    ])
+    groups = plan(items)
+    assert list(groups) == ["eng", "hin"]
+    assert [item.id for item in groups["eng"]] == ["e2", "e3", "e1"]
+
+
+@pytest.mark.parametrize("kind", ["zip", "tar"])
+def test_archive_writer_streams_entries_then_manifest(kind):
+    writer = ArchiveWriter(kind)
+    out = io.BytesIO()
+    writer.write("a.wav", b"first", {"id": "a"})
+    out.write(writer.drain())
+    writer.write("b.wav", b"second", {"id": "b"})
+    writer.close()
+    out.write(writer.drain())
+    out.seek(0)
+
+    if kind == "zip":
+        with zipfile.ZipFile(out) as archive:
+            names = archive.namelist()
+            entries = {name: archive.read(name) for name in names}
+    else:
+        with tarfile.open(fileobj=out) as archive:
+            names = archive.getnames()
+            entries = {name: archive.extractfile(name).read() for name in names}
+    assert names == ["a.wav", "b.wav", "manifest.jsonl"]
+    assert entries["b.wav"] == b"second"
+    assert [json.loads(line)["id"] for line in entries["manifest.jsonl"].splitlines()] == ["a", "b"]
+
+
+def test_archive_writer_rejects_unknown_kinds():
+    with pytest.raises(ValueError):
+        ArchiveWriter("rar")
+
+
+def test_directory_writer_lists_completed_items(tmp_path):
+    writer = DirectoryWriter(str(tmp_path / "out"))
+    writer.write("a.wav", b"audio", {"id": "a", "file": "a.wav"})
+    # An interrupted run can leave a partial last line
+    with open(writer.manifest, "a") as f:
+        f.write('{"id": "b", "fi')
+    assert (tmp_path / "out" / "a.wav").read_bytes() == b"audio"
+    assert not (tmp_path / "out" / "a.wav.tmp").exists()
+    assert DirectoryWriter(str(tmp_path / "out")).completed() == {"a"}
+
+
+def test_runner_skips_completed_ids(shared_engine):
+    items = parse_items([{"id": "a", "text": "hello"}, {"id": "b", "text": "there"}])
+    writer = ArchiveWriter("zip")
+    runner = BatchRunner(items, writer, translate=False, skip=["a"])
+    asyncio.run(runner.run())
+    assert runner.summary()["total"] == 2
+    assert (runner.skipped, runner.done, runner.failed) == (1, 1, [])
+    assert [record["id"] for record in writer.records] == ["b"]
+
+
+def test_cli_resumes_into_the_same_directory(shared_engine, tmp_path, capsys):
+    source = tmp_path / "items.jsonl"
+    source.write_text('{"id": "a", "text": "hello"}\n{"id": "b", "text": "there"}\n')
+    out = tmp_path / "out"
+    args = argparse.Namespace(input=str(source), archive=None, output=str(out), format="wav",
+                              sample_rate=None, no_translate=True, concurrency=0)
+    assert asyncio.run(batch.run(args)) == 0
+    assert sorted(p.name for p in out.iterdir()) == ["a.wav", "b.wav", "manifest.jsonl"]
+
+    source.write_text(source.read_text() + '{"id": "c", "text": "again"}\n')
+    capsys.readouterr()
+    assert asyncio.run(batch.run(args)) == 0
+    summary = json.loads(capsys.readouterr().out)
+    assert (summary["skipped"], summary["done"]) == (2, 1)
+    manifest = [json.loads(line)["id"] for line in (out / "manifest.jsonl").read_text().splitlines()]
+    assert sorted(manifest) == ["a", "b", "c"]
+
+
+def test_batch_route_streams_an_archive(client):
+    body = {"items": [{"id": "a", "text": "hello"}, {"id": "b", "text": "there"}], "completed": ["a"]}
+    response = client.post("/synthesize/batch?translate=false", json=body)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.namelist() == ["b.wav", "manifest.jsonl"]
+
+
+def test_batch_route_accepts_jsonl(client):
+    response = client.post("/synthesize/batch?archive=tar&translate=false", content=b'{"id": "a", "text": "hi"}\n',
+                           headers={"content-type": "application/x-ndjson"})
+    assert response.status_code == 200
+    with tarfile.open(fileobj=io.BytesIO(response.content)) as archive:
+        assert archive.getnames() == ["a.wav", "manifest.jsonl"]
+
+
+@pytest.mark.parametrize("body", [
+    [{"text": "hello"}],
+    "hello",
+    5,
+    {"items": {"text": "hello"}},
+    {"items": [{"text": "hello"}], "completed": "a"},
+    {"items": [{"text": "hello"}], "completed": [["a"]]},
+    {"items": ["hello"]},
+    {"items": [{"text": 5}]},
+    {"items": [{"text": "hello", "language": 5}]},
+    {"items": []},
+])
+def test_batch_route_rejects_malformed_bodies(client, body):
+    response = client.post("/synthesize/batch", json=body)
+    assert response.status_code == 400
+
+
+def test_batch_route_rejects_bad_jsonl_and_archives(client):
+    assert client.post("/synthesize/batch", content=b"{not json").status_code == 400
+    assert client.post("/synthesize/batch?archive=rar", json={"items": [{"text": "a"}]}).status_code == 400
@@ -0,0 +1,113 @@
+import asyncio
+
+import numpy as np
+
+from src.core import batcher
+from src.core.tts_engine import engine
+
+
+def test_batch_token_budget_uses_tokenizer_tokens(monkeypatch):
+    # Two 10-character texts are 21 tokens each: within 42, over 41 as one batch
+    text = "a" * 10
+    assert engine.count_tokens(text, "eng") == 21
+
+    def batches(max_batch_tokens):
+        scheduler = batcher.BatchScheduler(max_batch_size=8, max_wait_ms=50, max_batch_tokens=max_batch_tokens)
+        sizes = []
+
+        async def run_batch(key, jobs):
+            sizes.append(len(jobs))
+            for job in jobs:
+                job.future.set_result((np.zeros(4, dtype=np.float32), 16000))
+        monkeypatch.setattr(scheduler, "_run_batch", run_batch)
+
+        async def submit_both():
+            await asyncio.gather(scheduler.submit(text), scheduler.submit(text))
+        asyncio.run(submit_both())
+        return sizes
+
+    assert batches(42) == [2]
+    assert batches(41) == [1, 1]
+
+
+class FakeSynthesis:
+    """Stands in for BatchScheduler.submit: each text finishes when the test releases it."""
+
+    def __init__(self):
+        self.started = []
+        self.cancelled = []
+        self.done = {}
+
+    async def submit(self, text, lang="eng", speed=1.0):
+        self.started.append(text)
+        self.done[text] = asyncio.Event()
+        try:
+            await self.done[text].wait()
+        except asyncio.CancelledError:
+            self.cancelled.append(text)
+            raise
+        return np.full(4, float(text), dtype=np.float32), 16000
+
+
+async def settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+def stream_with(monkeypatch, lookahead, texts):
+    scheduler = batcher.BatchScheduler(max_batch_size=8, max_wait_ms=0, max_batch_tokens=1000)
+    synthesis = FakeSynthesis()
+    monkeypatch.setattr(scheduler, "submit", synthesis.submit)
+    monkeypatch.setattr(batcher.traffic_stats, "record", lambda lang_code, now=None: None)
+    return scheduler.stream(texts, lookahead=lookahead), synthesis
+
+
+def test_stream_yields_in_order_when_later_chunks_finish_first(monkeypatch):
+    async def run():
+        results, synthesis = stream_with(monkeypatch, 3, ["0", "1", "2", "3"])
+        first = asyncio.ensure_future(results.__anext__())
+        await settle()
+        for text in ["3", "2", "1"]:
+            synthesis.done[text].set()
+        await settle()
+        assert not first.done()
+        synthesis.done["0"].set()
+        yielded = [await first] + [item async for item in results]
+        return [(index, result[0][0]) for index, result, _ in yielded]
+    assert asyncio.run(run()) == [(0, 0.0), (1, 1.0), (2, 2.0), (3, 3.0)]
+
+
+def test_stream_keeps_lookahead_chunks_in_flight(monkeypatch):
+    async def run():
+        results, synthesis = stream_with(monkeypatch, 2, [str(i) for i in range(6)])
+        first = asyncio.ensure_future(results.__anext__())
+        await settle()
+        # The chunk to be consumed next plus `lookahead` ahead of it
+        assert synthesis.started == ["0", "1", "2"]
+        for text in synthesis.started:
+            synthesis.done[text].set()
+        await first
+        await settle()
+        # Still held by the consumer: nothing new starts until it asks for the next chunk
+        assert synthesis.started == ["0", "1", "2"]
+        second = asyncio.ensure_future(results.__anext__())
+        await settle()
+        assert synthesis.started == ["0", "1", "2", "3"]
+        await second
+        await results.aclose()
+    asyncio.run(run())
+
+
+def test_closing_the_stream_cancels_pending_chunks(monkeypatch):
+    async def run():
+        results, synthesis = stream_with(monkeypatch, 2, [str(i) for i in range(6)])
+        first = asyncio.ensure_future(results.__anext__())
+        await settle()
+        synthesis.done["0"].set()
+        await first
+        await results.aclose()
+        await settle()
+        return synthesis
+    synthesis = asyncio.run(run())
+    assert synthesis.started == ["0", "1", "2"]
+    assert sorted(synthesis.cancelled) == ["1", "2"]
@@ -0,0 +1,82 @@
+from src.core.chunker import IncrementalChunker, prepare_chunks, split_into_chunks
+from src.core.segmenter import Segment
+
+
+def words(piece):
+    return len(piece.split())
+
+
+def chunks(text, lang="eng", budget=6, first_budget=None):
+    return split_into_chunks(text, lang, budget, first_budget or budget, count_tokens=words)
+
+
+def test_short_sentences_are_packed_up_to_the_budget():
+    assert chunks("One two. Three four. Five six. Seven eight.") == ["One two. Three four. Five six.", "Seven eight."]
+
+
+def test_first_chunk_uses_the_smaller_budget():
+    text = "One two. Three four. Five six. Seven eight."
+    assert chunks(text, first_budget=2) == ["One two.", "Three four. Five six. Seven eight."]
+
+
+def test_long_sentence_splits_at_clauses_then_words():
+    assert chunks("One two three, four five six, seven eight.", budget=3) == [
+        "One two three,", "four five six,", "seven eight."]
+    assert chunks("One two three four five six seven.", budget=3) == ["One two three", "four five six", "seven."]
+
+
+def test_text_without_spaces_splits_at_characters():
+    parts = split_into_chunks("一二三四五六七八九十", "eng", 4, 4, count_tokens=len)
+    assert parts == ["一二三四", "五六七八", "九十"]
+
+
+def test_latin_marks_only_split_before_whitespace():
+    assert chunks("Visit example.com for 3.5 percent off. Now.", budget=6) == [
+        "Visit example.com for 3.5 percent off.", "Now."]
+
+
+def test_danda_ends_hindi_sentences_without_a_space():
+    assert chunks("एक दो।तीन चार।", "hin", budget=2) == ["एक दो।", "तीन चार।"]
+
+
+def test_punctuation_only_fragments_join_their_neighbour():
+    assert chunks("One two three four five six. ...", budget=6) == ["One two three four five six...."]
+
+
+def test_prepare_chunks_normalizes_and_routes_mixed_script_runs():
+    parts = prepare_chunks("मुझे 2-3 दिन चाहिए। Please call me tomorrow.", "hin")
+    assert parts == ["मुझे दो से तीन दिन चाहिए।", "Please call me tomorrow."]
+    assert not isinstance(parts[0], Segment)
+    assert isinstance(parts[1], Segment) and parts[1].lang_code == "eng"
+
+
+def feed_all(chunker, deltas):
+    return [chunker.feed(delta) for delta in deltas] + [chunker.close()]
+
+
+def test_incremental_waits_for_whitespace_after_a_mark():
+    chunker = IncrementalChunker("eng", budget=50, min_tokens=3, count_tokens=words)
+    assert feed_all(chunker, ["Hello", " there.", " It is 3", ".5 degrees", " now."]) == [
+        [], [], ["Hello there."], [], [], ["It is 3.5 degrees now."]]
+
+
+def test_incremental_cuts_clauses_once_min_tokens_are_buffered():
+    chunker = IncrementalChunker("eng", budget=50, min_tokens=3, count_tokens=words)
+    assert chunker.feed("Hi, there, ") == []
+    assert chunker.feed("how are you, my friend") == ["Hi, there, how are you,"]
+    assert chunker.close() == ["my friend"]
+
+
+def test_incremental_cuts_before_the_last_word_over_the_budget():
+    chunker = IncrementalChunker("eng", budget=5, min_tokens=3, count_tokens=words)
+    assert chunker.feed("one two three four five sev") == ["one two three four five"]
+    assert chunker.feed("en") == []
+    assert chunker.close() == ["seven"]
+
+
+def test_incremental_danda_and_punctuation_only_leftovers():
+    chunker = IncrementalChunker("hin", budget=50, min_tokens=3, count_tokens=words)
+    assert chunker.feed("एक दो।तीन") == ["एक दो।"]
+    assert chunker.close() == ["तीन"]
+    chunker = IncrementalChunker("eng", budget=50, min_tokens=3, count_tokens=words)
+    assert feed_all(chunker, ["Hi there. ...", " "]) == [["Hi there."], [], []]
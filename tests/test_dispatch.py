@@ -0,0 +1,134 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from src.core import dispatch
+from src.core.broker import InMemoryBroker
+from src.core.dispatch import (JOBS_QUEUE, RESULTS_CHANNEL, JobWorker, RemoteInferencePool, decode_job,
+                               decode_result, encode_job, encode_result)
+from src.core.tts_engine import synthesize_batch_job
+
+
+def test_job_round_trip():
+    message = encode_job("j1", "front", "synthesize_batch", ["hello", "world"], "eng", 1.1, "req")
+    assert decode_job(message) == {
+        "id": "j1", "reply_to": "front", "type": "synthesize_batch", "texts": ["hello", "world"],
+        "lang_code": "eng", "speed": 1.1, "request_id": "req",
+    }
+
+
+@pytest.mark.parametrize("change", [
+    {"type": "os.system"},
+    {"texts": "hello"},
+    {"texts": [1]},
+    {"speed": "fast"},
+    {"lang_code": None},
+    {"request_id": 5},
+])
+def test_jobs_outside_the_schema_are_rejected(change):
+    job = json.loads(encode_job("j1", "front", "synthesize_batch", ["hi"], "eng", 1.0))
+    job.update(change)
+    with pytest.raises(ValueError):
+        decode_job(json.dumps(job).encode())
+
+
+def test_non_json_jobs_are_rejected():
+    with pytest.raises(ValueError):
+        decode_job(b"\x80\x04K\x01.")
+
+
+def test_result_round_trip():
+    results = [(np.arange(3, dtype=np.float32), 16000), (np.ones(2, dtype=np.float64), 22050)]
+    job_id, decoded, error = decode_result(encode_result("j1", results))
+    assert (job_id, error) == ("j1", None)
+    assert [(w.tolist(), sr) for w, sr in decoded] == [([0.0, 1.0, 2.0], 16000), ([1.0, 1.0], 22050)]
+    assert decode_result(encode_result("j2", None, "RuntimeError: boom")) == ("j2", None, "RuntimeError: boom")
+    with pytest.raises(ValueError):
+        decode_result(encode_result("j1", results)[:-4])
+
+
+class FakePool:
+    workers = 1
+
+    def __init__(self):
+        self.jobs = []
+
+    async def prepare(self, lang_code):
+        pass
+
+    async def run(self, fn, texts, lang_code, speed):
+        self.jobs.append((fn, texts, lang_code, speed))
+        return [(np.full(4, len(text), dtype=np.float32), 16000) for text in texts]
+
+    def stats(self):
+        return {"queued_jobs": 0, "running_jobs": 0}
+
+
+class FakeEngine:
+    def __init__(self, models=(), loading=()):
+        self.models = {code: {} for code in models}
+        self.loading = list(loading)
+
+    def stats(self):
+        return {"models": self.models, "loading": self.loading}
+
+
+def test_jobs_run_on_worker_nodes():
+    async def main():
+        broker = InMemoryBroker("test-dispatch")
+        pool = FakePool()
+        worker = JobWorker(broker, "worker-1", pool, FakeEngine(["eng"]), heartbeat=0.05)
+        runner = asyncio.ensure_future(worker.run())
+        await asyncio.sleep(0.1)
+        frontend = RemoteInferencePool(broker, "front-1", queue_limit=4, per_client_limit=4, timeout=5.0)
+        try:
+            results = await frontend.run(synthesize_batch_job, ["ab", "abcd"], "eng", 1.0)
+            with pytest.raises(ValueError):
+                await frontend.run(print, ["ab"], "eng", 1.0)
+        finally:
+            runner.cancel()
+            frontend.listener.cancel()
+        return pool.jobs, results, frontend.routes
+
+    jobs, results, routes = asyncio.run(main())
+    assert jobs == [(synthesize_batch_job, ["ab", "abcd"], "eng", 1.0)]
+    assert [(w.tolist(), sr) for w, sr in results] == [([2.0] * 4, 16000), ([4.0] * 4, 16000)]
+    assert routes == {"warm": 1}
+
+
+def test_malformed_messages_dont_stop_either_side():
+    async def main():
+        broker = InMemoryBroker("test-dispatch-malformed")
+        pool = FakePool()
+        worker = JobWorker(broker, "worker-1", pool, FakeEngine(), heartbeat=0.05)
+        runner = asyncio.ensure_future(worker.run())
+        await asyncio.sleep(0.1)
+        frontend = RemoteInferencePool(broker, "front-1", queue_limit=4, per_client_limit=4, timeout=5.0)
+        await frontend.start()
+        await broker.push(JOBS_QUEUE.format("worker-1"), b"not json")
+        await broker.publish(RESULTS_CHANNEL.format("front-1"), b"\x80\x04K\x01.")
+        try:
+            results = await frontend.run(synthesize_batch_job, ["abc"], "hin", 1.0)
+        finally:
+            runner.cancel()
+            frontend.listener.cancel()
+        return results, frontend.routes
+
+    results, routes = asyncio.run(main())
+    assert results[0][0].tolist() == [3.0] * 4
+    assert routes == {"cold": 1}
+
+
+def test_worker_advertises_only_loaded_languages(monkeypatch):
+    engine = FakeEngine(models=["eng"], loading=["hin"])
+    worker = JobWorker(InMemoryBroker("test-dispatch-info"), "worker-1", FakePool(), engine, heartbeat=1.0)
+    assert worker.info()["langs"] == ["eng", "hin"]
+    engine.models, engine.loading = {}, []
+    assert worker.info()["langs"] == []
+
+    monkeypatch.setattr(dispatch.settings, "SERVING_MODE", "process")
+    monkeypatch.setattr(dispatch.settings, "PRELOAD_LANGS", ["telugu"])
+    worker = JobWorker(InMemoryBroker("test-dispatch-info"), "worker-1", FakePool(), engine, heartbeat=1.0)
+    assert worker.info()["langs"] == ["tel"]
@@ -0,0 +1,58 @@
+import logging
+
+import pytest
+
+from benchmarks.tiny_model import load_tiny_model
+from src.core import model_store
+from src.core.config import settings
+from src.core.model_store import (SnapshotError, baked_snapshot, check_snapshot, ensure_exported, load_model,
+                                  model_dir, write_snapshot)
+
+
+@pytest.fixture
+def tiny():
+    return load_tiny_model(deterministic=True)
+
+
+def test_snapshot_round_trip(tmp_path, tiny):
+    model, tokenizer = tiny
+    path = write_snapshot(model_dir("tiny", str(tmp_path)), model, tokenizer, "tiny")
+    loaded, loaded_tokenizer = load_model(path, verify_hashes=True)
+    for name, tensor in model.state_dict().items():
+        assert loaded.state_dict()[name].equal(tensor)
+    assert loaded_tokenizer("hello").input_ids == tokenizer("hello").input_ids
+
+
+def test_truncated_snapshot_is_rejected(tmp_path, tiny):
+    path = write_snapshot(model_dir("tiny", str(tmp_path)), *tiny, "tiny")
+    with open(f"{path}/{model_store.WEIGHTS_FILE}", "r+b") as f:
+        f.truncate(100)
+    with pytest.raises(SnapshotError):
+        check_snapshot(path)
+
+
+def test_baked_snapshots_come_first_and_runtime_exports_go_to_the_store(tmp_path, tiny, monkeypatch):
+    baked_root, store_root = str(tmp_path / "baked"), str(tmp_path / "store")
+    monkeypatch.setattr(settings, "MODEL_STORE_BAKED_DIR", baked_root)
+    monkeypatch.setattr(settings, "MODEL_STORE_DIR", store_root)
+    exported = []
+    monkeypatch.setattr(model_store, "export_model", lambda lang_code, root=None: exported.append(lang_code)
+                        or write_snapshot(model_dir(lang_code, root), *tiny, "tiny"))
+
+    write_snapshot(model_dir("eng", baked_root), *tiny, "tiny")
+    assert baked_snapshot("eng") == ensure_exported("eng") == model_dir("eng", baked_root)
+    assert baked_snapshot("hin") is None
+    assert ensure_exported("hin") == model_dir("hin", store_root)
+    assert exported == ["hin"]
+
+
+def test_store_is_opt_in():
+    assert settings.model_fields["MODEL_STORE_ENABLED"].default is False
+
+
+def test_half_precision_on_cpu_warns(tmp_path, tiny, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "MODEL_STORE_DTYPE", "float16")
+    path = write_snapshot(model_dir("tiny", str(tmp_path)), *tiny, "tiny")
+    with caplog.at_level(logging.WARNING, logger="src.core.model_store"):
+        load_model(path, device="cpu")
+    assert "float16 weights on CPU" in caplog.text
@@ -0,0 +1,105 @@
+import pytest
+
+from src.core.normalizer import normalize_text
+
+
+@pytest.mark.parametrize("text, lang, expected", [
+    ("1,234,567.89", "eng",
+     "one million two hundred thirty-four thousand five hundred sixty-seven point eight nine"),
+    ("1,50,000", "hin", "एक लाख पचास हज़ार"),
+    ("1,00,00,000", "hin", "एक करोड़"),
+    ("1 234 567,89", "fra",
+     "un million deux cent trente-quatre mille cinq cent soixante-sept virgule huit neuf"),
+    ("3.14", "eng", "three point one four"),
+    ("-5", "eng", "minus five"),
+    ("5 - 3 = 2", "eng", "five minus three equals two"),
+    ("10:30", "eng", "ten thirty"),
+    ("17.05.2024", "fra", "dix-sept mai deux mille vingt-quatre"),
+])
+def test_numbers(text, lang, expected):
+    assert normalize_text(text, lang) == expected
+
+
+def test_spaces_only_group_thousands_in_threes():
+    # French uses spaces as thousands separators; 2-digit groups are Indian only
+    assert normalize_text("71 91 80", "fra") == "soixante-et-onze quatre-vingt-onze quatre-vingts"
+    assert normalize_text("81 200 1000000", "fra") == "quatre-vingt-un mille deux cents un million"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("The 1990s and 80s were fun.", "The nineteen nineties and eighties were fun."),
+    ("The '90s", "The nineties"),
+    ("in the 1900s", "in the nineteen hundreds"),
+    ("In 1990 we met, in 2024 too.", "In nineteen ninety we met, in twenty twenty-four too."),
+    ("Born in May 1990.", "Born in May nineteen ninety."),
+    ("1500 people", "one thousand five hundred people"),
+])
+def test_years_and_decades(text, expected):
+    assert normalize_text(text, "eng") == expected
+
+
+@pytest.mark.parametrize("text, lang, expected", [
+    ("Version 2.0.1 is out.", "eng", "Version two point zero point one is out."),
+    ("v1.2.3", "eng", "v one point two point three"),
+    ("2.0.1", "fra", "deux point zéro point un"),
+    ("3.5", "fra", "trois point cinq"),
+])
+def test_versions(text, lang, expected):
+    assert normalize_text(text, lang) == expected
+
+
+@pytest.mark.parametrize("text, lang, expected", [
+    ("2-3 people", "eng", "two to three people"),
+    ("Pages 10–20.", "eng", "Pages ten to twenty."),
+    ("1990-1995", "eng", "nineteen ninety to nineteen ninety-five"),
+    ("2024-25", "eng", "twenty twenty-four to twenty-five"),
+    ("2-3 personnes", "fra", "deux à trois personnes"),
+    ("2-3 लोग", "hin", "दो से तीन लोग"),
+    # Not ranges: a score and a phone number keep their hyphen
+    ("5-3", "eng", "five - three"),
+])
+def test_ranges(text, lang, expected):
+    assert normalize_text(text, lang) == expected
+
+
+@pytest.mark.parametrize("text, lang, expected", [
+    ("555-1234", "eng", "five five five - one two three four"),
+    ("Call 555-123-4567.", "eng", "Call five five five - one two three - four five six seven."),
+    ("555.123.4567", "eng", "five five five point one two three point four five six seven"),
+    ("192.168.1.1", "eng", "one nine two point one six eight point one point one"),
+    ("98-76", "hin", "नौ आठ - सात छह"),
+])
+def test_digit_groups_read_digit_by_digit(text, lang, expected):
+    assert normalize_text(text, lang) == expected
+
+
+def test_year_cues_on_long_inputs():
+    assert normalize_text("in 1990, " * 2000, "eng") == "in nineteen ninety, " * 2000
+
+
+@pytest.mark.parametrize("text, lang, expected", [
+    ("5.5", "tam", "ஐந்து புள்ளி ஐந்து"),
+    ("Pi is 3.14.", "tel", "Pi is మూడు దశాంశం ఒకటి నాలుగు."),
+    ("It was 5.", "tam", "It was ஐந்து."),
+])
+def test_digit_languages_read_the_decimal_point(text, lang, expected):
+    assert normalize_text(text, lang) == expected
+
+
+@pytest.mark.parametrize("text, lang, expected", [
+    ("COVID-19 cases", "eng", "COVID nineteen cases"),
+    ("COVID-19.", "fra", "COVID dix-neuf."),
+    ("COVID-19", "tam", "COVID ஒன்று ஒன்பது"),
+    ("-5 and 5 - 3", "eng", "minus five and five minus three"),
+])
+def test_hyphen_between_a_word_and_digits_is_dropped(text, lang, expected):
+    assert normalize_text(text, lang) == expected
+
+
+def test_decimals_stay_in_one_chunk():
+    from src.core.chunker import split_into_chunks
+
+    text = normalize_text("விலை 5.5 ரூபாய். " * 20, "tam")
+    assert "." not in text.replace("ரூபாய்.", "")
+    for chunk in split_into_chunks(text, "tam"):
+        assert not chunk.startswith("புள்ளி") and not chunk.rstrip(". ").endswith("புள்ளி")
@@ -0,0 +1,78 @@
+import os
+
+import pytest
+import torch
+
+pytest.importorskip("onnxruntime")
+
+from benchmarks.tiny_model import load_tiny_model
+from src.core import onnx_backend
+from src.core.config import settings
+
+
+@pytest.fixture
+def onnx_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ONNX_CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture(scope="module")
+def tiny():
+    torch.manual_seed(0)
+    return load_tiny_model(deterministic=True)
+
+
+def lengths(model, tokenizer, speaking_rate=None):
+    inputs = tokenizer(["hello world", "hi"], return_tensors="pt", padding=True)
+    with torch.no_grad():
+        output = model(input_ids=inputs.input_ids, attention_mask=inputs.attention_mask, speaking_rate=speaking_rate)
+    return output.sequence_lengths.tolist()
+
+
+def test_fp32_export_matches_torch(onnx_dir, tiny):
+    model, tokenizer = tiny
+    onnx_model = onnx_backend.load_onnx_model("eng", model, tokenizer, quantize=False)
+    parity = onnx_backend.check_parity(model, onnx_model, tokenizer, onnx_backend.parity_texts(tokenizer))
+    assert onnx_backend.parity_ok(parity)
+    assert lengths(onnx_model, tokenizer, 2.0) == lengths(model, tokenizer, 2.0)
+
+
+def test_int8_is_refused_when_it_fails_parity(onnx_dir, tiny, monkeypatch):
+    model, tokenizer = tiny
+    checks = []
+    monkeypatch.setattr(onnx_backend, "check_quantization",
+                        lambda *args: checks.append(1) or {"lengths_match": False, "max_abs_diff": 2.0})
+    onnx_model = onnx_backend.load_onnx_model("eng", model, tokenizer, quantize=True)
+    assert onnx_model.path == onnx_backend.onnx_path("eng")
+    assert not os.path.exists(onnx_backend.onnx_path("eng", quantized=True))
+    # The result is kept, so later loads don't check again
+    onnx_backend.load_onnx_model("eng", model, tokenizer, quantize=True)
+    assert checks == [1]
+
+
+def test_int8_is_served_when_within_limit(onnx_dir, tiny, monkeypatch):
+    model, tokenizer = tiny
+    monkeypatch.setattr(settings, "ONNX_PARITY_MAX_DIFF", 10.0)
+    monkeypatch.setattr(onnx_backend, "check_quantization", lambda *args: {"lengths_match": True, "max_abs_diff": 0.5})
+    onnx_model = onnx_backend.load_onnx_model("eng", model, tokenizer, quantize=True)
+    assert onnx_model.path == onnx_backend.onnx_path("eng", quantized=True)
+
+
+def test_check_quantization_restores_noise(onnx_dir, tiny):
+    model, tokenizer = tiny
+    model.noise_scale, model.noise_scale_duration = 0.667, 0.8
+    try:
+        parity = onnx_backend.check_quantization(model, tokenizer, str(onnx_dir))
+    finally:
+        noise = model.noise_scale, model.noise_scale_duration
+        model.noise_scale = model.noise_scale_duration = 0.0
+    assert noise == (0.667, 0.8)
+    assert set(parity) == {"lengths_match", "max_abs_diff"}
+
+
+def test_parity_texts_use_the_vocabulary(tiny):
+    _, tokenizer = tiny
+    texts = onnx_backend.parity_texts(tokenizer)
+    assert texts == onnx_backend.parity_texts(tokenizer)
+    unk = tokenizer.unk_token_id
+    assert all(unk not in tokenizer(text).input_ids for text in texts)
@@ -0,0 +1,26 @@
+import io
+
+import soundfile as sf
+
+from src.services.socket_service import socket_manager
+
+
+def test_stream_route_sends_a_wav_stream(client):
+    response = client.post("/synthesize/stream?format=wav",
+                           json={"text": "Hello there. General Kenobi, you are a bold one.", "language": "english"})
+    assert response.status_code == 200
+    # Streaming header: sizes unknown, which soundfile reads up to the end of the data
+    audio, rate = sf.read(io.BytesIO(response.content), dtype="int16")
+    assert rate == 16000 and len(audio) > 0
+
+
+def test_stream_route_without_chunks_finishes_its_progress(client, monkeypatch):
+    statuses = []
+
+    async def emit_status(status, details=None, request_id=None):
+        statuses.append((status, request_id))
+    monkeypatch.setattr(socket_manager, "emit_status", emit_status)
+    response = client.post("/synthesize/stream", json={"text": "   ", "language": "english"},
+                           headers={"X-Request-ID": "empty-1"})
+    assert response.status_code == 400
+    assert statuses == [("error", "empty-1")]
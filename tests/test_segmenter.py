@@ -0,0 +1,37 @@
+import pickle
+
+from src.core.config import settings
+from src.core.segmenter import Segment, in_target_script, segment
+
+
+def test_single_script_text_is_one_run():
+    assert segment("नमस्ते दोस्तों, 2 बजे मिलते हैं।", "hin") == [("hin", "नमस्ते दोस्तों, 2 बजे मिलते हैं।")]
+    # All-Latin text for a Devanagari language is one English run
+    assert segment("Hello world 123", "hin") == [("eng", "Hello world 123")]
+
+
+def test_runs_split_per_script_and_keep_what_follows_them():
+    assert segment("मुझे chai चाहिए, 2 cups please।", "hin") == [
+        ("hin", "मुझे "), ("eng", "chai "), ("hin", "चाहिए, 2 "), ("eng", "cups please।")]
+    assert segment("Hello नमस्ते world", "eng") == [("eng", "Hello "), ("hin", "नमस्ते "), ("eng", "world")]
+
+
+def test_long_latin_runs_are_detected():
+    text = "Je voudrais un café au lait, s'il vous plaît, merci beaucoup. नमस्ते"
+    assert [lang for lang, _ in segment(text, "hin")] == ["fra", "hin"]
+
+
+def test_segmentation_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "SEGMENT_MIXED_SCRIPTS", False)
+    assert segment("Hello नमस्ते", "eng") == [("eng", "Hello नमस्ते")]
+
+
+def test_in_target_script():
+    assert in_target_script("नमस्ते world", "hin")
+    assert not in_target_script("hello", "hin")
+    assert not in_target_script("hello", "xyz")
+
+
+def test_segment_keeps_its_language_through_pickling():
+    chunk = pickle.loads(pickle.dumps(Segment("hello", "eng")))
+    assert chunk == "hello" and chunk.lang_code == "eng"
@@ -0,0 +1,182 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.api import socket_handlers
+from src.services.socket_service import socket_manager
+
+socket_handlers.setup_socket_handlers()
+
+
+@pytest.fixture
+def emitted(monkeypatch):
+    events = []
+
+    async def emit(event, data=None, to=None, namespace=None, callback=None, **kwargs):
+        events.append((event, data))
+        if callback is not None:
+            callback()
+
+    monkeypatch.setattr(socket_manager.sio, "emit", emit)
+    return events
+
+
+def fake_stream(results):
+    async def stream(chunks, lang, speed, lookahead=1):
+        for i, result in enumerate(results):
+            if isinstance(result, Exception):
+                yield i, None, result
+            else:
+                yield i, result, None
+    return stream
+
+
+def synthesize(text="Hello there. General Kenobi.", **data):
+    handler = socket_manager.sio.handlers["/multilingual"]["synthesize"]
+    asyncio.run(handler("sid-1", {"text": text, "language": "english", "protocol": 2, "format": "pcm", **data}))
+
+
+def names(events):
+    return [event for event, _ in events]
+
+
+def test_v2_stream_frames(emitted, monkeypatch):
+    audio = (np.zeros(160, dtype=np.float32), 16000)
+    monkeypatch.setattr(socket_handlers.scheduler, "stream", fake_stream([audio, audio]))
+    synthesize()
+    assert names(emitted) == ["stream_start", "audio_frame", "audio_frame", "stream_complete"]
+    assert emitted[0][1]["sample_rate"] == 16000
+
+
+def test_v2_stream_where_every_chunk_fails_is_an_error(emitted, monkeypatch):
+    monkeypatch.setattr(socket_handlers.scheduler, "stream",
+                        fake_stream([RuntimeError("boom"), RuntimeError("boom")]))
+    synthesize()
+    assert names(emitted) == ["error", "error", "error"]
+    assert "chunk_index" not in emitted[-1][1]
+
+
+def test_v2_stream_with_a_failed_chunk_still_completes(emitted, monkeypatch):
+    audio = (np.zeros(160, dtype=np.float32), 16000)
+    monkeypatch.setattr(socket_handlers.scheduler, "stream", fake_stream([RuntimeError("boom"), audio]))
+    synthesize()
+    assert names(emitted) == ["error", "stream_start", "audio_frame", "stream_complete"]
+
+
+def test_v2_empty_stream_starts_before_completing(emitted, monkeypatch):
+    monkeypatch.setattr(socket_handlers.scheduler, "stream", fake_stream([]))
+    synthesize()
+    assert names(emitted) == ["stream_start", "stream_complete"]
+
+
+@pytest.mark.parametrize("protocol, fmt", [(1, "wav"), (2, "pcm")])
+def test_streams_use_the_socket_speed(emitted, monkeypatch, protocol, fmt):
+    speeds = []
+    stream = fake_stream([(np.zeros(160, dtype=np.float32), 16000)])
+
+    def recording_stream(chunks, lang, speed, lookahead=1):
+        speeds.append(speed)
+        return stream(chunks, lang, speed, lookahead)
+
+    monkeypatch.setattr(socket_handlers.scheduler, "stream", recording_stream)
+    synthesize("Hello there.", protocol=protocol, format=fmt)
+    assert speeds == [socket_handlers.SOCKET_SPEED] == [1.0]
+    assert names(emitted)[-1] == "stream_complete"
+
+
+class HeldAcks:
+    """Emitter that records events and keeps audio_frame ack callbacks for the test to call."""
+
+    def __init__(self):
+        self.events = []
+        self.acks = []
+
+    async def emit(self, event, data=None, to=None, namespace=None, callback=None, **kwargs):
+        self.events.append((event, data))
+        if callback is not None:
+            self.acks.append(callback)
+
+
+def frames(events):
+    return [data[1] for event, data in events if event == "audio_frame"]
+
+
+def endless_stream(started=None, closed=None):
+    """A stream producing a chunk whenever asked, recording when its generator is closed."""
+    async def stream(chunks, lang, speed, lookahead=1):
+        try:
+            i = 0
+            while True:
+                if started is not None and i == 1:
+                    # Second chunk's synthesis never finishes
+                    started.set()
+                    await asyncio.Event().wait()
+                yield i, (np.zeros(160, dtype=np.float32), 16000), None
+                i += 1
+        finally:
+            if closed is not None:
+                closed.append(True)
+    return stream
+
+
+async def settle():
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+
+def test_v2_stream_waits_for_acks_beyond_the_window(monkeypatch):
+    emitter = HeldAcks()
+    monkeypatch.setattr(socket_manager.sio, "emit", emitter.emit)
+    monkeypatch.setattr(socket_handlers.settings, "STREAM_ACK_WINDOW", 2)
+    monkeypatch.setattr(socket_handlers.scheduler, "stream", endless_stream())
+    handler = socket_manager.sio.handlers["/multilingual"]["synthesize"]
+
+    async def run():
+        task = asyncio.ensure_future(handler("sid-1", {"text": "Hello.", "protocol": 2, "format": "pcm"}))
+        await settle()
+        assert frames(emitter.events) == [0, 1]
+        emitter.acks[0]()
+        await settle()
+        assert frames(emitter.events) == [0, 1, 2]
+        emitter.acks[1]()
+        emitter.acks[2]()
+        await settle()
+        assert frames(emitter.events) == [0, 1, 2, 3, 4]
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    asyncio.run(run())
+
+
+def test_v2_stream_aborts_when_acks_stop(monkeypatch):
+    emitter = HeldAcks()
+    monkeypatch.setattr(socket_manager.sio, "emit", emitter.emit)
+    monkeypatch.setattr(socket_handlers.settings, "STREAM_ACK_WINDOW", 1)
+    monkeypatch.setattr(socket_handlers.settings, "STREAM_ACK_TIMEOUT", 0.05)
+    closed = []
+    monkeypatch.setattr(socket_handlers.scheduler, "stream", endless_stream(closed=closed))
+    synthesize()
+    assert names(emitter.events) == ["stream_start", "audio_frame", "error"]
+    assert "acknowledging" in emitter.events[-1][1]["msg"]
+    assert closed == [True]
+    assert not socket_manager.streams.streams
+
+
+def test_cancel_stops_a_stream_mid_synthesis(emitted, monkeypatch):
+    started, closed = asyncio.Event(), []
+    monkeypatch.setattr(socket_handlers.scheduler, "stream", endless_stream(started, closed))
+    handlers = socket_manager.sio.handlers["/multilingual"]
+
+    async def run():
+        task = asyncio.ensure_future(handlers["synthesize"](
+            "sid-1", {"text": "Hello.", "protocol": 2, "format": "pcm", "request_id": "req-1"}))
+        await started.wait()
+        await handlers["cancel"]("sid-1", {"stream_id": "req-1"})
+        await asyncio.gather(task, return_exceptions=True)
+        return task
+    task = asyncio.run(run())
+    assert task.cancelled()
+    assert closed == [True]
+    assert names(emitted) == ["stream_start", "audio_frame", "stream_cancelled"]
+    assert emitted[-1][1] == {"stream_id": "req-1", "cancelled": 1}
+    assert not socket_manager.streams.streams
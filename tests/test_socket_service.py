@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from src.services.socket_service import ProgressReporter, socket_manager
+
+
+@pytest.fixture
+def emitted(monkeypatch):
+    events = []
+
+    async def emit(event, data=None, room=None, to=None, namespace=None, **kwargs):
+        events.append((event, data, room or to))
+
+    monkeypatch.setattr(socket_manager.sio, "emit", emit)
+    return events
+
+
+async def settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+def test_progress_only_reaches_the_requests_room(emitted):
+    async def run():
+        first = ProgressReporter(socket_manager, "req-1", steps=2, min_interval=0)
+        second = ProgressReporter(socket_manager, "req-2", steps=1, min_interval=0)
+        first.advance("one")
+        second.advance("other")
+        await settle()
+        await first.finish("completed")
+    asyncio.run(run())
+    assert [(event, room) for event, _, room in emitted] == [
+        ("progress", "request:req-1"), ("progress", "request:req-2"), ("status", "request:req-1")]
+    assert [data["request_id"] for _, data, _ in emitted] == ["req-1", "req-2", "req-1"]
+    assert emitted[0][1]["percent"] == 50
+
+
+def test_progress_is_coalesced_and_the_final_event_always_sent(emitted):
+    async def run():
+        progress = ProgressReporter(socket_manager, "req-1", steps=10, min_interval=0.05)
+        for step in range(1, 5):
+            progress.advance(f"step {step}")
+        await settle()
+        # The first update goes out at once, the rest wait for the interval
+        assert [data["message"] for event, data, _ in emitted] == ["step 1"]
+        while len(emitted) < 2:
+            await asyncio.sleep(0.005)
+        # Only the latest of the coalesced updates, once the interval has passed
+        assert [data["message"] for event, data, _ in emitted] == ["step 1", "step 4"]
+        # Right after an emit, so these are coalesced again
+        progress.advance("step 5")
+        progress.advance("step 6")
+        await progress.finish("completed", {"chunks": 6})
+        await asyncio.sleep(0.08)
+    asyncio.run(run())
+    assert [(event, data.get("message") or data.get("status")) for event, data, _ in emitted] == [
+        ("progress", "step 1"), ("progress", "step 4"), ("progress", "step 6"), ("status", "completed")]
+    assert emitted[-1][1] == {"status": "completed", "request_id": "req-1", "chunks": 6}
@@ -0,0 +1,62 @@
+import pytest
+import torch
+from torch._dynamo import exc
+
+from benchmarks.tiny_model import load_tiny_model
+from src.core.torch_backend import OptimizedVitsModel, length_bucket
+
+
+class FailingCompiled:
+    def __init__(self, error):
+        self.error = error
+        self.calls = 0
+
+    def __call__(self, **inputs):
+        self.calls += 1
+        raise self.error
+
+
+@pytest.fixture
+def optimized():
+    model, tokenizer = load_tiny_model(deterministic=True)
+    inputs = tokenizer(["hello world"], return_tensors="pt")
+    return OptimizedVitsModel(model, tokenizer.pad_token_id, buckets=[16, 32], compile=False), inputs
+
+
+def test_length_bucket():
+    assert length_bucket(10, [16, 32]) == 16
+    assert length_bucket(16, [32, 16]) == 16
+    assert length_bucket(33, [16, 32]) is None
+
+
+def test_padding_does_not_change_the_audio(optimized):
+    model, inputs = optimized
+    padded = model(inputs.input_ids, inputs.attention_mask).waveform
+    with torch.no_grad():
+        eager = model.model(input_ids=inputs.input_ids, attention_mask=inputs.attention_mask).waveform
+    assert padded.shape == eager.shape
+    assert torch.allclose(padded, eager, atol=1e-5)
+
+
+def test_compiler_failure_falls_back_to_eager_for_good(optimized):
+    model, inputs = optimized
+    model.compiled = FailingCompiled(exc.InvalidBackend("missing"))
+    assert model(inputs.input_ids, inputs.attention_mask).waveform.numel()
+    assert model.compiled is None
+
+
+def test_other_failures_retry_eagerly_for_that_call_only(optimized):
+    model, inputs = optimized
+    compiled = model.compiled = FailingCompiled(RuntimeError("out of memory"))
+    for _ in range(2):
+        assert model(inputs.input_ids, inputs.attention_mask).waveform.numel()
+    assert model.compiled is compiled and compiled.calls == 2
+
+
+def test_compile_errors_skip_names_missing_from_torch(monkeypatch):
+    from src.core.torch_backend import compile_errors
+
+    monkeypatch.delattr(exc, "InvalidBackend")
+    errors = compile_errors()
+    assert exc.Unsupported in errors
+    assert None not in errors and len(errors) == 3
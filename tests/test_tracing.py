@@ -0,0 +1,15 @@
+import pytest
+
+from src.core.tracing import new_request_id
+
+
+@pytest.mark.parametrize("candidate", ["abc-123", "req_1.2", 5])
+def test_client_request_id_is_kept_as_str(candidate):
+    assert new_request_id(candidate) == str(candidate)
+
+
+@pytest.mark.parametrize("candidate", [None, "", "a" * 65, "../etc", 'x"; filename="y', "room one", ["a"]])
+def test_bad_client_request_id_is_replaced(candidate):
+    request_id = new_request_id(candidate)
+    assert request_id != candidate
+    assert len(request_id) == 16 and request_id.isalnum()
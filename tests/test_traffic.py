@@ -0,0 +1,115 @@
+import asyncio
+import math
+
+import numpy as np
+
+from src.core.traffic import Prefetcher, TrafficAwareEviction, TrafficStats
+
+NOW = 1_000_000.0
+
+
+def test_recent_rate_decays_by_half_life():
+    stats = TrafficStats(half_life=60.0, hourly_weight=0.0)
+    for _ in range(10):
+        stats.record("hin", NOW)
+    rate = stats.predicted_rate("hin", NOW)
+    assert math.isclose(rate, 10 * math.log(2) / 60.0)
+    assert math.isclose(stats.predicted_rate("hin", NOW + 60.0), rate / 2)
+    assert stats.predicted_rate("tel", NOW) == 0.0
+
+
+def test_ranked_by_predicted_rate():
+    stats = TrafficStats(half_life=60.0)
+    stats.record("eng", NOW - 600)
+    for _ in range(3):
+        stats.record("hin", NOW)
+    stats.record("tel", NOW)
+    assert stats.ranked(NOW) == ["hin", "tel", "eng"]
+
+
+def test_eviction_picks_least_likely_and_lru_on_ties(monkeypatch):
+    stats = TrafficStats(half_life=60.0, hourly_weight=0.0)
+    monkeypatch.setattr("time.time", lambda: NOW)
+    for _ in range(5):
+        stats.record("eng", NOW)
+    stats.record("hin", NOW)
+    policy = TrafficAwareEviction(stats)
+    # Least recently used first; eng has the most traffic
+    assert policy(["eng", "hin", "tel"]) == "tel"
+    assert policy(["eng", "hin"]) == "hin"
+    # No traffic for either: the least recently used
+    assert policy(["tam", "tel"]) == "tam"
+
+
+class FakeEngine:
+    def __init__(self, loaded, max_models, max_bytes=0):
+        self.models = {code: {"bytes": 100} for code in loaded}
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self.loading = {}
+        self.prefetched = []
+
+    def stats(self):
+        return {"models": self.models}
+
+    def prefetch(self, lang_code):
+        self.prefetched.append(lang_code)
+        self.loading[lang_code] = None
+
+
+class FakePool:
+    def __init__(self, busy=False):
+        self.busy = busy
+
+    def stats(self):
+        return {"queued_jobs": int(self.busy), "running_jobs": 0}
+
+
+def busy_stats():
+    stats = TrafficStats(half_life=3600.0)
+    for code, count in (("hin", 5), ("tel", 3), ("tam", 2), ("eng", 1)):
+        for _ in range(count):
+            stats.record(code)
+    return stats
+
+
+def test_prefetch_fills_free_slots_with_likely_languages():
+    engine = FakeEngine(["hin"], max_models=3)
+    prefetcher = Prefetcher(engine, FakePool(), busy_stats(), interval=1.0, min_rate=0.0)
+    assert prefetcher.step() == ["tel", "tam"]
+    assert [d["lang"] for d in prefetcher.decisions] == ["tel", "tam"]
+
+
+def test_prefetch_respects_byte_budget_and_min_rate():
+    engine = FakeEngine(["hin"], max_models=5, max_bytes=250)
+    assert Prefetcher(engine, FakePool(), busy_stats(), interval=1.0, min_rate=0.0).step() == ["tel"]
+    engine = FakeEngine([], max_models=5)
+    assert Prefetcher(engine, FakePool(), busy_stats(), interval=1.0, min_rate=1.0).step() == []
+
+
+def test_no_prefetch_while_busy():
+    engine = FakeEngine([], max_models=3)
+    assert Prefetcher(engine, FakePool(busy=True), busy_stats(), interval=1.0, min_rate=0.0).step() == []
+
+
+def test_scheduler_counts_traffic_per_request_not_per_chunk(monkeypatch):
+    from src.core import batcher
+    from src.core.segmenter import Segment
+
+    recorded = []
+    monkeypatch.setattr(batcher.traffic_stats, "record", lambda lang_code, now=None: recorded.append(lang_code))
+    scheduler = batcher.BatchScheduler(max_batch_size=8, max_wait_ms=0, max_batch_tokens=1000)
+
+    async def submit(text, lang="eng", speed=1.0):
+        return np.zeros(4, dtype=np.float32), 16000
+    monkeypatch.setattr(scheduler, "submit", submit)
+
+    chunks = ["one", "two", Segment("trois", "fra"), "four"]
+    asyncio.run(scheduler.submit_chunks(chunks, "hindi"))
+    assert sorted(recorded) == ["fra", "hin"]
+
+    async def consume():
+        return [i async for i, _, _ in scheduler.stream(chunks, "english", lookahead=2)]
+    recorded.clear()
+    assert asyncio.run(consume()) == [0, 1, 2, 3]
+    assert recorded == ["eng", "fra"]
@@ -0,0 +1,137 @@
+import threading
+import time
+
+import pytest
+
+from src.core.translation import GoogleTranslationBackend, OfflineTranslationBackend, TranslationService
+
+
+def service(backend, max_entries=16, ttl=60.0):
+    return TranslationService(backend, max_entries=max_entries, ttl=ttl)
+
+
+def test_english_and_native_script_are_not_translated():
+    backend = OfflineTranslationBackend()
+    translator = service(backend)
+    assert translator.translate("hello", "eng") == "hello"
+    assert translator.translate("नमस्ते", "hin") == "नमस्ते"
+    assert backend.calls == 0
+
+
+def test_batch_is_one_round_trip_and_cached():
+    backend = OfflineTranslationBackend({("hello", "hi"): "नमस्ते", ("bye", "hi"): "अलविदा"})
+    translator = service(backend)
+    assert translator.translate_batch(["hello", "bye", "hello"], "hin") == ["नमस्ते", "अलविदा", "नमस्ते"]
+    assert translator.translate("bye", "hin") == "अलविदा"
+    assert backend.calls == 1
+
+
+def test_cache_expires_and_is_bounded():
+    backend = OfflineTranslationBackend()
+    translator = service(backend, max_entries=1, ttl=0.05)
+    translator.translate("a", "hin")
+    translator.translate("b", "hin")
+    translator.translate("b", "hin")
+    assert backend.calls == 2
+    translator.translate("a", "hin")
+    assert backend.calls == 3
+    time.sleep(0.06)
+    translator.translate("a", "hin")
+    assert backend.calls == 4
+
+
+def test_failures_fall_back_to_source_and_are_not_cached():
+    class Failing(OfflineTranslationBackend):
+        def translate_batch(self, texts, target):
+            super().translate_batch(texts, target)
+            raise RuntimeError("offline")
+
+    backend = Failing()
+    translator = service(backend)
+    assert translator.translate("hello", "hin") == "hello"
+    assert translator.translate("hello", "hin") == "hello"
+    assert backend.calls == 2
+    assert translator.inflight == {}
+
+
+def test_concurrent_requests_are_coalesced():
+    backend = OfflineTranslationBackend({("hello", "hi"): "नमस्ते"}, delay=0.1)
+    translator = service(backend)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(translator.translate("hello", "hin")))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["नमस्ते"] * 4
+    assert backend.calls == 1
+
+
+def test_base_exception_resolves_waiters():
+    started = threading.Event()
+
+    class Interrupted(OfflineTranslationBackend):
+        def translate_batch(self, texts, target):
+            started.set()
+            time.sleep(0.1)
+            raise KeyboardInterrupt
+
+    translator = service(Interrupted())
+    waiter_result = []
+
+    def owner():
+        with pytest.raises(KeyboardInterrupt):
+            translator.translate("hello", "hin")
+
+    owner_thread = threading.Thread(target=owner)
+    owner_thread.start()
+    started.wait()
+    waiter = threading.Thread(target=lambda: waiter_result.append(translator.translate("hello", "hin")))
+    waiter.start()
+    owner_thread.join()
+    waiter.join(timeout=2)
+    assert not waiter.is_alive()
+    assert waiter_result == ["hello"]
+    assert translator.inflight == {}
+
+
+def test_google_translators_are_per_thread():
+    class FakeTranslator:
+        def __init__(self, source, target):
+            self.target = target
+            self.text = None
+
+        def translate(self, text):
+            # Like deep_translator: the request text is kept on the instance while in flight
+            self.text = text
+            time.sleep(0.01)
+            return f"{self.target}:{self.text}"
+
+    backend = GoogleTranslationBackend()
+    backend._translator_cls = FakeTranslator
+    results = {}
+
+    def run(text):
+        results[text] = [backend.translate(text, "hi") for _ in range(5)]
+
+    threads = [threading.Thread(target=run, args=(f"text {i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == {f"text {i}": [f"hi:text {i}"] * 5 for i in range(4)}
+
+
+def test_google_batch_splits_lines_and_falls_back():
+    backend = GoogleTranslationBackend()
+    calls = []
+
+    def translate(text, target):
+        calls.append(text)
+        # Merges the lines of multi-line requests
+        return text.replace("\n", " ").upper() if "\n" in text else text.upper()
+
+    backend.translate = translate
+    assert backend.translate_batch(["one", "two  words"], "hi") == ["ONE", "TWO WORDS"]
+    assert calls == ["one\ntwo words", "one", "two words"]
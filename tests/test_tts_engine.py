@@ -0,0 +1,203 @@
+import pytest
+
+
+def test_speed_changes_duration(tiny_engine):
+    (normal, sr), = tiny_engine.synthesize_batch(["hello there"], "eng", speed=1.0)
+    (fast, _), = tiny_engine.synthesize_batch(["hello there"], "eng", speed=2.0)
+    (slow, _), = tiny_engine.synthesize_batch(["hello there"], "eng", speed=0.5)
+    assert len(fast) < len(normal) < len(slow)
+    assert sr == 16000
+
+
+def test_batch_results_in_input_order(tiny_engine):
+    texts = ["a", "a much longer sentence than the first one"]
+    batched = tiny_engine.synthesize_batch(texts, "eng")
+    single = [tiny_engine.synthesize(text, "eng") for text in texts]
+    assert [len(w) for w, _ in batched] == [len(w) for w, _ in single]
+
+
+def test_handle_refs_block_eviction(tiny_engine):
+    tiny_engine.max_models = 1
+    with tiny_engine.load_lang("eng") as eng:
+        assert eng.refs == 1
+        # Over budget, but eng is in use: kept until released
+        with tiny_engine.load_lang("fra"):
+            assert set(tiny_engine.loaded_models) == {"eng", "fra"}
+        # Released fra is the only evictable model
+        assert list(tiny_engine.loaded_models) == ["eng"]
+    assert eng.refs == 0
+    assert list(tiny_engine.loaded_models) == ["eng"]
+
+
+def test_cached_handle_is_shared(tiny_engine):
+    with tiny_engine.load_lang("eng") as first, tiny_engine.load_lang("eng") as second:
+        assert first is second
+        assert first.refs == 2
+    assert first.refs == 0
+    assert tiny_engine.loads == ["eng"]
+
+
+def test_concurrent_cold_loads_share_one_load(tiny_engine):
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(4) as pool:
+        handles = list(pool.map(lambda _: tiny_engine.load_lang("hin"), range(4)))
+    assert tiny_engine.loads == ["hin"]
+    assert handles[0].refs == 4
+    for handle in handles:
+        handle.release()
+
+
+def test_pinned_model_is_not_evicted(tiny_engine):
+    tiny_engine.max_models = 1
+    tiny_engine.pin("eng")
+    tiny_engine.load_lang("eng").release()
+    tiny_engine.load_lang("fra").release()
+    assert list(tiny_engine.loaded_models) == ["eng"]
+
+
+# One sample per script the served languages are written in
+SCRIPT_SAMPLES = {
+    "eng": "Hello there! It's 3.5 km, isn't it? Call 555-1234 at 10:30.",
+    "fra": "Bonjour à tous ! Ça coûte 12,50 €, n'est-ce pas ? Œuvre, ÉTÉ.",
+    "hin": "नमस्ते दुनिया। यह 1,50,000 रुपये का है, क्या आप जानते हैं?",
+    "tel": "నమస్కారం ప్రపంచం. ఇది 5.5 కిలోలు.",
+    "tam": "வணக்கம் உலகம். விலை 5.5 ரூபாய்.",
+    "mal": "നമസ്കാരം ലോകം. ഇത് 42 ആണ്.",
+    "kan": "ನಮಸ್ಕಾರ ಜಗತ್ತು. ಇದು 7 ಆಗಿದೆ.",
+    "pan": "ਸਤ ਸ੍ਰੀ ਅਕਾਲ ਦੁਨੀਆ। ਇਹ 9 ਹੈ।",
+    "guj": "નમસ્તે દુનિયા. આ 3 છે.",
+    "asm": "নমস্কাৰ পৃথিৱী। এইটো 8 হয়।",
+}
+
+
+@pytest.mark.parametrize("lang_code", sorted(SCRIPT_SAMPLES))
+def test_token_estimate_bounds_the_tokenizer(tiny_engine, lang_code):
+    # The chunker budgets with count_tokens; a tokenizer producing more would overrun the budget
+    from benchmarks.tiny_model import tiny_tokenizer
+    from src.core.chunker import split_into_chunks
+
+    text = tiny_engine.prepare_text(SCRIPT_SAMPLES[lang_code] * 4, lang_code)
+    # Like the MMS vocabularies: every (lower-cased) letter of the script is a token
+    tokenizer = tiny_tokenizer(text.lower())
+    count = lambda piece: tiny_engine.count_tokens(piece, lang_code)
+    chunks = split_into_chunks(text, lang_code, 60, 30, count)
+    assert len(chunks) > 1
+    for piece in chunks + [text]:
+        assert len(tokenizer(piece).input_ids) <= count(piece)
+
+
+def test_vits_takes_speaking_rate_per_call():
+    # synthesize_batch and both backends pass the speed as a forward() kwarg;
+    # transformers 4.x only has it as model state (requirements pin >=5)
+    import inspect
+
+    from transformers import VitsModel
+
+    assert "speaking_rate" in inspect.signature(VitsModel.forward).parameters
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    from src.core import tts_engine
+
+    clock = Clock()
+    monkeypatch.setattr(tts_engine.time, "monotonic", clock)
+    return clock
+
+
+def model_bytes(engine):
+    with engine.load_lang("eng") as handle:
+        return handle.nbytes
+
+
+def test_byte_budget_evicts_least_recently_used(tiny_engine):
+    size = model_bytes(tiny_engine)
+    assert size > 0
+    tiny_engine.max_models = 10
+    tiny_engine.max_bytes = int(2.5 * size)
+    tiny_engine.load_lang("fra").release()
+    tiny_engine.load_lang("eng").release() # eng is now the most recently used
+    tiny_engine.load_lang("hin").release()
+    assert list(tiny_engine.loaded_models) == ["eng", "hin"]
+    assert tiny_engine.stats()["resident_bytes"] == 2 * size
+
+
+def test_byte_budget_never_evicts_pinned_models(tiny_engine):
+    size = model_bytes(tiny_engine)
+    tiny_engine.max_models = 10
+    tiny_engine.max_bytes = int(1.5 * size)
+    tiny_engine.pin("eng")
+    with tiny_engine.load_lang("fra"):
+        # Over budget, but eng is pinned and fra in use
+        assert list(tiny_engine.loaded_models) == ["eng", "fra"]
+    tiny_engine.load_lang("hin").release()
+    assert list(tiny_engine.loaded_models) == ["eng"]
+
+
+def test_idle_models_expire_after_the_ttl(tiny_engine, clock):
+    tiny_engine.max_models = 10
+    tiny_engine.idle_ttl = 60
+    tiny_engine.pin("hin")
+    for lang_code in ("eng", "hin", "tel"):
+        tiny_engine.load_lang(lang_code).release()
+    clock.now += 50
+    busy = tiny_engine.load_lang("fra")
+    tiny_engine.evict_expired()
+    assert set(tiny_engine.loaded_models) == {"eng", "hin", "tel", "fra"}
+
+    clock.now += 20
+    tiny_engine.load_lang("tel").release()
+    tiny_engine.evict_expired()
+    # eng idled past the TTL; hin is pinned, tel was just used and fra is in use
+    assert set(tiny_engine.loaded_models) == {"hin", "tel", "fra"}
+
+    clock.now += 100
+    tiny_engine.evict_expired()
+    assert set(tiny_engine.loaded_models) == {"hin", "fra"}
+    busy.release()
+    tiny_engine.idle_ttl = 0
+    clock.now += 1000
+    tiny_engine.evict_expired()
+    assert set(tiny_engine.loaded_models) == {"hin", "fra"}
+
+
+def test_preload_langs_load_pinned_in_the_background(shared_engine, monkeypatch):
+    import asyncio
+    import threading
+
+    from src import main
+
+    release = threading.Event()
+    load = shared_engine._load_model
+
+    def slow_load(lang_code):
+        release.wait(5)
+        return load(lang_code)
+
+    monkeypatch.setattr(shared_engine, "_load_model", slow_load)
+    monkeypatch.setattr(main.settings, "PRELOAD_LANGS", ["english", "Hindi"])
+    monkeypatch.setattr(main.settings, "MODEL_IDLE_TTL", 0)
+    monkeypatch.setattr(main.settings, "PREFETCH_ENABLED", False)
+    monkeypatch.setattr(main, "background_tasks", set())
+
+    async def run():
+        await main.startup_event()
+        # Startup returns while the models are still loading
+        assert shared_engine.pinned == {"eng", "hin"}
+        await asyncio.sleep(0.05)
+        assert sorted(shared_engine.stats()["loading"]) == ["eng", "hin"]
+        assert not shared_engine.loaded_models
+        release.set()
+        await asyncio.gather(*main.background_tasks)
+    asyncio.run(run())
+    assert sorted(shared_engine.loads) == ["eng", "hin"]
+    assert set(shared_engine.loaded_models) == {"eng", "hin"}
@@ -0,0 +1,120 @@
+import asyncio
+import os
+import threading
+
+import numpy as np
+import pytest
+import torch
+
+from src.core.workers import InferencePool, QueueFullError
+
+
+def pool(queue_limit=3, per_client_limit=2):
+    return InferencePool(workers=2, torch_threads=torch.get_num_threads(),
+                         queue_limit=queue_limit, per_client_limit=per_client_limit)
+
+
+def test_admission_limits_per_client_and_in_total():
+    inference = pool()
+    first = inference.admit("a")
+    inference.admit("a")
+    with pytest.raises(QueueFullError):
+        inference.admit("a")
+    inference.admit("b")
+    with pytest.raises(QueueFullError):
+        inference.admit("c")
+    stats = inference.stats()
+    assert (stats["admitted_requests"], stats["total_admitted"], stats["total_rejected"]) == (3, 3, 2)
+
+    first.release()
+    first.release() # idempotent
+    inference.admit("c")
+    assert inference.admitted == {"a": 1, "b": 1, "c": 1}
+
+
+def test_admission_is_released_as_context_manager():
+    inference = pool(queue_limit=1)
+    with inference.admit("a"):
+        with pytest.raises(QueueFullError):
+            inference.admit("b")
+    with inference.admit("b"):
+        pass
+    assert not inference.admitted
+
+
+def test_run_uses_worker_threads():
+    inference = pool()
+
+    async def main():
+        await inference.start()
+        names = await asyncio.gather(*(inference.run(lambda: threading.current_thread().name) for _ in range(4)))
+        return names
+
+    names = asyncio.run(main())
+    assert all(name.startswith("inference") for name in names)
+    stats = inference.stats()
+    assert (stats["queued_jobs"], stats["running_jobs"]) == (0, 0)
+    inference.executor.shutdown()
+
+
+def test_default_threads_split_cores_between_workers(monkeypatch):
+    monkeypatch.setattr("os.cpu_count", lambda: 8)
+    assert InferencePool(workers=3, torch_threads=0, queue_limit=1, per_client_limit=1).torch_threads == 2
+    assert InferencePool(workers=16, torch_threads=0, queue_limit=1, per_client_limit=1).torch_threads == 1
+
+
+def mapped_weights(lang_code):
+    """Runs in a worker process: loads lang_code and lists the model store files it has mapped."""
+    import os
+
+    from src.core.model_store import WEIGHTS_FILE
+    from src.core.tts_engine import engine
+
+    engine.load_lang(lang_code).release()
+    with open("/proc/self/maps") as f:
+        mapped = {line.split()[-1] for line in f if line.rstrip().endswith(WEIGHTS_FILE)}
+    return os.getpid(), engine.use_model_store, sorted(mapped)
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/maps"), reason="needs /proc to see memory mappings")
+def test_process_workers_match_threads_and_map_the_model_store(tmp_path, monkeypatch):
+    from benchmarks.tiny_model import load_tiny_model
+    from src.core import tts_engine
+    from src.core.config import settings
+    from src.core.model_store import WEIGHTS_FILE, model_dir, write_snapshot
+    from src.core.tts_engine import MMSEngine, synthesize_batch_job
+    from src.core.workers import ProcessInferencePool
+
+    model, tokenizer = load_tiny_model()
+    # Noise off in the config, so every process that loads the snapshot renders the same audio
+    model.config.noise_scale = model.config.noise_scale_duration = 0.0
+    path = write_snapshot(model_dir("eng", str(tmp_path)), model, tokenizer, "tiny")
+    # Spawned workers read their settings from the environment
+    monkeypatch.setenv("MODEL_STORE_DIR", str(tmp_path))
+    monkeypatch.setenv("MODEL_STORE_BAKED_DIR", "")
+    monkeypatch.setattr(settings, "MODEL_STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "MODEL_STORE_BAKED_DIR", "")
+
+    engine = MMSEngine()
+    engine.use_model_store = True
+    monkeypatch.setattr(tts_engine, "engine", engine)
+    texts = ["hello there", "a longer sentence for the batch"]
+
+    async def run():
+        threads = pool()
+        processes = ProcessInferencePool(workers=1, torch_threads=1, queue_limit=4, per_client_limit=4)
+        try:
+            expected = await threads.run(synthesize_batch_job, texts, "eng", 1.0)
+            got = await processes.run(synthesize_batch_job, texts, "eng", 1.0)
+            worker = await processes.run(mapped_weights, "eng")
+        finally:
+            threads.executor.shutdown()
+            processes.executor.shutdown()
+        return expected, got, worker
+    expected, got, (pid, use_model_store, mapped) = asyncio.run(run())
+
+    assert [sr for _, sr in got] == [sr for _, sr in expected] == [16000, 16000]
+    for (waveform, _), (reference, _) in zip(got, expected):
+        np.testing.assert_allclose(waveform, reference, atol=1e-5)
+    assert pid != os.getpid() and use_model_store
+    assert mapped == [os.path.join(path, WEIGHTS_FILE)]